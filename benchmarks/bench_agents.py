@@ -0,0 +1,291 @@
+"""에이전트 end-to-end 오프라인 벤치마크
+
+스텁 LLM 서버(benchmarks/stub_llm_server.py)와 stdio MCP 스텁 서버(benchmarks/stub_mcp_server.py)로
+LM Studio 없이 PromptBasedAgent / AssistantAgent 경로를 측정한다.
+
+측정 항목: 턴 지연 시간 백분위(p50/p90/p99), 첫 이벤트까지 시간, 처리량(turns/s),
+LLM 요청 수와 프롬프트/생성 토큰, 연속 요청 간 공유 프롬프트 접두사 비율과 툴 선택 통계(PromptBasedAgent),
+메모리(RSS, 선택적으로 tracemalloc 최대치).
+결과는 JSON으로 저장하며 --compare로 이전 결과와 비교할 수 있다.
+
+실행: python benchmarks/bench_agents.py --agent both --sessions 4 --turns 5
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from autogen_agentchat.messages import TextMessage, ModelClientStreamingChunkEvent
+from autogen_core import CancellationToken
+from autogen_core.models import ModelInfo
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+from orchestrator import config
+from orchestrator.agent_factory import AgentFactory
+from orchestrator.llm_transport import close_llm_transport, get_llm_transport
+from orchestrator.mcp_session_pool import get_mcp_session_pool, close_mcp_session_pool
+from orchestrator.interaction_trace import close_interaction_trace, http_client_kwargs
+from orchestrator.telemetry import percentile
+from benchmarks.stub_llm_server import StubLLMServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+QUESTIONS = [
+    "CPU 사용률을 알려주세요",
+    "지금 시스템 상태가 어떤가요?",
+    "CPU 부하가 높은지 확인해 주세요",
+]
+
+
+def rss_mb() -> Optional[float]:
+    """프로세스 최대 RSS(MB) - resource 모듈이 없으면 None"""
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 byte 단위
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+async def build_agent(kind: str, tools: List[Any], base_url: str, stream: bool):
+    """스텁 서버를 가리키는 에이전트 생성 (kind: prompt | assistant)"""
+    model_client = OpenAIChatCompletionClient(
+        model="stub-model",
+        base_url=base_url,
+        api_key="stub",
+        model_info=ModelInfo(
+            vision=False,
+            function_calling=(kind == "assistant"),
+            json_output=False,
+            family="unknown",
+            structured_output=False,
+        ),
+        **http_client_kwargs(),
+    )
+    return await AgentFactory.create_agent(
+        model_client=model_client,
+        tools=tools,
+        system_message="당신은 오케스트레이터 AI입니다.",
+        max_tool_iterations=5,
+        name="orchestrator",
+        reflect_on_tool_use=True,
+        model_client_stream=stream,
+    )
+
+
+async def run_turn(agent, question: str) -> Dict[str, float]:
+    """한 턴 실행 - 전체 지연과 첫 이벤트(스트리밍 청크 포함)까지 시간(ms)"""
+    start = time.perf_counter()
+    first_event = None
+    async for evt in agent.on_messages_stream([TextMessage(content=question, source="user")], CancellationToken()):
+        if first_event is None:
+            first_event = time.perf_counter()
+        if isinstance(evt, ModelClientStreamingChunkEvent):
+            continue
+    end = time.perf_counter()
+    return {"latency_ms": (end - start) * 1000, "first_event_ms": ((first_event or end) - start) * 1000}
+
+
+def tool_selection_stats(agents: List[Any]) -> Optional[Dict[str, int]]:
+    """측정 세션들의 툴 선택 통계 합계 (툴 선택을 쓰지 않으면 None)"""
+    selectors = [agent.tool_selector for agent in agents if getattr(agent, "tool_selector", None) is not None]
+    if not selectors:
+        return None
+    keys = ("turns", "selected_turns", "fallback_turns", "prompt_tokens_saved")
+    return {key: sum(selector.stats()[key] for selector in selectors) for key in keys}
+
+
+async def run_scenario(kind: str, tools: List[Any], server: StubLLMServer, args) -> Dict[str, Any]:
+    """세션 여러 개가 동시에 턴을 반복하는 시나리오 측정"""
+    # 워밍업: 커넥션 풀 / MCP 세션 준비 (측정에서 제외)
+    warmup = await build_agent(kind, tools, server.base_url, args.stream)
+    await run_turn(warmup, QUESTIONS[0])
+
+    agents = [await build_agent(kind, tools, server.base_url, args.stream) for _ in range(args.sessions)]
+    server.stats.reset()
+    prefix_before = get_llm_transport().prefix_tracker.stats()
+    if args.trace_memory:
+        tracemalloc.start()
+
+    samples: List[Dict[str, float]] = []
+
+    async def session(index: int, agent):
+        for turn in range(args.turns):
+            samples.append(await run_turn(agent, QUESTIONS[(index + turn) % len(QUESTIONS)]))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(i, agent) for i, agent in enumerate(agents)))
+    wall = time.perf_counter() - start
+
+    peak_traced = None
+    if args.trace_memory:
+        peak_traced = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    latencies = [s["latency_ms"] for s in samples]
+    first_events = [s["first_event_ms"] for s in samples]
+    stats = server.stats.snapshot()
+    turns = len(samples)
+    prefix_after = get_llm_transport().prefix_tracker.stats()
+    prefix_requests = prefix_after["requests"] - prefix_before["requests"]
+    prefix_shared = prefix_after["shared_chars"] - prefix_before["shared_chars"]
+    prefix_total = prefix_after["total_chars"] - prefix_before["total_chars"]
+    return {
+        "agent_type": AgentFactory.get_agent_type_info(agents[0])["type"],
+        "turns": turns,
+        "wall_s": round(wall, 3),
+        "throughput_turns_per_s": round(turns / wall, 2) if wall else None,
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies), 2),
+            "p50": round(percentile(latencies, 50), 2),
+            "p90": round(percentile(latencies, 90), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies), 2),
+        },
+        "first_event_ms": {
+            "p50": round(percentile(first_events, 50), 2),
+            "p90": round(percentile(first_events, 90), 2),
+        },
+        "llm_requests": stats["requests"],
+        "llm_requests_per_turn": round(stats["requests"] / turns, 2),
+        "prompt_tokens": stats["prompt_tokens"],
+        "prompt_tokens_per_turn": round(stats["prompt_tokens"] / turns, 1),
+        "completion_tokens": stats["completion_tokens"],
+        # 공유 전송 계층을 쓰지 않는 AssistantAgent는 None
+        "shared_prefix_ratio": round(prefix_shared / prefix_total, 3) if prefix_requests and prefix_total else None,
+        "shared_prefix_chars_per_request": round(prefix_shared / prefix_requests, 1) if prefix_requests else None,
+        "tool_selection": tool_selection_stats(agents),
+        "max_rss_mb": round(rss_mb(), 1) if rss_mb() is not None else None,
+        "traced_peak_mb": round(peak_traced, 2) if peak_traced is not None else None,
+    }
+
+
+def print_result(name: str, result: Dict[str, Any]):
+    latency = result["latency_ms"]
+    print(f"[{name}] {result['agent_type']}: {result['turns']} turns in {result['wall_s']}s "
+          f"({result['throughput_turns_per_s']} turns/s)")
+    print(f"  latency ms  p50={latency['p50']} p90={latency['p90']} p99={latency['p99']} max={latency['max']}")
+    print(f"  first event p50={result['first_event_ms']['p50']}ms | LLM requests/turn={result['llm_requests_per_turn']} "
+          f"| prompt tokens/turn={result['prompt_tokens_per_turn']} | max RSS={result['max_rss_mb']}MB")
+    selection = result.get("tool_selection")
+    if selection:
+        print(f"  tool selection: {selection['selected_turns']}/{selection['turns']} turns selected, "
+              f"{selection['prompt_tokens_saved']} prompt tokens saved")
+    if result.get("shared_prefix_ratio") is not None:
+        print(f"  shared prefix ratio={result['shared_prefix_ratio']} "
+              f"({result['shared_prefix_chars_per_request']} chars/request)")
+
+
+def compare(current: Dict[str, Any], baseline_path: str):
+    """이전 결과 파일과 주요 지표 비교 (+는 증가)"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    def delta(new, old):
+        if new is None or old in (None, 0):
+            return "n/a"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    print(f"\n비교 기준: {baseline_path}")
+    for name, result in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            continue
+        print(f"  [{name}] p50 {delta(result['latency_ms']['p50'], old['latency_ms']['p50'])}, "
+              f"p99 {delta(result['latency_ms']['p99'], old['latency_ms']['p99'])}, "
+              f"throughput {delta(result['throughput_turns_per_s'], old['throughput_turns_per_s'])}, "
+              f"prompt tokens/turn {delta(result['prompt_tokens_per_turn'], old['prompt_tokens_per_turn'])}")
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    # 사용자 환경(매니페스트 캐시 파일, 실제 LLM 설정)에 영향을 주지 않도록 벤치마크 전용 설정
+    config.TOOL_MANIFEST_CONFIG["enabled"] = False
+    if args.record or args.replay:
+        # 재생 시에는 스텁 서버 대신 기록된 응답/타이밍을 사용 (LM Studio/실제 MCP 서버 기록도 가능)
+        config.RECORD_REPLAY_CONFIG.update({"mode": "record" if args.record else "replay",
+                                            "path": args.record or args.replay, "time_scale": args.time_scale})
+    server = StubLLMServer(script={
+        "first_token_ms": args.first_token_ms,
+        "token_ms": args.token_ms,
+    }).start()
+    config.LLM_CONFIG.update({"base_url": server.base_url, "model": "stub-model", "api_key": "stub"})
+
+    mcp_conf = {
+        "type": "stdio",
+        "name": "stub-mcp",
+        "command": sys.executable,
+        "args": [os.path.join(BENCH_DIR, "stub_mcp_server.py")],
+        "env": {**os.environ, "STUB_MCP_LATENCY_MS": str(args.tool_latency_ms)},
+    }
+
+    results = {}
+    try:
+        tools = await get_mcp_session_pool().load_tools(mcp_conf, use_cache=False)
+        kinds = ["prompt", "assistant"] if args.agent == "both" else [args.agent]
+        for kind in kinds:
+            results[kind] = await run_scenario(kind, tools, server, args)
+            print_result(kind, results[kind])
+    finally:
+        await close_llm_transport()
+        await close_mcp_session_pool()
+        await close_interaction_trace()
+        server.stop()
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PromptBasedAgent / AssistantAgent 오프라인 벤치마크")
+    parser.add_argument("--agent", choices=["prompt", "assistant", "both"], default="both")
+    parser.add_argument("--sessions", type=int, default=4, help="동시 세션 수")
+    parser.add_argument("--turns", type=int, default=5, help="세션당 턴 수")
+    parser.add_argument("--no-stream", dest="stream", action="store_false", help="토큰 스트리밍 비활성화")
+    parser.add_argument("--first-token-ms", type=float, default=50.0)
+    parser.add_argument("--token-ms", type=float, default=2.0)
+    parser.add_argument("--tool-latency-ms", type=float, default=5.0)
+    parser.add_argument("--trace-memory", action="store_true", help="tracemalloc 최대 메모리 측정 (지연 시간 증가)")
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/agents-<시각>.json)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    trace = parser.add_mutually_exclusive_group()
+    trace.add_argument("--record", metavar="TRACE", help="LLM/MCP 상호작용을 기록할 파일")
+    trace.add_argument("--replay", metavar="TRACE", help="기록 파일의 응답과 타이밍으로 재생")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="재생 지연 시간 배율 (0이면 즉시)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"agents-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""ToolCallParser 마이크로 벤치마크
+
+기존 정규식 구현(여러 번의 re.DOTALL 전체 버퍼 검색)과
+IncrementalToolCallParser(한 번 순회 상태 기계)를 대용량 다중 툴 호출 응답에서 비교한다.
+
+실행: python benchmarks/bench_tool_parser.py
+"""
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator.tool_parser import ToolCallParser, IncrementalToolCallParser
+
+
+def regex_parse_tool_calls(response: str):
+    """기존 정규식 구현 (비교 기준)"""
+    pattern = r'<tool_call>\s*<name>(.*?)</name>\s*<arguments>(.*?)</arguments>\s*</tool_call>'
+    tool_calls = []
+    for name, args_str in re.findall(pattern, response, re.DOTALL):
+        try:
+            arguments = json.loads(args_str.strip())
+        except json.JSONDecodeError:
+            arguments = {}
+        tool_calls.append((name.strip(), arguments))
+    return tool_calls
+
+
+def regex_remove_tool_calls(response: str) -> str:
+    """기존 정규식 구현 (비교 기준)"""
+    cleaned = re.sub(r'<tool_call>.*?</tool_call>', '', response, flags=re.DOTALL)
+    cleaned = re.sub(r'<tool_result.*?>.*?</tool_result>', '', cleaned, flags=re.DOTALL)
+    cleaned = re.sub(r'\n\s*\n', '\n\n', cleaned)
+    return cleaned.strip()
+
+
+def build_response(num_calls: int, filler_words: int = 40) -> str:
+    """텍스트, 툴 호출, 가짜 툴 결과가 섞인 대용량 응답 생성"""
+    filler = " ".join(["시스템 상태를 확인합니다 <b>check</b>"] * filler_words)
+    parts = []
+    for i in range(num_calls):
+        args = json.dumps({"target": f"host-{i}", "limit": i, "verbose": i % 2 == 0})
+        parts.append(filler)
+        parts.append(f"\n<tool_call>\n<name>tool_{i % 7}</name>\n<arguments>{args}</arguments>\n</tool_call>\n")
+        if i % 5 == 0:
+            parts.append(f"<tool_result name='tool_{i % 7}'>\n{{\"value\": {i}}}\n</tool_result>\n")
+    parts.append(filler)
+    return "".join(parts)
+
+
+def chunked(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def timeit(fn, repeat: int) -> float:
+    """repeat회 실행 중 최솟값(ms)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def check_equivalence(response: str):
+    """두 구현의 결과가 동일한지 확인"""
+    expected_calls = regex_parse_tool_calls(response)
+    actual_calls = [(tc.name, tc.arguments) for tc in ToolCallParser.parse_tool_calls(response)]
+    assert expected_calls == actual_calls, "tool call mismatch"
+    assert regex_remove_tool_calls(response) == ToolCallParser.remove_tool_calls_from_response(response), \
+        "cleaned text mismatch"
+
+
+def run_benchmark():
+    print(f"{'calls':>6} {'bytes':>9} | {'regex full':>11} {'one-pass':>10} | "
+          f"{'regex/chunk':>12} {'feed/chunk':>11}")
+    print("-" * 72)
+
+    for num_calls in (10, 100, 250):
+        response = build_response(num_calls)
+        check_equivalence(response)
+        repeat = 20 if num_calls < 250 else 5
+
+        # 완성된 응답 전체 처리: 기존 구현은 parse + remove 두 번 호출
+        regex_full = timeit(lambda: (regex_parse_tool_calls(response), regex_remove_tool_calls(response)), repeat)
+        one_pass = timeit(lambda: ToolCallParser.parse(response), repeat)
+
+        # 스트리밍 처리 (64자 청크): 기존 구현은 청크마다 누적 버퍼 전체를 다시 검색해야 함
+        chunks = chunked(response, 64)
+
+        def regex_streaming():
+            buffer = ""
+            for chunk in chunks:
+                buffer += chunk
+                regex_parse_tool_calls(buffer)
+
+        def incremental_streaming():
+            parser = IncrementalToolCallParser()
+            for chunk in chunks:
+                parser.feed(chunk)
+            parser.close()
+
+        stream_repeat = 3 if num_calls < 250 else 1
+        regex_stream = timeit(regex_streaming, stream_repeat)
+        feed_stream = timeit(incremental_streaming, stream_repeat)
+
+        print(f"{num_calls:>6} {len(response.encode()):>9} | {regex_full:>9.2f}ms {one_pass:>8.2f}ms | "
+              f"{regex_stream:>10.1f}ms {feed_stream:>9.2f}ms")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,249 @@
+"""오프라인 벤치마크용 OpenAI 호환 /v1/chat/completions 스텁 서버
+
+LM Studio 없이 PromptBasedAgent / AssistantAgent 경로를 측정하기 위한 서버로,
+지연 시간(첫 토큰, 토큰 간격)과 툴 호출 스크립트를 설정할 수 있다.
+
+- 요청에 tools가 있으면(function calling) OpenAI tool_calls 형식으로 툴을 호출하고,
+  없으면 프롬프트 기반 <tool_call> 형식으로 호출한다.
+- 툴 결과(tool 역할 메시지 또는 <tool_result>)를 받은 뒤에는 최종 답변을 반환한다.
+
+단독 실행: python benchmarks/stub_llm_server.py --port 1234
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator.token_counter import count_tokens
+
+DEFAULT_SCRIPT = {
+    "tool_calls": [{"name": "stub_cpu", "arguments": {}}],   # 한 번의 응답에서 호출할 툴 ("id"를 주면 다단계 계획)
+    "preamble": "시스템 상태를 확인하겠습니다.",
+    "answer": "현재 CPU 사용률은 12%이며 시스템은 정상입니다.",
+    "answer_repeat": 4,           # 최종 답변 길이 조절
+    "first_token_ms": 50.0,       # 요청 수신 후 첫 토큰까지 지연
+    "token_ms": 2.0,              # 스트리밍 청크 간 지연
+    "chunk_chars": 8,             # 스트리밍 청크 크기(문자)
+}
+
+
+class StubStats:
+    """서버가 받은 요청 통계 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.stream_requests = 0
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+
+    def record(self, stream: bool, prompt_tokens: int, completion_tokens: int):
+        with self._lock:
+            self.requests += 1
+            self.stream_requests += int(stream)
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "stream_requests": self.stream_requests,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content")
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def _has_tool_result(messages: List[Dict[str, Any]]) -> bool:
+    """마지막 사용자 메시지 이후 툴 결과를 이미 받았는지"""
+    for message in reversed(messages):
+        if message.get("role") == "tool" or "<tool_result" in _message_text(message):
+            return True
+        if message.get("role") == "user":
+            return False
+    return False
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StubLLMServer"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json({"object": "list", "data": [{"id": "stub-model", "object": "model"}]})
+        elif self.path.rstrip("/").endswith("/stats"):
+            self._send_json(self.server.stats.snapshot())
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        script = self.server.script
+        messages = request.get("messages", [])
+        prompt_tokens = sum(count_tokens(_message_text(m)) for m in messages)
+        if request.get("tools"):
+            # function calling 툴 스키마도 프롬프트로 들어가므로 포함
+            prompt_tokens += count_tokens(json.dumps(request["tools"], ensure_ascii=False))
+
+        native_tools = bool(request.get("tools"))
+        if _has_tool_result(messages) or not script["tool_calls"]:
+            text, tool_calls = " ".join([script["answer"]] * script["answer_repeat"]), []
+        elif native_tools:
+            text, tool_calls = "", [
+                {"id": f"call_{uuid.uuid4().hex[:8]}", "type": "function",
+                 "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])}}
+                for call in script["tool_calls"]
+            ]
+        else:
+            blocks = "".join(
+                f"\n<tool_call>\n" + (f"<id>{call['id']}</id>\n" if call.get("id") else "")
+                + f"<name>{call['name']}</name>\n"
+                f"<arguments>{json.dumps(call['arguments'])}</arguments>\n</tool_call>"
+                for call in script["tool_calls"]
+            )
+            text, tool_calls = script["preamble"] + blocks, []
+
+        completion_tokens = count_tokens(text) + sum(count_tokens(c["function"]["arguments"]) for c in tool_calls)
+        self.server.stats.record(bool(request.get("stream")), prompt_tokens, completion_tokens)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        finish_reason = "tool_calls" if tool_calls else "stop"
+
+        time.sleep(script["first_token_ms"] / 1000)
+        try:
+            if request.get("stream"):
+                self._stream(request, text, tool_calls, finish_reason, usage)
+            else:
+                message: Dict[str, Any] = {"role": "assistant", "content": text or None}
+                if tool_calls:
+                    message["tool_calls"] = tool_calls
+                self._send_json({
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "stub-model"),
+                    "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                    "usage": usage,
+                })
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 생성을 중간에 끊은 경우
+            pass
+
+    def _send_json(self, body: Dict[str, Any]):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, request: Dict[str, Any], text: str, tool_calls: List[Dict[str, Any]],
+                finish_reason: str, usage: Dict[str, int]):
+        script = self.server.script
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": request.get("model", "stub-model")}
+
+        def send(payload: Any):
+            line = "data: " + (payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False))
+            data = (line + "\n\n").encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def choice(delta: Dict[str, Any], finish: Optional[str] = None):
+            return {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+
+        send(choice({"role": "assistant", "content": ""}))
+        size = script["chunk_chars"]
+        for i in range(0, len(text), size):
+            send(choice({"content": text[i:i + size]}))
+            time.sleep(script["token_ms"] / 1000)
+        for index, call in enumerate(tool_calls):
+            send(choice({"tool_calls": [{"index": index, **call}]}))
+        send(choice({}, finish_reason))
+        if (request.get("stream_options") or {}).get("include_usage"):
+            send({**base, "choices": [], "usage": usage})
+        send("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    """백그라운드 스레드에서 실행되는 스텁 LLM 서버"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, script: Optional[Dict[str, Any]] = None):
+        super().__init__((host, port), StubLLMHandler)
+        self.script = {**DEFAULT_SCRIPT, **(script or {})}
+        self.stats = StubStats()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="stub-llm-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 호환 스텁 LLM 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--first-token-ms", type=float, default=DEFAULT_SCRIPT["first_token_ms"])
+    parser.add_argument("--token-ms", type=float, default=DEFAULT_SCRIPT["token_ms"])
+    parser.add_argument("--script", help="툴 호출 스크립트 JSON 파일 (DEFAULT_SCRIPT 키 덮어쓰기)")
+    args = parser.parse_args()
+
+    script = {"first_token_ms": args.first_token_ms, "token_ms": args.token_ms}
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script.update(json.load(f))
+
+    server = StubLLMServer(args.host, args.port, script)
+    print(f"스텁 LLM 서버 실행 중: {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""오프라인 벤치마크용 stdio MCP 스텁 서버
+
+실제 리소스 모니터 서버 대신 고정된 값을 돌려주는 툴을 제공한다.
+툴 실행 지연은 환경 변수 STUB_MCP_LATENCY_MS로 설정한다 (기본 5ms).
+
+실행: python benchmarks/stub_mcp_server.py (MCP 클라이언트가 stdio로 실행)
+"""
+import asyncio
+import os
+from mcp.server.fastmcp import FastMCP
+
+LATENCY = float(os.environ.get("STUB_MCP_LATENCY_MS", "5")) / 1000
+
+mcp = FastMCP("stub-resource-monitor", log_level="WARNING")
+
+
+@mcp.tool()
+async def stub_cpu() -> str:
+    """현재 CPU 사용률(%)을 반환합니다."""
+    await asyncio.sleep(LATENCY)
+    return "CPU 사용률: 12%"
+
+
+@mcp.tool()
+async def stub_memory() -> str:
+    """현재 메모리 사용량을 반환합니다."""
+    await asyncio.sleep(LATENCY)
+    return "메모리 사용량: 3.2GB / 16GB (20%)"
+
+
+@mcp.tool()
+async def stub_disk(path: str = "/") -> str:
+    """지정한 경로의 디스크 사용량을 반환합니다."""
+    await asyncio.sleep(LATENCY)
+    return f"디스크 사용량({path}): 120GB / 512GB (23%)"
+
+
+if __name__ == "__main__":
+    mcp.run()
@@ -6,7 +6,8 @@ async def debug_tools():
     print("Loading MCP tools...")
 
     try:
-        tools = await load_mcp_tools()
+        # 캐시가 아닌 서버의 실제 목록을 조회 (툴 매니페스트도 갱신됨)
+        tools = await load_mcp_tools(use_cache=False)
         print(f"\nFound {len(tools)} tools:")
 
         for i, tool in enumerate(tools):
@@ -18,10 +18,53 @@ logging.getLogger(EVENT_LOGGER_NAME).setLevel(logging.ERROR)
 
 import sys
 
+def configure_record_replay(args):
+    """--record/--replay 옵션을 RECORD_REPLAY_CONFIG에 반영 (공유 자원을 만들기 전에 호출)"""
+    from orchestrator.config import RECORD_REPLAY_CONFIG
+
+    if args.record or args.replay:
+        RECORD_REPLAY_CONFIG.update({
+            "mode": "record" if args.record else "replay",
+            "path": args.record or args.replay,
+            "time_scale": args.time_scale,
+        })
+
+def run_batch_mode(argv):
+    """배치 모드: JSONL 질의를 독립 세션으로 동시 실행"""
+    import argparse
+    import asyncio
+    from orchestrator.batch_runner import run_batch
+    from orchestrator.config import BATCH_CONFIG
+
+    parser = argparse.ArgumentParser(prog="main.py batch", description="JSONL 질의 배치 실행")
+    parser.add_argument("input", help='입력 JSONL (한 줄에 {"id": ..., "query": ...})')
+    parser.add_argument("output", help="결과 JSONL (이미 있으면 성공한 id는 건너뛰고 이어서 실행)")
+    parser.add_argument("-c", "--concurrency", type=int, default=BATCH_CONFIG["concurrency"])
+    parser.add_argument("--timeout", type=float, default=BATCH_CONFIG["turn_timeout"], help="질의별 제한 시간(초)")
+    trace = parser.add_mutually_exclusive_group()
+    trace.add_argument("--record", metavar="TRACE", help="LLM/MCP 상호작용을 기록할 파일")
+    trace.add_argument("--replay", metavar="TRACE", help="LLM/MCP 서버 대신 기록 파일로 응답")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="재생 지연 시간 배율 (0이면 즉시)")
+    args = parser.parse_args(argv)
+    configure_record_replay(args)
+
+    try:
+        asyncio.run(run_batch(args.input, args.output, args.concurrency, args.timeout))
+    except KeyboardInterrupt:
+        print("\n배치 중단 - 같은 명령으로 다시 실행하면 이어서 처리합니다.")
+
 def main():
+    from orchestrator.telemetry import init_telemetry
+    init_telemetry()
+
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        run_batch_mode(sys.argv[2:])
+        return
+
     print("모드를 선택하세요:")
     print("1) CLI")
     print("2) Web UI")
+    print("3) Batch (JSONL)")
     mode = input("> ")
 
     if mode.strip() == "1":
@@ -29,8 +72,25 @@ def main():
         from orchestrator.agent_builder import create_orchestrator_agent
         from autogen_agentchat.ui import Console
         from autogen_agentchat.agents import AssistantAgent
+        from orchestrator.llm_transport import close_llm_transport
+        from orchestrator.llm_router import close_llm_router
+        from orchestrator.mcp_session_pool import close_mcp_session_pool
+        from orchestrator.interaction_trace import close_interaction_trace
+        from orchestrator.llm_cache import get_completion_cache
+        from orchestrator.config import LLM_CACHE_CONFIG
 
         async def run_cli():
+            try:
+                await _run_cli()
+            finally:
+                await close_llm_router()
+                await close_llm_transport()
+                await close_mcp_session_pool()
+                await close_interaction_trace()
+                if LLM_CACHE_CONFIG["enabled"]:
+                    print(f"LLM 응답 캐시: {get_completion_cache().stats()}")
+
+        async def _run_cli():
             agent = await create_orchestrator_agent()
             print("질문을 입력하세요 ('exit' 입력 시 종료):")
 
@@ -66,10 +126,14 @@ def main():
     elif mode.strip() == "2":
         import streamlit.web.cli as stcli
         import os
-        import sys
         from ui import web_ui
         sys.argv = ["streamlit", "run", "ui/web_ui.py"]
         sys.exit(stcli.main())
 
+    elif mode.strip() == "3":
+        input_path = input("입력 JSONL 경로: ").strip()
+        output_path = input("출력 JSONL 경로: ").strip()
+        run_batch_mode([input_path, output_path])
+
 if __name__ == "__main__":
     main()
@@ -1,16 +1,35 @@
 import asyncio
+from typing import Any, List, Optional
 from orchestrator.llm_connector import get_llm_client
 from orchestrator.mcp_tool_loader import load_mcp_tools
 from orchestrator.agent_factory import AgentFactory
+from orchestrator.prompt_agent import PromptBasedAgent
 
-async def create_orchestrator_agent():
+async def create_orchestrator_agent(tools: Optional[List[Any]] = None, llm_client=None):
     """
     LLM 특성에 따라 적절한 에이전트를 생성
     - Function calling 지원: AssistantAgent 사용
     - Function calling 미지원: PromptBasedAgent 사용
+
+    tools/llm_client를 넘기면 MCP 툴 로드와 클라이언트 생성을 생략하고 공유 자원을 사용
+    (세션별 에이전트 생성용, 늦게 연결된 툴은 호출한 쪽에서 추가)
     """
-    llm_client = get_llm_client()
-    tools = await load_mcp_tools()
+    llm_client = llm_client or get_llm_client()
+
+    # 늦게 연결된 MCP 서버의 툴은 에이전트 생성 후 추가
+    agent = None
+    late_tools = []
+
+    def attach_late_tools(new_tools):
+        if agent is None:
+            late_tools.extend(new_tools)
+        elif isinstance(agent, PromptBasedAgent):
+            agent.add_tools(new_tools)
+        else:
+            print(f"AssistantAgent에는 실행 중 툴을 추가할 수 없습니다: {[t.name for t in new_tools]}")
+
+    if tools is None:
+        tools = await load_mcp_tools(on_late_tools=attach_late_tools)
 
     system_prompt = (
         "당신은 오케스트레이터 AI입니다. 사용자 질문을 분석하고 "
@@ -29,6 +48,9 @@ async def create_orchestrator_agent():
         model_client_stream=True
     )
 
+    if late_tools:
+        attach_late_tools(late_tools)
+
     # 에이전트 정보 출력 (디버깅용)
     agent_info = AgentFactory.get_agent_type_info(agent)
     print(f"Agent created: {agent_info}")
@@ -3,6 +3,7 @@ from autogen_agentchat.agents import AssistantAgent
 from autogen_core.models import ModelInfo
 from .prompt_agent import PromptBasedAgent
 from .tool_parser import ToolCallParser
+from orchestrator.config import PROMPT_AGENT_CONFIG, TOOL_SELECTION_CONFIG
 
 class AgentFactory:
     """LLM 특성에 따라 적절한 에이전트를 생성하는 팩토리 클래스"""
@@ -53,6 +54,12 @@ class AgentFactory:
             system_message: 시스템 메시지
             max_tool_iterations: 최대 도구 호출 반복 횟수
             **kwargs: AssistantAgent에 전달할 추가 인수
+                (transport: PromptBasedAgent가 사용할 LLMTransport, 생략 시 공유 전송 계층)
+                (model_client_stream: PromptBasedAgent에서도 토큰 스트리밍 사용)
+                (max_concurrent_tools, tool_timeout: PromptBasedAgent 툴 동시 실행 설정)
+                (max_prompt_tokens: PromptBasedAgent 히스토리 토큰 예산)
+                (turn_timeout: PromptBasedAgent 자체 턴 마감 시간, 생략 시 호출한 쪽의 취소 토큰만 따름)
+                (tool_selection: 질의 관련 툴만 시스템 프롬프트에 포함)
 
         Returns:
             AssistantAgent 또는 PromptBasedAgent
@@ -92,7 +99,14 @@ class AgentFactory:
                 model_client=model_client,
                 tools=tools,
                 system_message=enhanced_system_message,
-                max_tool_iterations=max_tool_iterations
+                max_tool_iterations=max_tool_iterations,
+                transport=kwargs.get("transport"),
+                stream=kwargs.get("model_client_stream", False),
+                max_concurrent_tools=kwargs.get("max_concurrent_tools"),
+                tool_timeout=kwargs.get("tool_timeout", PROMPT_AGENT_CONFIG["tool_timeout"]),
+                max_prompt_tokens=kwargs.get("max_prompt_tokens"),
+                turn_timeout=kwargs.get("turn_timeout"),
+                tool_selection=kwargs.get("tool_selection", TOOL_SELECTION_CONFIG["enabled"])
             )
 
     @staticmethod
@@ -0,0 +1,211 @@
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from autogen_agentchat.base import Response
+from autogen_agentchat.messages import TextMessage, ToolCallRequestEvent, ToolCallExecutionEvent
+from orchestrator.config import BATCH_CONFIG
+from orchestrator.session_manager import SessionManager
+from orchestrator.prompt_agent import is_error_message
+from orchestrator.telemetry import percentile
+from orchestrator.tool_cache import get_tool_result_cache
+
+
+def read_queries(path: str) -> Iterator[Tuple[str, str]]:
+    """입력 JSONL에서 (id, 질의) 읽기 - id가 없으면 줄 번호 사용
+
+    각 줄은 {"id": "...", "query": "..."} 형식이며 문자열만 있는 줄도 허용한다.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"입력 {line_no}행 JSON 오류 - 건너뜀: {e}")
+                continue
+            if isinstance(record, str):
+                record = {"query": record}
+            query = record.get("query") or record.get("task")
+            if not query:
+                print(f"입력 {line_no}행에 query가 없음 - 건너뜀")
+                continue
+            yield str(record.get("id", line_no)), query
+
+
+def completed_ids(path: str) -> Set[str]:
+    """이미 성공적으로 처리된 id (재개용) - 실패한 항목은 다시 실행"""
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # 중단 시 마지막 줄이 잘렸을 수 있음
+                continue
+            if record.get("error") is None:
+                done.add(str(record.get("id")))
+            else:
+                done.discard(str(record.get("id")))
+    return done
+
+
+class BatchRunner:
+    """JSONL 질의를 독립 세션으로 동시에 실행하고 결과를 JSONL로 스트리밍 저장
+
+    LLM/MCP 커넥션 풀과 툴 목록은 SessionManager를 통해 모든 세션이 공유한다.
+    출력 파일에 이미 성공한 id는 건너뛰므로 중단 후 같은 명령으로 이어서 실행할 수 있다.
+    """
+
+    def __init__(self, input_path: str, output_path: str, concurrency: Optional[int] = None,
+                 turn_timeout: Optional[float] = None):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.concurrency = concurrency or BATCH_CONFIG["concurrency"]
+        self.turn_timeout = turn_timeout if turn_timeout is not None else BATCH_CONFIG["turn_timeout"]
+        # 배치 세션은 대화형 세션보다 낮은 우선순위로 LLM 백엔드를 사용 (턴 마감은 _run_query의 wait_for)
+        self.sessions = SessionManager({"eviction_interval": 0, "max_sessions": max(self.concurrency, 1) * 2,
+                                        "priority_class": "batch", "turn_timeout": None})
+        self._session_seq = itertools.count()
+        self.latencies: List[float] = []
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+
+    async def _run_query(self, record_id: str, query: str) -> Dict[str, Any]:
+        """질의 하나를 새 세션에서 실행
+
+        id가 중복되거나 없는 입력도 서로 세션을 공유하지 않도록 세션은 내부 순번으로 구분한다
+        (id는 출력과 재개 확인에만 사용).
+        """
+        result: Dict[str, Any] = {"id": record_id, "query": query, "response": None, "tool_calls": [],
+                                  "tool_errors": 0, "error": None}
+        session_id = f"batch-{next(self._session_seq)}"
+        start = time.perf_counter()
+        try:
+            async with self.sessions.turn(session_id) as session:
+                result["agent_type"] = type(session.agent).__name__
+                await asyncio.wait_for(self._collect(session, query, result), timeout=self.turn_timeout)
+        except asyncio.TimeoutError:
+            result["error"] = f"시간 초과 ({self.turn_timeout}초)"
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            self.sessions.close_session(session_id)
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    @staticmethod
+    async def _collect(session, query: str, result: Dict[str, Any]):
+        """에이전트 이벤트에서 최종 응답과 툴 호출 기록 (AssistantAgent/PromptBasedAgent 공통)
+
+        PromptBasedAgent가 오류 메시지로 턴을 끝내면(LLM 오류, 마감 시간 초과, 취소) error에 기록해
+        재개 시 다시 실행되도록 한다.
+        """
+        messages = [TextMessage(content=query, source="user")]
+        async for evt in session.agent.on_messages_stream(messages, session.cancellation_token):
+            if isinstance(evt, ToolCallRequestEvent):
+                result["tool_calls"].extend(call.name for call in evt.content)
+            elif isinstance(evt, ToolCallExecutionEvent):
+                result["tool_errors"] += sum(1 for item in evt.content if item.is_error)
+            elif isinstance(evt, Response):
+                result["response"] = evt.chat_message.to_text()
+            elif is_error_message(evt):
+                result["error"] = evt.content
+            elif isinstance(evt, TextMessage) and evt.source != "user":
+                result["response"] = evt.content
+
+    async def run(self) -> Dict[str, Any]:
+        """배치 실행 - 동시 실행 수만큼의 워커가 입력을 순서대로 가져가 처리"""
+        done = completed_ids(self.output_path)
+        queue: "asyncio.Queue[Optional[Tuple[str, str]]]" = asyncio.Queue(maxsize=self.concurrency * 2)
+        directory = os.path.dirname(self.output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        start = time.perf_counter()
+        with open(self.output_path, "a", encoding="utf-8") as output:
+
+            async def worker():
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    result = await self._run_query(*item)
+                    # 완료 즉시 한 줄씩 기록 (중단되어도 이전 결과는 보존)
+                    output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    output.flush()
+                    if result["error"] is None:
+                        self.succeeded += 1
+                        self.latencies.append(result["latency_ms"])
+                    else:
+                        self.failed += 1
+                    status = "OK" if result["error"] is None else f"실패: {result['error']}"
+                    print(f"[{self.succeeded + self.failed}] {result['id']} {result['latency_ms']}ms {status}")
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                for record_id, query in read_queries(self.input_path):
+                    if record_id in done:
+                        self.skipped += 1
+                        continue
+                    await queue.put((record_id, query))
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+                await self.sessions.aclose()
+
+        return self.stats(time.perf_counter() - start)
+
+    def stats(self, wall: float) -> Dict[str, Any]:
+        """처리량과 지연 시간 통계"""
+        processed = self.succeeded + self.failed
+        stats: Dict[str, Any] = {
+            "processed": processed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "concurrency": self.concurrency,
+            "wall_s": round(wall, 2),
+            "throughput_qps": round(processed / wall, 3) if wall else 0.0,
+        }
+        if self.latencies:
+            stats["latency_ms"] = {
+                "mean": round(statistics.mean(self.latencies), 1),
+                "p50": round(percentile(self.latencies, 50), 1),
+                "p90": round(percentile(self.latencies, 90), 1),
+                "p99": round(percentile(self.latencies, 99), 1),
+                "max": round(max(self.latencies), 1),
+            }
+        tool_cache = get_tool_result_cache().stats()
+        if tool_cache["hits"] + tool_cache["misses"] + tool_cache["coalesced"]:
+            stats["tool_cache"] = tool_cache
+        return stats
+
+
+async def run_batch(input_path: str, output_path: str, concurrency: Optional[int] = None,
+                    turn_timeout: Optional[float] = None) -> Dict[str, Any]:
+    """배치 실행 후 통계 출력"""
+    runner = BatchRunner(input_path, output_path, concurrency, turn_timeout)
+    stats = await runner.run()
+    print(f"\n배치 완료: {stats['processed']}건 처리 (성공 {stats['succeeded']}, 실패 {stats['failed']}, "
+          f"건너뜀 {stats['skipped']}) / {stats['wall_s']}초, {stats['throughput_qps']} q/s")
+    if "latency_ms" in stats:
+        latency = stats["latency_ms"]
+        print(f"지연 시간(ms): 평균 {latency['mean']}, p50 {latency['p50']}, p90 {latency['p90']}, "
+              f"p99 {latency['p99']}, 최대 {latency['max']}")
+    if "tool_cache" in stats:
+        cache = stats["tool_cache"]
+        print(f"툴 결과 캐시: 적중 {cache['hits']}, 합류 {cache['coalesced']}, 실행 {cache['misses']} "
+              f"(적중률 {cache['hit_rate']:.1%})")
+    return stats
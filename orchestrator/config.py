@@ -5,6 +5,71 @@ LLM_CONFIG = {
     "api_key": "",
 }
 
+# LLM HTTP 전송 설정 (PromptBasedAgent 공유 커넥션 풀)
+LLM_TRANSPORT_CONFIG = {
+    "http2": True,                    # h2 패키지가 없으면 HTTP/1.1 keep-alive 사용
+    "max_connections": 10,            # 엔드포인트별 최대 동시 커넥션
+    "max_keepalive_connections": 5,   # 엔드포인트별 유휴 keep-alive 커넥션
+    "keepalive_expiry": 30.0,
+    "timeout": 30.0,
+    "connect_timeout": 5.0,
+    # 엔드포인트별 개별 설정: {"http://host:port/v1": {"max_connections": 4}}
+    "endpoint_limits": {},
+}
+
+# PromptBasedAgent 설정
+PROMPT_AGENT_CONFIG = {
+    "max_concurrent_tools": 4,   # 한 번의 반복에서 동시에 실행할 최대 툴 수
+    "tool_timeout": 30.0,        # 툴별 실행 제한 시간(초), None이면 제한 없음
+    "temperature": 0.7,
+    "tool_turn_max_tokens": 512,          # 툴 선택 반복(툴 결과를 받기 전)의 생성 토큰 상한
+    "final_max_tokens": 2000,             # 툴 결과를 받은 뒤(최종 응답) 반복의 생성 토큰 상한
+    "stop_sequences": ["<tool_result"],   # 모델이 툴 결과를 지어내기 시작하면 서버에서 생성 중단
+    "tool_call_tail_chars": 80,           # 스트리밍 중 툴 호출 뒤 이 글자 수를 넘는 텍스트가 이어지면 생성 중단
+}
+
+# 여러 LLM 서버 라우팅 (동일한 모델을 띄운 서버들로 부하 분산 + 장애 조치)
+LLM_ROUTER_CONFIG = {
+    "endpoints": [],                 # base_url 목록, 비어 있으면 LLM_CONFIG["base_url"]만 사용
+    "strategy": "least_outstanding", # "least_outstanding" 또는 "ewma" (지연 시간 EWMA x 처리 중 요청 수)
+    "ewma_alpha": 0.3,
+    "session_affinity": True,        # 같은 세션은 프롬프트 캐시가 있는 엔드포인트로 계속 전송
+    "affinity_max_skew": 4,          # 고정 엔드포인트의 처리 중 요청이 최소값보다 이만큼 많으면 재배치
+    "affinity_max_sessions": 1000,
+    "max_attempts": 3,               # 장애 조치 포함 요청당 최대 시도 엔드포인트 수
+    "cooldown": 10.0,                # 장애 엔드포인트 제외 시간(초), 연속 실패 시 최대 8배까지 증가
+    "health_check_interval": 15.0,   # /models 상태 확인 주기(초), 0이면 비활성화 (엔드포인트가 2개 이상일 때만)
+    "health_check_timeout": 2.0,
+    "hedge_delay": None,             # 초, 이 시간 안에 응답이 없으면 다음 엔드포인트로 중복 요청 (None이면 비활성화, 비스트리밍만)
+}
+
+# LLM 요청 승인 제어 (백엔드별 동시 요청 수 제한 + 우선순위/세션 공정 대기열)
+LLM_SCHEDULER_CONFIG = {
+    "enabled": True,
+    "max_in_flight": 4,      # 백엔드별 동시에 처리 중인 최대 요청 수
+    "endpoint_limits": {},   # base_url별 개별 제한, 예: {"http://127.0.0.1:1234/v1": 2}
+}
+
+# 대화 히스토리 설정 (PromptBasedAgent 프롬프트 토큰 예산)
+HISTORY_CONFIG = {
+    "max_prompt_tokens": 6000,       # 시스템 프롬프트 + 히스토리 최대 토큰 수
+    "tokenizer": "cl100k_base",      # tiktoken 인코딩 (오프라인이면 근사치 사용)
+    "per_message_overhead": 4,       # 메시지별 role/구분자 토큰
+    "tool_result_keep_chars": 200,   # 예산 초과 시 오래된 툴 결과에서 남길 글자 수
+    "trim_to_ratio": 0.75,           # 예산 초과 시 이 비율까지 한 번에 줄임 (KV 캐시 접두사 유지)
+}
+
+# 질의 관련 툴 선택 (PromptBasedAgent 시스템 프롬프트에 top-k 툴만 포함)
+TOOL_SELECTION_CONFIG = {
+    "enabled": True,
+    "top_k": 5,
+    "min_tools": 8,   # 툴이 이 수 이하이면 항상 전체 목록 사용
+    "k1": 1.5,        # BM25 파라미터
+    "b": 0.75,
+    "sticky": True,          # 세션에서 선택된 툴을 이후 턴에도 유지 (시스템 프롬프트 접두사 고정)
+    "max_sticky_tools": 10,  # 유지하는 툴이 이보다 많아지면 이번 턴 선택으로 다시 시작
+}
+
 # MCP 툴 서버 설정 (필요시 환경변수 또는 DB 연동 가능)
 MCP_SERVERS = [
     # {
@@ -31,3 +96,90 @@ MCP_SERVERS = [
     #     "args": ["C:\\U/sers\\lauru\\PythonProjects\\AutoGen_MCP\\mcp-weather\\server.py"]
     # }
 ]
+
+# MCP 세션 풀 설정 (서버별 지속 세션 재사용)
+MCP_POOL_CONFIG = {
+    "discovery_timeout": 10.0,       # 에이전트 생성 전 서버별 툴 목록 대기 시간(초), 서버 항목의 "timeout"으로 개별 지정
+    "background_attach": True,       # 대기 시간을 넘긴 서버는 백그라운드에서 계속 연결 후 툴 추가
+    "startup_timeout": 30.0,         # 서버 실행 + initialize 제한 시간(초)
+    "shutdown_timeout": 5.0,
+    "ping_timeout": 5.0,
+    "health_check_interval": 30.0,   # 주기적 ping 간격(초), 0이면 비활성화
+    "retry_tools": [],               # 요청을 보낸 뒤 세션이 끊겨도 재시작 후 재시도할 (멱등) 툴 이름
+}
+
+# MCP 툴 매니페스트 캐시 (서버를 띄우지 않고 툴 목록/스키마를 바로 사용, 첫 호출 시 연결)
+TOOL_MANIFEST_CONFIG = {
+    "enabled": True,
+    "path": "~/.autogen-agent3/tool_manifest.json",
+}
+
+# 툴 결과 캐시 (동일한 툴 + 인자 호출 재사용, AssistantAgent/PromptBasedAgent 공통)
+TOOL_RESULT_CACHE_CONFIG = {
+    "enabled": True,
+    "max_entries": 256,
+    "default_ttl": None,    # 목록에 없는 툴은 캐시하지 않음 (비멱등 툴 보호)
+    "tool_ttls": {          # 툴별 TTL(초)
+        "cpu_usage": 2.0,
+        "memory_usage": 5.0,
+        "disk_usage": 30.0,
+    },
+}
+
+# 큰 툴 결과 압축 (PromptBasedAgent - 프롬프트에는 구조를 유지한 일부만 넣고 원문은 핸들로 조회)
+TOOL_RESULT_COMPACTION_CONFIG = {
+    "enabled": True,
+    "max_bytes": 4000,           # 대화에 넣을 툴 결과 최대 크기(UTF-8 바이트)
+    "max_tokens": 1000,          # 대화에 넣을 툴 결과 최대 토큰 수
+    "tool_limits": {},           # 툴별 한도, 예: {"process_list": {"max_bytes": 2000, "max_tokens": 500}}
+    "max_list_items": 20,        # JSON 배열에서 앞부분만 남길 항목 수 (한도를 넘으면 절반씩 줄임)
+    "max_string_chars": 400,     # JSON 문자열 값에서 남길 문자 수 (한도를 넘으면 절반씩 줄임)
+    "fetch_chars": 1500,         # fetch_tool_result 한 번에 돌려줄 원문 문자 수
+    "store_max_entries": 32,     # 에이전트(세션)별 원문 보관 수 (LRU)
+    "store_max_bytes": 4 * 1024 * 1024,  # 에이전트(세션)별 원문 보관 크기
+}
+
+# LLM 응답 캐시 (동일한 대화 + 생성 파라미터 요청은 백엔드 호출 생략, opt-in)
+LLM_CACHE_CONFIG = {
+    "enabled": False,
+    "max_entries": 512,               # 메모리 LRU 계층 크기
+    "persist_path": None,             # 예: "~/.autogen-agent3/llm_cache.sqlite3" (영구 계층)
+    "allow_nondeterministic": False,  # True면 temperature > 0 요청도 캐시
+}
+
+# 웹 UI 멀티 세션 설정 (세션별 에이전트, LLM/MCP 풀은 공유)
+SESSION_CONFIG = {
+    "idle_timeout": 1800.0,      # 이 시간(초) 동안 사용하지 않은 세션은 정리
+    "max_sessions": 100,         # 최대 세션 수 (넘으면 가장 오래된 유휴 세션부터 정리)
+    "eviction_interval": 60.0,   # 유휴 세션 정리 주기(초), 0이면 비활성화
+    "priority_class": "interactive",  # LLM 스케줄러 우선순위 등급 ("interactive" 또는 "batch")
+    "turn_timeout": 180.0,       # 턴마다 새 취소 토큰을 만들고 이 시간(초)이 지나면 취소, None이면 제한 없음
+}
+
+# 웹 UI 스트리밍 렌더링 설정
+UI_STREAM_CONFIG = {
+    "min_render_interval": 0.1,  # 부분 텍스트 갱신 최소 간격(초) - 툴 이벤트/최종 응답은 즉시 갱신
+}
+
+# OpenTelemetry 트레이싱/메트릭 (opentelemetry-sdk 필요, 없으면 no-op)
+TELEMETRY_CONFIG = {
+    "enabled": False,
+    "exporter": "console",                  # "console" 또는 "memory"
+    "service_name": "autogen-agent3",
+    "metric_export_interval_ms": 60000,     # console exporter 메트릭 출력 주기
+}
+
+# LLM/MCP 상호작용 기록/재생 (LM Studio와 MCP 서버 없이 같은 턴을 결정적으로 다시 실행)
+RECORD_REPLAY_CONFIG = {
+    "mode": None,                 # None, "record"(실제 서버 호출 + 기록), "replay"(기록으로 응답)
+    "path": "~/.autogen-agent3/traces/trace.jsonl",
+    "time_scale": 1.0,            # 재생 시 기록된 지연 시간 배율 (0이면 지연 없이 즉시 응답)
+    "strict": False,              # True면 요청 내용이 같은 기록이 없을 때 실패, False면 같은 종류의 다음 기록 사용
+    "include_requests": False,    # True면 LLM 요청 본문도 기록 (분석용, 파일이 커짐)
+}
+
+# 배치 모드 설정 (python main.py batch <입력.jsonl> <출력.jsonl>)
+BATCH_CONFIG = {
+    "concurrency": 4,          # 동시에 실행할 세션 수
+    "turn_timeout": 300.0,     # 질의 하나의 최대 처리 시간(초)
+}
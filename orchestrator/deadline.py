@@ -0,0 +1,130 @@
+import asyncio
+import time
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Optional, TypeVar
+from autogen_core import CancellationToken
+
+T = TypeVar("T")
+
+_END = object()
+
+
+class DeadlineExceeded(TimeoutError):
+    """턴 마감 시각 초과"""
+
+
+class TurnCancelled(Exception):
+    """호출한 쪽에서 취소 토큰을 취소함 (사용자 중단, 세션 마감 등)"""
+
+
+def _outer_cancelled() -> bool:
+    """현재 태스크 자체가 취소 요청을 받았는지 (Python 3.11+)"""
+    task = asyncio.current_task()
+    return bool(task is not None and getattr(task, "cancelling", lambda: 0)())
+
+
+class Deadline:
+    """턴 전체의 마감 시각과 취소 토큰
+
+    마감 시각이 되면 토큰을 취소하고, run()/iterate()로 실행 중인 LLM 요청, 스트림, 툴 호출은
+    토큰에 연결되어 있으므로 실제로 취소된다 (HTTP 연결 종료, MCP 호출 취소).
+    호출한 쪽이 토큰을 취소해도 같은 방식으로 진행 중인 작업이 중단된다.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, cancellation_token: Optional[CancellationToken] = None):
+        self.timeout = timeout
+        self.token = cancellation_token or CancellationToken()
+        self.expired = False
+        self.expires_at: Optional[float] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        if timeout:
+            self.expires_at = time.monotonic() + timeout
+            self._timer = asyncio.get_running_loop().call_later(timeout, self._expire)
+
+    def _expire(self):
+        self.expired = True
+        self.token.cancel()
+
+    def remaining(self) -> Optional[float]:
+        """남은 시간(초), 마감 시각이 없으면 None"""
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def error(self) -> Exception:
+        """토큰이 취소된 이유에 맞는 예외"""
+        if self.expired:
+            return DeadlineExceeded(f"턴 처리 시간 초과 ({self.timeout:g}초)")
+        return TurnCancelled("요청이 취소되었습니다")
+
+    def close(self):
+        """턴 종료 - 마감 타이머 해제"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    async def run(self, awaitable: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """마감 시각(과 개별 timeout 중 짧은 쪽) 안에 실행, 넘기거나 토큰이 취소되면 작업을 취소
+
+        Raises:
+            DeadlineExceeded: 턴 마감 시각 초과
+            TurnCancelled: 호출한 쪽이 토큰을 취소함
+            asyncio.TimeoutError: 개별 timeout 초과
+        """
+        task = asyncio.ensure_future(awaitable)
+        if self.token.is_cancelled():
+            task.cancel()
+            raise self.error()
+        self.token.link_future(task)
+
+        remaining = self.remaining()
+        limit = timeout if remaining is None else remaining if timeout is None else min(timeout, remaining)
+        try:
+            return await asyncio.wait_for(task, limit)
+        except asyncio.TimeoutError:
+            if task.cancelled() and remaining is not None and limit == remaining:
+                self._expire()
+                raise self.error() from None
+            raise
+        except asyncio.CancelledError:
+            if self.token.is_cancelled() and task.cancelled() and not _outer_cancelled():
+                raise self.error() from None
+            raise
+
+    async def iterate(self, stream: AsyncIterator[T]) -> AsyncGenerator[T, None]:
+        """비동기 스트림을 별도 태스크에서 읽어 전달 - 마감/취소되면 읽기 태스크(와 HTTP 스트림)를 취소
+
+        반환한 제너레이터를 중간에 닫아도 읽기 태스크가 취소되어 스트림이 닫힌다.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def pump():
+            try:
+                async with aclosing(stream):
+                    async for item in stream:
+                        queue.put_nowait((item, None))
+            except Exception as e:
+                queue.put_nowait((_END, e))
+                return
+            queue.put_nowait((_END, None))
+
+        def finished(task: "asyncio.Task[Any]"):
+            # 시작 전에 취소된 경우도 포함
+            if task.cancelled():
+                queue.put_nowait((_END, self.error()))
+
+        task: "asyncio.Task[Any]" = asyncio.ensure_future(pump())
+        task.add_done_callback(finished)
+        if self.token.is_cancelled():
+            task.cancel()
+        self.token.link_future(task)
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is _END:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            task.cancel()
@@ -0,0 +1,121 @@
+import re
+from typing import Dict, List, Optional
+from orchestrator.config import HISTORY_CONFIG
+from orchestrator.token_counter import count_tokens
+from orchestrator.tool_result_store import FETCH_TOOL_NAME
+
+_TOOL_RESULT_PATTERN = re.compile(r"(<tool_result[^>]*>)(.*?)(</tool_result>)", re.DOTALL)
+
+
+class ConversationHistory:
+    """토큰 예산을 지키는 대화 히스토리
+
+    메시지별 토큰 수는 추가 시 한 번만 계산해 캐시하고, 프롬프트 구성 시
+    예산을 넘으면 오래된 <tool_result> 내용을 축약한 뒤 가장 오래된 턴부터 제거한다.
+    줄일 때는 예산의 trim_to_ratio까지 한 번에 줄여서, 이후 몇 턴 동안은 프롬프트 앞부분이
+    그대로 유지되어 로컬 서버가 KV 캐시 접두사를 재사용할 수 있게 한다.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None):
+        self.max_tokens = max_tokens or HISTORY_CONFIG["max_prompt_tokens"]
+        self._messages: List[Dict] = []
+        self._system_cache = ("", 0)
+        self.dropped_messages = 0
+        self.compacted_messages = 0
+        self.last_prompt_tokens = 0   # 마지막 build() 결과의 토큰 수 (시스템 프롬프트 포함)
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    @staticmethod
+    def _message_tokens(content: str) -> int:
+        return count_tokens(content) + HISTORY_CONFIG["per_message_overhead"]
+
+    def append(self, role: str, content: str):
+        """메시지 추가 (토큰 수 캐시)"""
+        self._messages.append({"role": role, "content": content, "tokens": self._message_tokens(content)})
+
+    def messages(self) -> List[Dict[str, str]]:
+        """저장된 메시지 목록 (role/content)"""
+        return [{"role": msg["role"], "content": msg["content"]} for msg in self._messages]
+
+    def checkpoint(self) -> int:
+        """현재 끝 위치 (build()가 앞쪽 메시지를 제거해도 유지되는 절대 위치)"""
+        return self.dropped_messages + len(self._messages)
+
+    def rollback(self, checkpoint: int):
+        """checkpoint 이후에 추가된 메시지 제거 (답변 없이 끝난 턴 되돌리기)"""
+        del self._messages[max(checkpoint - self.dropped_messages, 0):]
+
+    def total_tokens(self) -> int:
+        return sum(msg["tokens"] for msg in self._messages)
+
+    def _system_tokens(self, system_message: str) -> int:
+        if self._system_cache[0] != system_message:
+            self._system_cache = (system_message, self._message_tokens(system_message))
+        return self._system_cache[1]
+
+    @staticmethod
+    def _compact_tool_results(content: str) -> str:
+        """<tool_result> 내용을 앞부분만 남기고 축약
+
+        결과 끝에 원문 조회 안내(fetch_tool_result 핸들)가 있으면 축약 후에도 그대로 남겨
+        모델이 생략된 내용을 다시 조회할 수 있게 한다.
+        """
+        keep = HISTORY_CONFIG["tool_result_keep_chars"]
+
+        def shorten(match):
+            body = match.group(2).strip()
+            head, _, last = body.rpartition("\n")
+            notice = ""
+            if head and FETCH_TOOL_NAME in last:
+                body, notice = head.rstrip(), f"\n{last}"
+            if len(body) <= keep:
+                return match.group(0)
+            return f"{match.group(1)}\n{body[:keep]} …({len(body) - keep}자 생략){notice}\n{match.group(3)}"
+
+        return _TOOL_RESULT_PATTERN.sub(shorten, content)
+
+    def build(self, system_message: str, protected_from: Optional[int] = None) -> List[Dict[str, str]]:
+        """시스템 메시지 + 예산 내 히스토리로 프롬프트 구성
+
+        Args:
+            system_message: 시스템 프롬프트
+            protected_from: 이 인덱스부터의 메시지(진행 중인 턴)는 축약/제거하지 않음
+        """
+        if protected_from is None:
+            protected_from = len(self._messages)
+        budget = self.max_tokens - self._system_tokens(system_message)
+        total = self.total_tokens()
+        # 예산을 넘었을 때만 줄이고, 줄일 때는 낮은 목표치까지 한 번에 줄임 (매 턴 앞부분이 바뀌지 않도록)
+        target = int(budget * HISTORY_CONFIG["trim_to_ratio"]) if total > budget else budget
+
+        # 1단계: 오래된 툴 결과 축약 (한 번 축약한 메시지는 그대로 유지)
+        index = 0
+        while total > target and index < protected_from:
+            msg = self._messages[index]
+            if not msg.get("compacted") and "<tool_result" in msg["content"]:
+                compacted = self._compact_tool_results(msg["content"])
+                tokens = self._message_tokens(compacted)
+                total -= msg["tokens"] - tokens
+                msg.update(content=compacted, tokens=tokens, compacted=True)
+                self.compacted_messages += 1
+            index += 1
+
+        # 2단계: 가장 오래된 턴부터 제거 (user 메시지로 시작하도록 턴 단위로)
+        dropped = 0
+        while total > target and dropped < protected_from:
+            total -= self._messages[dropped]["tokens"]
+            dropped += 1
+            while dropped < protected_from and self._messages[dropped]["role"] != "user":
+                total -= self._messages[dropped]["tokens"]
+                dropped += 1
+        if dropped:
+            del self._messages[:dropped]
+            self.dropped_messages += dropped
+
+        self.last_prompt_tokens = total + self._system_tokens(system_message)
+        return [{"role": "system", "content": system_message}] + self.messages()
+
+    def clear(self):
+        self._messages = []
@@ -0,0 +1,336 @@
+import asyncio
+import base64
+import codecs
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+import httpx
+from orchestrator.config import LLM_TRANSPORT_CONFIG, RECORD_REPLAY_CONFIG
+
+TRACE_VERSION = 1
+
+
+def _digest(*parts: Any) -> str:
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def request_key(request: httpx.Request) -> str:
+    """LLM HTTP 요청의 재생 키 (메서드 + 경로 + 정규화한 JSON 본문, 호스트는 제외)"""
+    body = request.read()
+    try:
+        payload: Any = json.loads(body) if body else None
+    except ValueError:
+        payload = body.decode("utf-8", errors="replace")
+    return _digest(request.method, request.url.path, payload)
+
+
+def tool_call_key(server: str, tool_name: str, arguments: Dict[str, Any]) -> str:
+    """MCP 툴 호출의 재생 키 (서버 + 툴 + 인자)"""
+    return _digest(server, tool_name, arguments)
+
+
+def server_id(name: str) -> str:
+    """MCP 서버 이름의 짧은 식별자 (환경 변수 등 실행마다 달라질 수 있는 설정은 제외)"""
+    return _digest(name)
+
+
+class InteractionTrace:
+    """LLM/MCP 상호작용 기록/재생 파일 (JSONL, 한 줄에 상호작용 하나)
+
+    - record: LLM HTTP 요청(_call_llm, 스트리밍, OpenAIChatCompletionClient)의 응답 본문과 청크별 도착 시각,
+      MCP 툴 목록과 툴 호출 결과/소요 시간을 기록
+    - replay: 같은 요청에 기록된 응답을 원래 시간(time_scale 배율)대로 돌려줌 - LLM 서버/MCP 서버 불필요
+
+    재생 시 키(요청 내용)가 같은 기록을 순서대로 사용하며, strict가 아니면 키가 다를 때
+    (툴 결과의 시각 등 실행마다 달라지는 내용) 같은 종류의 다음 미사용 기록으로 대체한다.
+    """
+
+    def __init__(self, mode: str, path: str, time_scale: float = 1.0, strict: bool = False,
+                 include_requests: bool = False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"알 수 없는 기록/재생 모드: {mode}")
+        self.mode = mode
+        self.path = os.path.expanduser(path)
+        self.time_scale = time_scale
+        self.strict = strict
+        self.include_requests = include_requests
+        self._file = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._entries: List[Dict[str, Any]] = []
+        self._by_key: Dict[tuple, Deque[int]] = {}
+        self._by_group: Dict[tuple, Deque[int]] = {}
+        self._used: set = set()
+        self.recorded = 0
+        self.replayed = 0
+        self.substituted = 0
+        self.missing = 0
+        if mode == "record":
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._write({"type": "header", "version": TRACE_VERSION, "created_at": time.time()})
+        else:
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    # ---- 기록 ----
+
+    def _write(self, entry: Dict[str, Any]):
+        self._file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def record(self, entry: Dict[str, Any]):
+        if self._file is None or self._file.closed:
+            return
+        self._write(entry)
+        self.recorded += 1
+
+    # ---- 재생 ----
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # 기록 중 중단되어 마지막 줄이 잘렸을 수 있음
+                    print(f"재생 파일 {line_no}행 JSON 오류 - 건너뜀")
+                    continue
+                if entry.get("type") == "header":
+                    if entry.get("version") != TRACE_VERSION:
+                        raise ValueError(f"지원하지 않는 재생 파일 버전: {entry.get('version')}")
+                    continue
+                index = len(self._entries)
+                self._entries.append(entry)
+                self._by_key.setdefault((entry["type"], entry.get("key")), deque()).append(index)
+                self._by_group.setdefault((entry["type"], entry.get("group")), deque()).append(index)
+
+    @staticmethod
+    def _next_unused(indices: Optional[Deque[int]], used: set) -> Optional[int]:
+        while indices:
+            index = indices.popleft()
+            if index not in used:
+                return index
+        return None
+
+    def take(self, kind: str, key: str, group: Any) -> Optional[Dict[str, Any]]:
+        """재생할 기록 - 같은 키의 다음 기록, 없으면 (strict가 아닐 때) 같은 그룹의 다음 기록"""
+        index = self._next_unused(self._by_key.get((kind, key)), self._used)
+        if index is None and not self.strict:
+            index = self._next_unused(self._by_group.get((kind, group)), self._used)
+            if index is not None:
+                self.substituted += 1
+        if index is None:
+            self.missing += 1
+            return None
+        self._used.add(index)
+        self.replayed += 1
+        return self._entries[index]
+
+    def find(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        """소비하지 않고 조회 (툴 목록처럼 여러 번 쓰는 기록)"""
+        indices = self._by_key.get((kind, key))
+        return self._entries[indices[0]] if indices else None
+
+    async def sleep_until(self, started: float, offset_ms: float):
+        """기록 시각(요청 시작 기준 offset_ms)을 time_scale 배율로 맞춰 대기"""
+        delay = started + offset_ms * self.time_scale / 1000 - time.monotonic()
+        await asyncio.sleep(max(delay, 0.0))
+
+    # ---- HTTP 연결 ----
+
+    def wrap_transport(self, inner: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncBaseTransport:
+        """httpx 전송 계층을 기록/재생 계층으로 감쌈 (재생 모드는 실제 연결을 만들지 않음)"""
+        if self.replaying:
+            return ReplayTransport(self)
+        return RecordingTransport(inner or httpx.AsyncHTTPTransport(), self)
+
+    def http_client(self) -> httpx.AsyncClient:
+        """OpenAIChatCompletionClient(http_client=...)용 공유 클라이언트 (처음 요청 시 생성, aclose()에서 종료)
+
+        OpenAIChatCompletionClient.close()가 넘겨받은 클라이언트를 닫으므로 닫혀 있으면 새로 만든다.
+        """
+        if self._http_client is None or self._http_client.is_closed:
+            timeout = httpx.Timeout(LLM_TRANSPORT_CONFIG["timeout"], connect=LLM_TRANSPORT_CONFIG["connect_timeout"])
+            self._http_client = httpx.AsyncClient(timeout=timeout, transport=self.wrap_transport())
+        return self._http_client
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"mode": self.mode, "path": self.path}
+        if self.recording:
+            stats["recorded"] = self.recorded
+        else:
+            stats.update({
+                "entries": len(self._entries),
+                "replayed": self.replayed,
+                "substituted": self.substituted,
+                "missing": self.missing,
+                "unused": sum(1 for i, e in enumerate(self._entries)
+                              if i not in self._used and e["type"] != "mcp_tools"),
+            })
+        return stats
+
+    async def aclose(self):
+        """공유 HTTP 클라이언트 종료 후 기록 파일 닫기"""
+        client, self._http_client = self._http_client, None
+        if client is not None and not client.is_closed:
+            try:
+                await client.aclose()
+            except RuntimeError:
+                # 이미 닫힌 이벤트 루프에 묶인 클라이언트
+                pass
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """응답 본문을 그대로 전달하면서 청크와 도착 시각(요청 시작 기준 ms)을 기록"""
+
+    def __init__(self, inner: httpx.AsyncByteStream, trace: InteractionTrace, entry: Dict[str, Any],
+                 started: float, binary: bool):
+        self._inner = inner
+        self._trace = trace
+        self._entry = entry
+        self._started = started
+        self._binary = binary
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._complete = False
+        self._closed = False
+
+    def _append(self, chunk: bytes):
+        elapsed = round((time.monotonic() - self._started) * 1000, 1)
+        if self._binary:
+            text = base64.b64encode(chunk).decode("ascii")
+        else:
+            # 청크 경계에서 잘린 멀티바이트 문자는 다음 청크와 합쳐 디코딩
+            text = self._decoder.decode(chunk)
+            if not text:
+                return
+        self._entry["chunks"].append([elapsed, text])
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._inner:
+            self._append(chunk)
+            yield chunk
+        self._complete = True
+
+    async def aclose(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            await self._inner.aclose()
+        finally:
+            if not self._binary:
+                tail = self._decoder.decode(b"", final=True)
+                if tail:
+                    self._entry["chunks"].append([round((time.monotonic() - self._started) * 1000, 1), tail])
+            # 클라이언트가 중간에 닫은 스트림(조기 중단, 취소)은 받은 부분까지만 기록
+            self._entry["complete"] = self._complete
+            self._trace.record(self._entry)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """실제 요청을 보내고 응답을 기록하는 httpx 전송 계층"""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, trace: InteractionTrace):
+        self._inner = inner
+        self._trace = trace
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.monotonic()
+        key = request_key(request)
+        response = await self._inner.handle_async_request(request)
+        headers = {name: value for name, value in response.headers.items()
+                   if name.lower() not in ("content-length", "transfer-encoding", "connection", "date")}
+        binary = response.headers.get("content-encoding", "identity") != "identity"
+        entry: Dict[str, Any] = {
+            "type": "llm", "key": key, "group": request.url.path,
+            "method": request.method, "status": response.status_code, "headers": headers,
+            "ttfb_ms": round((time.monotonic() - started) * 1000, 1),
+            "encoding": "base64" if binary else "text", "chunks": [],
+        }
+        if self._trace.include_requests:
+            entry["request"] = request.read().decode("utf-8", errors="replace")
+        stream = _RecordingStream(response.stream, self._trace, entry, started, binary)
+        return httpx.Response(response.status_code, headers=response.headers, stream=stream,
+                              extensions=response.extensions)
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    def __init__(self, trace: InteractionTrace, entry: Dict[str, Any], started: float):
+        self._trace = trace
+        self._entry = entry
+        self._started = started
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        binary = self._entry.get("encoding") == "base64"
+        for offset_ms, text in self._entry["chunks"]:
+            await self._trace.sleep_until(self._started, offset_ms)
+            yield base64.b64decode(text) if binary else text.encode("utf-8")
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """기록된 응답을 원래 시간 간격(time_scale 배율)대로 돌려주는 httpx 전송 계층"""
+
+    def __init__(self, trace: InteractionTrace):
+        self._trace = trace
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.monotonic()
+        entry = self._trace.take("llm", request_key(request), request.url.path)
+        if entry is None:
+            raise httpx.ConnectError(f"재생 기록 없음: {request.method} {request.url.path}", request=request)
+        await self._trace.sleep_until(started, entry["ttfb_ms"])
+        return httpx.Response(entry["status"], headers=entry["headers"],
+                              stream=_ReplayStream(self._trace, entry, started), request=request)
+
+
+_shared_trace: Optional[InteractionTrace] = None
+
+
+def get_interaction_trace() -> Optional[InteractionTrace]:
+    """설정된 기록/재생 파일 (RECORD_REPLAY_CONFIG["mode"]가 None이면 None)"""
+    global _shared_trace
+    if _shared_trace is None and RECORD_REPLAY_CONFIG["mode"]:
+        _shared_trace = InteractionTrace(
+            RECORD_REPLAY_CONFIG["mode"],
+            RECORD_REPLAY_CONFIG["path"],
+            time_scale=RECORD_REPLAY_CONFIG["time_scale"],
+            strict=RECORD_REPLAY_CONFIG["strict"],
+            include_requests=RECORD_REPLAY_CONFIG["include_requests"],
+        )
+    return _shared_trace
+
+
+def http_client_kwargs() -> Dict[str, Any]:
+    """기록/재생 중이면 OpenAIChatCompletionClient에 넘길 http_client 인자"""
+    trace = get_interaction_trace()
+    return {"http_client": trace.http_client()} if trace is not None else {}
+
+
+async def close_interaction_trace():
+    """공유 HTTP 클라이언트와 기록 파일 닫기 / 재생 통계 출력"""
+    global _shared_trace
+    if _shared_trace is not None:
+        print(f"기록/재생: {_shared_trace.stats()}")
+        await _shared_trace.aclose()
+        _shared_trace = None
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from orchestrator.config import LLM_CACHE_CONFIG
+
+# 응답에 영향을 주는 생성 파라미터 (stream 등 전송 방식은 제외)
+_KEY_PARAMS = ("model", "temperature", "top_p", "max_tokens", "stop", "seed", "presence_penalty", "frequency_penalty")
+
+
+class CompletionCache:
+    """정규화된 대화 + 생성 파라미터 기준 LLM 응답 완전 일치 캐시
+
+    메모리 LRU 계층과 선택적 SQLite 영구 계층으로 구성된다.
+    temperature > 0 등 비결정적 샘플링 요청은 allow_nondeterministic이 아니면 캐시하지 않는다.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**LLM_CACHE_CONFIG, **(config or {})}
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+        if self.config["persist_path"]:
+            path = os.path.expanduser(self.config["persist_path"])
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, response TEXT, created REAL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(payload: Dict[str, Any]) -> str:
+        """메시지와 생성 파라미터의 정규 해시"""
+        messages = [
+            {"role": msg["role"], "content": msg["content"].replace("\r\n", "\n").strip()}
+            for msg in payload.get("messages", [])
+        ]
+        params = {name: payload[name] for name in _KEY_PARAMS if payload.get(name) is not None}
+        raw = json.dumps({"messages": messages, "params": params}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def is_cacheable(self, payload: Dict[str, Any]) -> bool:
+        """캐시 대상 요청인지 확인 (비활성화/비결정적 샘플링은 제외)"""
+        if not self.config["enabled"]:
+            return False
+        if self.config["allow_nondeterministic"]:
+            return True
+        return (payload.get("temperature") or 0) == 0 or payload.get("seed") is not None
+
+    def get(self, payload: Dict[str, Any]) -> Optional[str]:
+        """캐시된 응답 반환 (없으면 None)"""
+        if not self.is_cacheable(payload):
+            if self.config["enabled"]:
+                self.bypassed += 1
+            return None
+
+        key = self.make_key(payload)
+        response = self._memory.get(key)
+        if response is not None:
+            self._memory.move_to_end(key)
+        elif self._db is not None:
+            row = self._db.execute("SELECT response FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                response = row[0]
+                self._remember(key, response)
+
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    def put(self, payload: Dict[str, Any], response: str):
+        """응답 저장"""
+        if not self.is_cacheable(payload):
+            return
+        key = self.make_key(payload)
+        self._remember(key, response)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions (key, response, created) VALUES (?, ?, ?)",
+                (key, response, time.time()),
+            )
+            self._db.commit()
+
+    def _remember(self, key: str, response: str):
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.config["max_entries"]:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """hit/miss 통계"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "size": len(self._memory),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+_shared_cache: Optional[CompletionCache] = None
+
+
+def get_completion_cache() -> CompletionCache:
+    """프로세스 전역 공유 LLM 응답 캐시 반환"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = CompletionCache()
+    return _shared_cache
@@ -1,9 +1,102 @@
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Dict, Sequence
 from autogen_ext.models.openai import OpenAIChatCompletionClient
-from autogen_core.models import ModelInfo
+from autogen_core.models import ModelInfo, LLMMessage, FunctionExecutionResultMessage, RequestUsage
 from orchestrator.config import LLM_CONFIG
+from orchestrator.llm_scheduler import get_llm_scheduler
+from orchestrator.llm_router import get_llm_router, is_failover_error
+from orchestrator.interaction_trace import http_client_kwargs
+
+
+class ScheduledOpenAIChatCompletionClient(OpenAIChatCompletionClient):
+    """LLM 라우터/스케줄러를 거쳐 요청하는 OpenAI 호환 클라이언트 (AssistantAgent 경로)
+
+    요청마다 라우터가 고른 엔드포인트의 스케줄러 슬롯을 받은 뒤 보내고, 연결 오류/5xx면
+    다음 엔드포인트로 장애 조치한다 (create()는 헤징도 적용). 툴 실행 결과 다음 요청(최종 답변/리플렉션)은
+    툴 선택 요청보다 먼저 처리된다.
+    """
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._base_url = kwargs.get("base_url", LLM_CONFIG["base_url"]).rstrip("/")
+        self._endpoint_clients: Dict[str, OpenAIChatCompletionClient] = {}
+
+    def _client_for(self, base_url: str) -> OpenAIChatCompletionClient:
+        """엔드포인트별 클라이언트 (자기 base_url이면 자신)"""
+        if base_url == self._base_url:
+            return self
+        client = self._endpoint_clients.get(base_url)
+        if client is None:
+            client = OpenAIChatCompletionClient(**{**self._raw_config, "base_url": base_url, **http_client_kwargs()})
+            self._endpoint_clients[base_url] = client
+        return client
+
+    async def _create_on(self, client: OpenAIChatCompletionClient, messages: Sequence[LLMMessage],
+                         *args: Any, **kwargs: Any):
+        if client is self:
+            return await super().create(messages, *args, **kwargs)
+        return await client.create(messages, *args, **kwargs)
+
+    def _stream_on(self, client: OpenAIChatCompletionClient, messages: Sequence[LLMMessage],
+                   *args: Any, **kwargs: Any):
+        if client is self:
+            return super().create_stream(messages, *args, **kwargs)
+        return client.create_stream(messages, *args, **kwargs)
+
+    @staticmethod
+    def _is_final_answer(messages: Sequence[LLMMessage]) -> bool:
+        return bool(messages) and isinstance(messages[-1], FunctionExecutionResultMessage)
+
+    async def create(self, messages: Sequence[LLMMessage], *args: Any, **kwargs: Any):
+        async def send(base_url: str):
+            async with get_llm_scheduler().slot(base_url, self._is_final_answer(messages)):
+                return await self._create_on(self._client_for(base_url), messages, *args, **kwargs)
+
+        return await get_llm_router().execute(send)
+
+    async def create_stream(self, messages: Sequence[LLMMessage], *args: Any, **kwargs: Any) -> AsyncGenerator[Any, None]:
+        router = get_llm_router()
+        for base_url in router.route():
+            started = False
+            try:
+                # 호출한 쪽이 중간에 스트림을 닫으면(aclose/GeneratorExit) HTTP 스트림을 먼저 닫고 슬롯을 반납
+                with router.track(base_url):
+                    async with get_llm_scheduler().slot(base_url, self._is_final_answer(messages)):
+                        stream = self._stream_on(self._client_for(base_url), messages, *args, **kwargs)
+                        async with aclosing(stream):
+                            async for item in stream:
+                                started = True
+                                yield item
+                return
+            except Exception as e:
+                # 이미 내보낸 청크가 있으면 다른 엔드포인트로 이어서 받을 수 없음
+                if started or not is_failover_error(e):
+                    raise
+                last_error = e
+        raise last_error
+
+    def actual_usage(self) -> RequestUsage:
+        return self._sum_usage(super().actual_usage(), [c.actual_usage() for c in self._endpoint_clients.values()])
+
+    def total_usage(self) -> RequestUsage:
+        return self._sum_usage(super().total_usage(), [c.total_usage() for c in self._endpoint_clients.values()])
+
+    @staticmethod
+    def _sum_usage(usage: RequestUsage, others) -> RequestUsage:
+        return RequestUsage(
+            prompt_tokens=usage.prompt_tokens + sum(u.prompt_tokens for u in others),
+            completion_tokens=usage.completion_tokens + sum(u.completion_tokens for u in others),
+        )
+
+    async def close(self) -> None:
+        for client in self._endpoint_clients.values():
+            await client.close()
+        self._endpoint_clients.clear()
+        await super().close()
+
 
 def get_llm_client():
-    return OpenAIChatCompletionClient(
+    return ScheduledOpenAIChatCompletionClient(
         model=LLM_CONFIG["model"],
         base_url=LLM_CONFIG["base_url"],
         api_key=LLM_CONFIG["api_key"],
@@ -14,5 +107,6 @@ def get_llm_client():
             family="openai",
             structured_output=False
         ),
-        parallel_tool_calls=False  # ✅ 여기서 설정
+        parallel_tool_calls=False,  # ✅ 여기서 설정
+        **http_client_kwargs(),     # 기록/재생 모드면 요청/응답을 가로채는 HTTP 클라이언트
     )
@@ -0,0 +1,276 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
+import httpx
+import openai
+from orchestrator.config import LLM_CONFIG, LLM_ROUTER_CONFIG
+from orchestrator.llm_scheduler import current_session_id
+from orchestrator.llm_transport import get_llm_transport
+
+T = TypeVar("T")
+
+
+class EndpointUnavailable(Exception):
+    """엔드포인트가 요청을 처리할 수 없는 상태 (5xx 응답 등) - 다른 엔드포인트로 재시도"""
+
+
+FAILOVER_STATUS_CODES = {500, 502, 503, 504}
+
+
+def is_failover_error(error: BaseException) -> bool:
+    """엔드포인트를 장애로 표시하고 다음 엔드포인트로 넘어가야 하는 오류인지 (연결 오류/5xx)"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in FAILOVER_STATUS_CODES
+    return isinstance(error, (EndpointUnavailable, httpx.TransportError,
+                              openai.APIConnectionError, openai.InternalServerError))
+
+
+class Endpoint:
+    """LLM 서버 하나의 상태 (처리 중 요청 수, 지연 시간 EWMA, 장애 여부)"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.outstanding = 0
+        self.ewma_ms: Optional[float] = None
+        self.healthy = True
+        self.down_until = 0.0
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def available(self) -> bool:
+        return self.healthy and time.monotonic() >= self.down_until
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "available": self.available,
+            "outstanding": self.outstanding,
+            "ewma_ms": round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+class LLMRouter:
+    """여러 동일한 LLM 서버로 요청을 분산하는 라우터
+
+    - 선택: 처리 중 요청 수가 가장 적은 엔드포인트(least_outstanding) 또는
+      지연 시간 EWMA x (처리 중 요청 수 + 1)이 가장 작은 엔드포인트(ewma)
+    - 세션 고정: 같은 세션은 프롬프트 캐시가 있는 엔드포인트로 계속 보내되,
+      다른 엔드포인트보다 처리 중 요청이 affinity_max_skew 이상 많으면 재배치
+    - 장애 조치: 연결 오류/5xx 엔드포인트는 cooldown 동안 제외하고 다음 후보로 재시도,
+      주기적인 /models 확인으로 복구 여부를 판단
+    - 헤징(hedge_delay): 응답이 늦으면 다음 엔드포인트로 같은 요청을 한 번 더 보내고 먼저 온 응답 사용
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**LLM_ROUTER_CONFIG, **(config or {})}
+        urls = self.config["endpoints"] or [LLM_CONFIG["base_url"]]
+        self.endpoints: Dict[str, Endpoint] = {}
+        for url in urls:
+            url = url.rstrip("/")
+            self.endpoints.setdefault(url, Endpoint(url))
+        self._affinity: "OrderedDict[str, str]" = OrderedDict()
+        self._health_task: Optional[asyncio.Task] = None
+        self.failovers = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def multi_endpoint(self) -> bool:
+        return len(self.endpoints) > 1
+
+    def _load(self, endpoint: Endpoint) -> float:
+        if self.config["strategy"] == "ewma":
+            # 측정 전 엔드포인트는 0으로 두어 먼저 시도
+            return (endpoint.ewma_ms or 0.0) * (endpoint.outstanding + 1)
+        return endpoint.outstanding
+
+    def route(self, session_id: Optional[str] = None) -> List[str]:
+        """요청을 시도할 엔드포인트 순서 (첫 번째가 선택된 엔드포인트, 나머지는 장애 조치 후보)"""
+        if not self.multi_endpoint:
+            return list(self.endpoints)
+        self._ensure_health_task()
+
+        session_id = session_id or current_session_id()
+        ordered = sorted(self.endpoints.values(), key=lambda e: (not e.available, self._load(e), e.outstanding))
+        # 모든 엔드포인트가 장애 상태여도 복구가 가장 빠른 순서로 시도
+        if not ordered[0].available:
+            ordered.sort(key=lambda e: e.down_until)
+
+        bound = self.endpoints.get(self._affinity.get(session_id, ""))
+        if bound is not None and bound.available and bound is not ordered[0] \
+                and bound.outstanding - ordered[0].outstanding < self.config["affinity_max_skew"]:
+            ordered.remove(bound)
+            ordered.insert(0, bound)
+
+        return [e.base_url for e in ordered[:self.config["max_attempts"]]]
+
+    def _bind(self, session_id: str, base_url: str):
+        if not self.config["session_affinity"] or not self.multi_endpoint:
+            return
+        self._affinity[session_id] = base_url
+        self._affinity.move_to_end(session_id)
+        while len(self._affinity) > self.config["affinity_max_sessions"]:
+            self._affinity.popitem(last=False)
+
+    @contextmanager
+    def track(self, base_url: str, session_id: Optional[str] = None) -> Iterator[Endpoint]:
+        """엔드포인트 요청 하나의 처리 중 수/지연 시간/장애를 기록
+
+        장애 조치 대상 오류(is_failover_error)가 발생하면 엔드포인트를 장애로 표시한 뒤 예외를 그대로 전달한다.
+        """
+        endpoint = self.endpoints.get(base_url) or self.endpoints.setdefault(base_url, Endpoint(base_url))
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+        start = time.perf_counter()
+        try:
+            yield endpoint
+        except Exception as e:
+            if is_failover_error(e):
+                self.mark_down(endpoint, e)
+            raise
+        else:
+            self._observe_latency(endpoint, (time.perf_counter() - start) * 1000)
+            endpoint.consecutive_failures = 0
+            self._bind(session_id or current_session_id(), base_url)
+        finally:
+            endpoint.outstanding -= 1
+
+    def _observe_latency(self, endpoint: Endpoint, elapsed_ms: float):
+        alpha = self.config["ewma_alpha"]
+        endpoint.ewma_ms = elapsed_ms if endpoint.ewma_ms is None else alpha * elapsed_ms + (1 - alpha) * endpoint.ewma_ms
+
+    async def execute(self, send: Callable[[str], Awaitable[T]], hedge_delay: Optional[float] = None,
+                      on_failover: Optional[Callable[[str, BaseException], None]] = None) -> T:
+        """route() 순서대로 send(base_url) 실행 - 장애 조치와 헤징 적용
+
+        hedge_delay(초, 생략 시 설정값) 안에 첫 요청이 끝나지 않으면 다음 엔드포인트로 한 번 더 요청하고
+        먼저 성공한 응답을 반환하며, 나머지 요청은 취소한다.
+        """
+        hedge_delay = self.config["hedge_delay"] if hedge_delay is None else hedge_delay
+        session_id = current_session_id()
+        candidates = self.route(session_id)
+
+        async def attempt(base_url: str) -> T:
+            with self.track(base_url, session_id):
+                return await send(base_url)
+
+        pending: Dict["asyncio.Task[T]", str] = {}
+        started: Dict[str, float] = {}
+        hedged: Optional[str] = None
+        last_error: Optional[BaseException] = None
+        try:
+            while True:
+                if not pending:
+                    if not candidates:
+                        raise last_error
+                    url = candidates.pop(0)
+                    pending[asyncio.ensure_future(attempt(url))] = url
+                    started[url] = time.perf_counter()
+                wait = hedge_delay if hedge_delay and candidates and hedged is None else None
+                done, _ = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # 지연 시간 안에 응답이 없음 - 다음 엔드포인트로 중복 요청
+                    hedged = candidates.pop(0)
+                    self.hedges += 1
+                    pending[asyncio.ensure_future(attempt(hedged))] = hedged
+                    started[hedged] = time.perf_counter()
+                    continue
+                for task in done:
+                    url = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        if url == hedged:
+                            self.hedge_wins += 1
+                        return task.result()
+                    if not is_failover_error(error):
+                        raise error
+                    last_error = error
+                    if on_failover is not None:
+                        on_failover(url, error)
+        finally:
+            for task, url in pending.items():
+                task.cancel()
+                # 헤징에서 진 요청은 끝나지 않았으므로 지금까지 걸린 시간을 지연 시간 하한으로 반영
+                self._observe_latency(self.endpoints[url], (time.perf_counter() - started[url]) * 1000)
+
+    def mark_down(self, endpoint: Endpoint, error: Optional[BaseException] = None):
+        """장애 표시 - 연속 실패가 늘수록 제외 시간을 늘림 (최대 cooldown x 8)"""
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        backoff = self.config["cooldown"] * min(2 ** (endpoint.consecutive_failures - 1), 8)
+        endpoint.down_until = time.monotonic() + backoff
+        if self.multi_endpoint:
+            self.failovers += 1
+            print(f"LLM 엔드포인트 장애 ({endpoint.base_url}, {backoff:.0f}초 제외): {error}")
+
+    async def check_endpoint(self, endpoint: Endpoint) -> bool:
+        """/models 요청으로 엔드포인트 상태 확인"""
+        client = get_llm_transport().get_client(endpoint.base_url)
+        try:
+            response = await client.get(f"{endpoint.base_url}/models", timeout=self.config["health_check_timeout"])
+            ok = response.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        if ok and not endpoint.available:
+            print(f"LLM 엔드포인트 복구: {endpoint.base_url}")
+        endpoint.healthy = ok
+        if ok:
+            endpoint.down_until = 0.0
+            endpoint.consecutive_failures = 0
+        return ok
+
+    async def check_health(self) -> Dict[str, bool]:
+        results = await asyncio.gather(*(self.check_endpoint(e) for e in self.endpoints.values()))
+        return dict(zip(self.endpoints, results))
+
+    def _ensure_health_task(self):
+        interval = self.config["health_check_interval"]
+        if not interval:
+            return
+        if self._health_task is None or self._health_task.done() \
+                or self._health_task.get_loop() is not asyncio.get_running_loop():
+            self._health_task = asyncio.create_task(self._health_loop(interval), name="llm-health-check")
+
+    async def _health_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self.check_health()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.config["strategy"],
+            "failovers": self.failovers,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "affinity_sessions": len(self._affinity),
+            "endpoints": {url: e.stats() for url, e in self.endpoints.items()},
+        }
+
+    async def aclose(self):
+        if self._health_task is not None and not self._health_task.done():
+            self._health_task.cancel()
+        self._health_task = None
+
+
+_shared_router: Optional[LLMRouter] = None
+
+
+def get_llm_router() -> LLMRouter:
+    """프로세스 전역 공유 LLM 라우터 반환"""
+    global _shared_router
+    if _shared_router is None:
+        _shared_router = LLMRouter()
+    return _shared_router
+
+
+async def close_llm_router():
+    """공유 라우터의 상태 확인 태스크 종료"""
+    global _shared_router
+    if _shared_router is not None:
+        await _shared_router.aclose()
+        _shared_router = None
@@ -0,0 +1,182 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from orchestrator.config import LLM_CONFIG, LLM_SCHEDULER_CONFIG
+from orchestrator.telemetry import llm_queue_wait_histogram
+
+# 우선순위 등급 (작을수록 먼저) - 같은 등급 안에서는 최종 답변 요청이 툴 선택 요청보다 먼저
+PRIORITY_CLASSES = {"interactive": 0, "batch": 1}
+
+# 현재 태스크의 (세션 id, 우선순위 등급) - SessionManager/배치 실행기가 턴마다 설정
+_scheduling: contextvars.ContextVar[Tuple[str, str]] = contextvars.ContextVar(
+    "llm_scheduling", default=("default", "interactive"))
+
+
+@contextmanager
+def scheduling_context(session_id: str, priority_class: str = "interactive") -> Iterator[None]:
+    """이 블록 안에서 나가는 LLM 요청의 세션/우선순위 등급 지정 (하위 태스크에도 전달됨)"""
+    if priority_class not in PRIORITY_CLASSES:
+        raise ValueError(f"알 수 없는 우선순위 등급: {priority_class}")
+    token = _scheduling.set((session_id, priority_class))
+    try:
+        yield
+    finally:
+        _scheduling.reset(token)
+
+
+def current_session_id() -> str:
+    """현재 태스크의 세션 id (scheduling_context 밖이면 "default")"""
+    return _scheduling.get()[0]
+
+
+def effective_priority(priority_class: str, final_answer: bool) -> int:
+    return PRIORITY_CLASSES[priority_class] * 2 + (0 if final_answer else 1)
+
+
+class _BackendWindow:
+    """백엔드 하나의 동시 요청 창 + 우선순위/세션 공정 대기열
+
+    같은 우선순위 안에서는 세션별 시작 시각 공정 큐잉(start-time fair queuing)으로
+    요청을 많이 쌓은 세션이 다른 세션을 굶기지 않도록 세션 간에 번갈아 허용한다.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.loop = asyncio.get_running_loop()
+        self._heap: List[list] = []
+        self._seq = itertools.count()
+        self._virtual_time = 0
+        self._last_finish: Dict[str, int] = {}
+        self._queued: Dict[str, int] = {}
+        self.granted = 0
+        self.queued_total = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @property
+    def waiting(self) -> int:
+        return sum(self._queued.values())
+
+    def _grant(self, session_id: str, start_tag: int):
+        self.in_flight += 1
+        self.granted += 1
+        self._virtual_time = max(self._virtual_time, start_tag)
+        # 대기 중인 요청이 없고 가상 시각보다 뒤처진 세션 정보는 정리
+        if not self._queued.get(session_id) and self._last_finish.get(session_id, 0) <= self._virtual_time:
+            self._last_finish.pop(session_id, None)
+
+    async def acquire(self, session_id: str, priority: int) -> float:
+        """슬롯 획득까지 대기하고 대기 시간(초) 반환"""
+        start_tag = max(self._virtual_time, self._last_finish.get(session_id, 0))
+        self._last_finish[session_id] = start_tag + 1
+        while self._heap and self._heap[0][4].done():
+            heapq.heappop(self._heap)  # 대기 중 취소된 요청
+        if self.in_flight < self.limit and not self._heap:
+            self._grant(session_id, start_tag)
+            return 0.0
+
+        future = self.loop.create_future()
+        heapq.heappush(self._heap, [priority, start_tag, next(self._seq), session_id, future])
+        self._queued[session_id] = self._queued.get(session_id, 0) + 1
+        self.queued_total += 1
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 슬롯을 받은 직후 취소됨 - 반납
+                self.release()
+            else:
+                future.cancel()
+                self._dequeue(session_id)
+            raise
+        wait = time.monotonic() - started
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        return wait
+
+    def _dequeue(self, session_id: str):
+        remaining = self._queued.get(session_id, 1) - 1
+        if remaining:
+            self._queued[session_id] = remaining
+        else:
+            self._queued.pop(session_id, None)
+
+    def release(self):
+        """슬롯 반납 - 대기열에서 우선순위가 가장 높은 요청에 넘김"""
+        self.in_flight -= 1
+        while self._heap and self.in_flight < self.limit:
+            _, start_tag, _, session_id, future = heapq.heappop(self._heap)
+            if future.done():
+                continue  # 대기 중 취소된 요청
+            self._dequeue(session_id)
+            self._grant(session_id, start_tag)
+            future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "granted": self.granted,
+            "queued_total": self.queued_total,
+            "avg_wait_ms": round(self.wait_total / self.queued_total * 1000, 2) if self.queued_total else 0.0,
+            "max_wait_ms": round(self.wait_max * 1000, 2),
+        }
+
+
+class LLMScheduler:
+    """LLM 백엔드 앞단의 승인 제어(admission control)
+
+    백엔드(base_url)별로 동시에 처리 중인 요청 수를 제한하고, 초과 요청은
+    우선순위(대화형 > 배치, 최종 답변 > 툴 선택) 및 세션 공정성 순서로 대기시킨다.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**LLM_SCHEDULER_CONFIG, **(config or {})}
+        self._windows: Dict[str, _BackendWindow] = {}
+
+    def _window(self, backend: str) -> _BackendWindow:
+        window = self._windows.get(backend)
+        if window is None or window.loop is not asyncio.get_running_loop():
+            limit = self.config["endpoint_limits"].get(backend, self.config["max_in_flight"])
+            window = _BackendWindow(limit)
+            self._windows[backend] = window
+        return window
+
+    @asynccontextmanager
+    async def slot(self, backend: Optional[str] = None, final_answer: bool = False) -> AsyncIterator[float]:
+        """요청 하나의 실행 슬롯 (블록 동안 점유, 대기 시간(초)을 반환)"""
+        if not self.config["enabled"]:
+            yield 0.0
+            return
+
+        backend = (backend or LLM_CONFIG["base_url"]).rstrip("/")
+        session_id, priority_class = _scheduling.get()
+        window = self._window(backend)
+        wait = await window.acquire(session_id, effective_priority(priority_class, final_answer))
+        llm_queue_wait_histogram.record(wait * 1000, {"llm.priority_class": priority_class})
+        try:
+            yield wait
+        finally:
+            window.release()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """백엔드별 대기열 통계"""
+        return {backend: window.stats() for backend, window in self._windows.items()}
+
+
+_shared_scheduler: Optional[LLMScheduler] = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """프로세스 전역 공유 LLM 스케줄러 반환"""
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        _shared_scheduler = LLMScheduler()
+    return _shared_scheduler
@@ -0,0 +1,190 @@
+import asyncio
+import json
+from typing import Any, AsyncGenerator, Dict, Optional
+import httpx
+from orchestrator.config import LLM_CONFIG, LLM_TRANSPORT_CONFIG
+from orchestrator.prefix_tracker import PrefixTracker
+from orchestrator.interaction_trace import get_interaction_trace
+from orchestrator.telemetry import llm_shared_prefix_histogram
+
+
+def _http2_available() -> bool:
+    """h2 패키지 설치 여부 확인 (httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class LLMTransport:
+    """OpenAI 호환 LLM 서버용 공유 HTTP 전송 계층
+
+    엔드포인트(base_url)마다 하나의 httpx.AsyncClient를 유지하여
+    커넥션 풀링, keep-alive, HTTP/2를 모든 PromptBasedAgent가 함께 사용한다.
+    풀의 커넥션은 생성된 이벤트 루프에 묶이므로 클라이언트는 (루프, base_url)별로 따로 둔다
+    (Streamlit 백그라운드 루프와 asyncio.run 루프가 동시에 돌아도 서로의 클라이언트를 닫지 않음).
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**LLM_TRANSPORT_CONFIG, **(config or {})}
+        self._clients: Dict[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]] = {}
+        self.prefix_tracker = PrefixTracker()
+
+    def _endpoint_config(self, base_url: str) -> Dict[str, Any]:
+        """엔드포인트별 설정 (endpoint_limits 항목이 기본값을 덮어씀)"""
+        overrides = self.config.get("endpoint_limits", {}).get(base_url, {})
+        return {**self.config, **overrides}
+
+    def _create_client(self, base_url: str) -> httpx.AsyncClient:
+        conf = self._endpoint_config(base_url)
+        limits = httpx.Limits(
+            max_connections=conf["max_connections"],
+            max_keepalive_connections=conf["max_keepalive_connections"],
+            keepalive_expiry=conf["keepalive_expiry"],
+        )
+        timeout = httpx.Timeout(conf["timeout"], connect=conf["connect_timeout"])
+        http2 = conf["http2"] and _http2_available()
+        trace = get_interaction_trace()
+        if trace is not None:
+            # 기록/재생 중에는 요청/응답을 가로채는 전송 계층 사용 (풀 설정은 내부 전송 계층에 적용)
+            inner = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+            return httpx.AsyncClient(timeout=timeout, transport=trace.wrap_transport(inner))
+        return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+    def get_client(self, base_url: Optional[str] = None) -> httpx.AsyncClient:
+        """현재 이벤트 루프의 엔드포인트용 공유 클라이언트 반환 (없으면 생성)"""
+        base_url = (base_url or LLM_CONFIG["base_url"]).rstrip("/")
+        self._prune_closed_loops()
+        clients = self._clients.setdefault(asyncio.get_running_loop(), {})
+        client = clients.get(base_url)
+        if client is None or client.is_closed:
+            client = clients[base_url] = self._create_client(base_url)
+        return client
+
+    def _prune_closed_loops(self):
+        """닫힌 루프의 클라이언트 참조 해제
+
+        닫힌 루프에 묶인 커넥션은 await로 정리할 수 없으므로 참조만 놓는다.
+        """
+        for loop in [loop for loop in self._clients if loop.is_closed()]:
+            del self._clients[loop]
+
+    @property
+    def has_clients(self) -> bool:
+        """아직 열려 있는 루프의 클라이언트가 남아 있는지 여부"""
+        self._prune_closed_loops()
+        return any(self._clients.values())
+
+    def _observe_prefix(self, base_url: str, payload: Dict[str, Any], info: Optional[Dict[str, Any]]):
+        """직전 요청과의 공유 접두사 길이를 기록 (info를 넘기면 info["shared_prefix"]에도 기록)"""
+        shared = self.prefix_tracker.observe(base_url, payload.get("messages", []))
+        llm_shared_prefix_histogram.record(shared, {"llm.endpoint": base_url})
+        if info is not None:
+            info["shared_prefix"] = shared
+
+    @staticmethod
+    def _headers(api_key: Optional[str]) -> Dict[str, str]:
+        api_key = LLM_CONFIG["api_key"] if api_key is None else api_key
+        return {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    async def post_chat_completion(
+        self,
+        payload: Dict[str, Any],
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        request_info: Optional[Dict[str, Any]] = None,
+    ) -> httpx.Response:
+        """/chat/completions 요청 전송
+
+        request_info를 넘기면 직전 요청과의 공유 접두사 길이를 request_info["shared_prefix"]에 기록한다.
+        """
+        base_url = (base_url or LLM_CONFIG["base_url"]).rstrip("/")
+        self._observe_prefix(base_url, payload, request_info)
+        client = self.get_client(base_url)
+        return await client.post(f"{base_url}/chat/completions", json=payload, headers=self._headers(api_key))
+
+    async def stream_chat_completion(
+        self,
+        payload: Dict[str, Any],
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        stream_info: Optional[Dict[str, Any]] = None,
+    ) -> AsyncGenerator[str, None]:
+        """/chat/completions SSE 스트리밍 요청 - 텍스트 델타를 순서대로 반환
+
+        stream_info를 넘기면 마지막으로 받은 finish_reason을 stream_info["finish_reason"]에,
+        직전 요청과의 공유 접두사 길이를 stream_info["shared_prefix"]에 기록한다.
+        """
+        base_url = (base_url or LLM_CONFIG["base_url"]).rstrip("/")
+        self._observe_prefix(base_url, payload, stream_info)
+        client = self.get_client(base_url)
+        payload = {**payload, "stream": True}
+
+        async with client.stream(
+            "POST", f"{base_url}/chat/completions", json=payload, headers=self._headers(api_key)
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                raise httpx.HTTPStatusError(
+                    f"LLM API 오류: {response.status_code} - {body.decode(errors='replace')}",
+                    request=response.request,
+                    response=response,
+                )
+
+            async for line in response.aiter_lines():
+                line = line.strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+
+                try:
+                    chunk = json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                if stream_info is not None and choices[0].get("finish_reason"):
+                    stream_info["finish_reason"] = choices[0]["finish_reason"]
+                content = (choices[0].get("delta") or {}).get("content")
+                if content:
+                    yield content
+
+    async def aclose(self):
+        """현재 루프의 클라이언트 종료
+
+        다른 스레드에서 실행 중인 루프의 클라이언트는 요청 처리 중일 수 있으므로 건드리지 않으며,
+        그 루프에서 aclose()를 호출하거나 루프가 닫힐 때 정리된다.
+        """
+        clients = self._clients.pop(asyncio.get_running_loop(), {})
+        self._prune_closed_loops()
+        for client in clients.values():
+            if not client.is_closed:
+                await client.aclose()
+
+
+_shared_transport: Optional[LLMTransport] = None
+
+
+def get_llm_transport() -> LLMTransport:
+    """프로세스 전역 공유 전송 계층 반환"""
+    global _shared_transport
+    if _shared_transport is None:
+        _shared_transport = LLMTransport()
+    return _shared_transport
+
+
+async def close_llm_transport():
+    """공유 전송 계층의 현재 루프 클라이언트 종료 (애플리케이션/루프 종료 시 호출)
+
+    다른 루프가 아직 클라이언트를 쓰고 있으면 공유 인스턴스는 그대로 둔다.
+    """
+    global _shared_transport
+    if _shared_transport is not None:
+        await _shared_transport.aclose()
+        if not _shared_transport.has_clients:
+            _shared_transport = None
@@ -0,0 +1,139 @@
+import asyncio
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterable, Awaitable, Iterator, Optional
+from orchestrator.llm_transport import close_llm_transport
+from orchestrator.llm_router import close_llm_router
+from orchestrator.mcp_session_pool import close_mcp_session_pool
+from orchestrator.interaction_trace import close_interaction_trace
+
+_DONE = object()
+
+
+class EventStream:
+    """백그라운드 루프에서 실행 중인 비동기 이벤트 스트림을 동기 코드에서 읽는 핸들
+
+    이벤트는 스레드 안전한 큐로 전달되며, for 문으로 순회하면 스트림이 끝날 때까지
+    이벤트를 차례로 반환한다 (실행 중 예외는 순회 끝에 다시 발생).
+    """
+
+    def __init__(self, events: "queue.Queue[Any]", future: Future):
+        self.events = events
+        self.future = future
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            item = self.events.get()
+            if item is _DONE:
+                break
+            yield item
+        # 예외/취소가 있었으면 호출한 쪽으로 전달
+        self.future.result()
+
+    def cancel(self) -> bool:
+        """스트림 실행 취소 (루프 쪽 태스크도 취소됨)"""
+        return self.future.cancel()
+
+
+class BackgroundLoopRunner:
+    """전용 스레드에서 장수(long-lived) 이벤트 루프를 돌리는 실행기
+
+    Streamlit처럼 매 상호작용마다 스크립트를 다시 실행하는 동기 UI에서
+    요청마다 새 이벤트 루프를 만들지 않고, 하나의 루프에 묶인 LLM/MCP 커넥션 풀을
+    계속 재사용하기 위해 사용한다. 모든 메서드는 다른 스레드에서 호출해도 안전하다.
+    """
+
+    def __init__(self, name: str = "agent-event-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        self.start()
+        return self._loop
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """루프 스레드 시작 (이미 실행 중이면 무시)"""
+        with self._lock:
+            if self.is_running:
+                return
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(started.set)
+                loop.run_forever()
+
+            self._loop = loop
+            self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+            self._thread.start()
+            started.wait()
+
+    def submit(self, coro: Awaitable[Any]) -> Future:
+        """코루틴을 루프에서 실행하고 concurrent.futures.Future 반환"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """코루틴을 루프에서 실행하고 결과를 기다림 (동기 호출용)"""
+        return self.submit(coro).result(timeout)
+
+    def stream(self, events: AsyncIterable[Any], maxsize: int = 0) -> EventStream:
+        """비동기 이벤트 스트림을 루프에서 소비하고 이벤트를 스레드 안전한 큐로 전달"""
+        event_queue: "queue.Queue[Any]" = queue.Queue(maxsize)
+
+        async def pump():
+            try:
+                async for event in events:
+                    event_queue.put(event)
+            finally:
+                event_queue.put(_DONE)
+
+        return EventStream(event_queue, self.submit(pump()))
+
+    def stop(self, timeout: float = 10.0):
+        """공유 커넥션 풀을 정리하고 루프 스레드 종료"""
+        with self._lock:
+            if not self.is_running:
+                return
+            loop, thread = self._loop, self._thread
+
+            async def shutdown():
+                await close_llm_router()
+                await close_llm_transport()
+                await close_mcp_session_pool()
+                await close_interaction_trace()
+
+            try:
+                asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout)
+            except Exception as e:
+                print(f"백그라운드 루프 정리 실패: {e}")
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            if not thread.is_alive():
+                loop.close()
+            self._loop = None
+            self._thread = None
+
+
+_shared_runner: Optional[BackgroundLoopRunner] = None
+_shared_runner_lock = threading.Lock()
+
+
+def get_loop_runner() -> BackgroundLoopRunner:
+    """프로세스 전역 공유 백그라운드 루프 실행기 반환 (종료 시 자동 정리)"""
+    global _shared_runner
+    with _shared_runner_lock:
+        if _shared_runner is None:
+            _shared_runner = BackgroundLoopRunner()
+            atexit.register(_shared_runner.stop)
+        _shared_runner.start()
+        return _shared_runner
@@ -0,0 +1,429 @@
+import asyncio
+import json
+import time
+import weakref
+import anyio
+from typing import Any, Dict, List, Optional
+from mcp.types import ContentBlock, Tool
+from pydantic import BaseModel, TypeAdapter
+from autogen_core import CancellationToken
+from autogen_core.utils import schema_to_pydantic_model
+from autogen_ext.tools.mcp import (
+    StdioServerParams,
+    SseServerParams,
+    StdioMcpToolAdapter,
+    SseMcpToolAdapter,
+    create_mcp_server_session,
+)
+from orchestrator.config import MCP_POOL_CONFIG
+from orchestrator.tool_manifest import ToolManifest, get_tool_manifest
+from orchestrator.interaction_trace import InteractionTrace, get_interaction_trace, server_id, tool_call_key
+from orchestrator.tool_cache import get_tool_result_cache
+
+
+def server_key(conf: Dict[str, Any]) -> str:
+    """MCP_SERVERS 항목을 식별하는 고정 키"""
+    return json.dumps(conf, sort_keys=True, ensure_ascii=False)
+
+
+def server_name(conf: Dict[str, Any]) -> str:
+    """로그 표시용 서버 이름"""
+    return conf.get("name") or conf.get("url") or " ".join([conf.get("command", conf["type"]), *conf.get("args", [])])
+
+
+def server_params_from_config(conf: Dict[str, Any]):
+    """MCP_SERVERS 항목을 AutoGen 서버 파라미터로 변환 (지원하지 않는 타입은 None)"""
+    if conf["type"] == "stdio":
+        return StdioServerParams(
+            command=conf["command"],
+            args=conf.get("args", []),
+            env=conf.get("env", {}),
+        )
+    elif conf["type"] == "sse":
+        return SseServerParams(url=conf["url"], headers=conf.get("headers", {}))
+    return None
+
+
+_CONTENT_LIST = TypeAdapter(List[ContentBlock])
+
+# 요청을 서버로 보내기 전에 난 세션 오류 (쓰기 스트림이 이미 닫힘) - 서버가 받은 적 없으므로 재시도해도 안전
+_UNSENT_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, BrokenPipeError)
+
+
+class McpServerSession:
+    """MCP 서버 하나에 대한 지속(warm) 세션
+
+    세션 컨텍스트는 전용 러너 태스크 안에서 열고 닫는다
+    (stdio/SSE 클라이언트의 cancel scope는 같은 태스크에서 종료되어야 함).
+    """
+
+    def __init__(self, name: str, params, config: Dict[str, Any]):
+        self.name = name
+        self.params = params
+        self.config = config
+        self.restart_count = 0
+        self._session = None
+        self._runner: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def is_running(self) -> bool:
+        return (
+            self._session is not None
+            and self._runner is not None
+            and not self._runner.done()
+            and self._loop is asyncio.get_running_loop()
+        )
+
+    async def _run(self, ready: asyncio.Future):
+        """세션을 열고 종료 신호가 올 때까지 유지"""
+        try:
+            async with create_mcp_server_session(self.params) as session:
+                await session.initialize()
+                self._session = session
+                ready.set_result(session)
+                await self._stop.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            self._session = None
+
+    async def _start(self):
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        self._loop = loop
+        self._stop = asyncio.Event()
+        self._runner = asyncio.create_task(self._run(ready), name=f"mcp-session:{self.name}")
+        await asyncio.wait_for(asyncio.shield(ready), timeout=self.config["startup_timeout"])
+
+    async def _stop_runner(self):
+        runner = self._runner
+        self._runner = None
+        self._session = None
+        if runner is None or runner.done():
+            return
+        if runner.get_loop() is not asyncio.get_running_loop():
+            # 다른(이미 버려진) 이벤트 루프의 세션은 정리할 수 없음
+            return
+
+        self._stop.set()
+        try:
+            await asyncio.wait_for(runner, timeout=self.config["shutdown_timeout"])
+        except (asyncio.TimeoutError, Exception):
+            runner.cancel()
+
+    def _get_lock(self) -> asyncio.Lock:
+        """현재 이벤트 루프용 세션 잠금 (시작/재시작을 직렬화)"""
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def _respawn(self):
+        """기존 러너를 정리하고 새 세션 시작 (잠금 안에서 호출)"""
+        if self._runner is not None:
+            self.restart_count += 1
+            print(f"MCP 서버 '{self.name}' 세션 재시작 ({self.restart_count}회)")
+        await self._stop_runner()
+        try:
+            await self._start()
+        except BaseException:
+            await self._stop_runner()
+            raise
+
+    async def get_session(self):
+        """살아 있는 세션 반환 (없거나 죽었으면 재시작)"""
+        async with self._get_lock():
+            if not self.is_running:
+                await self._respawn()
+            return self._session
+
+    async def health_check(self) -> bool:
+        """ping으로 세션 상태 확인"""
+        if not self.is_running:
+            return False
+        try:
+            await asyncio.wait_for(self._session.send_ping(), timeout=self.config["ping_timeout"])
+            return True
+        except Exception:
+            return False
+
+    async def restart(self, stale_runner: Optional[asyncio.Task] = None):
+        """세션을 강제로 다시 시작
+
+        stale_runner를 주면 그 러너가 아직 현재 러너일 때만 재시작한다
+        (다른 호출자가 먼저 재시작했으면 새 세션을 그대로 사용).
+        """
+        async with self._get_lock():
+            if stale_runner is not None and self._runner is not stale_runner and self.is_running:
+                return self._session
+            await self._respawn()
+            return self._session
+
+    async def aclose(self):
+        await self._stop_runner()
+
+
+class _PooledToolMixin:
+    """툴 호출 시 매번 새 세션을 만들지 않고 풀의 지속 세션을 사용 (툴 결과 캐시 적용)"""
+
+    def _bind_pool(self, pool: "McpSessionPool", key: str):
+        self._pool = pool
+        self._server_key = key
+        self._removed = False
+
+    def _refresh(self, tool: Optional[Tool]):
+        """서버가 알려준 최신 툴 정의로 교체 (None이면 서버에서 제거된 툴로 표시)"""
+        if tool is None:
+            self._removed = True
+            return
+        self._tool = tool
+        self._description = tool.description or ""
+        self._args_type = schema_to_pydantic_model(tool.inputSchema)
+
+    async def run(self, args: BaseModel, cancellation_token: CancellationToken) -> Any:
+        if self._removed:
+            raise ValueError(f"MCP 서버에서 제거된 툴입니다: {self.name}")
+        kwargs = args.model_dump(exclude_unset=True)
+        return await get_tool_result_cache().get_or_call(
+            self.name,
+            kwargs,
+            lambda: self._pool.call_tool(self._server_key, self, kwargs, cancellation_token),
+            namespace=self._server_key,
+        )
+
+
+class PooledStdioMcpToolAdapter(_PooledToolMixin, StdioMcpToolAdapter):
+    """풀 세션을 사용하는 stdio MCP 툴 어댑터"""
+
+
+class PooledSseMcpToolAdapter(_PooledToolMixin, SseMcpToolAdapter):
+    """풀 세션을 사용하는 SSE MCP 툴 어댑터"""
+
+
+class McpSessionPool:
+    """설정된 MCP 서버별 지속 세션 풀 - 툴 호출과 에이전트 간에 세션을 공유"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**MCP_POOL_CONFIG, **(config or {})}
+        self._servers: Dict[str, McpServerSession] = {}
+        self._health_task: Optional[asyncio.Task] = None
+        self._unverified: Dict[str, Dict[str, Any]] = {}  # 매니페스트에서 로드되어 아직 스키마 확인 전인 서버
+        self._adapters: Dict[str, "weakref.WeakSet[Any]"] = {}  # 서버별로 내준 어댑터 (스키마 변경 시 갱신)
+
+    def get_server(self, conf: Dict[str, Any]) -> Optional[McpServerSession]:
+        """설정 항목에 해당하는 서버 세션 (없으면 생성)"""
+        key = server_key(conf)
+        if key not in self._servers:
+            params = server_params_from_config(conf)
+            if params is None:
+                return None
+            self._servers[key] = McpServerSession(server_name(conf), params, self.config)
+        return self._servers[key]
+
+    async def load_tools(self, conf: Dict[str, Any], use_cache: bool = True) -> List[Any]:
+        """서버의 툴 목록을 풀 세션에 묶인 어댑터로 반환
+
+        매니페스트 캐시가 있으면 서버를 띄우지 않고 바로 반환하며,
+        실제 연결은 첫 툴 호출 시 이루어진다.
+        """
+        server = self.get_server(conf)
+        if server is None:
+            return []
+
+        key = server_key(conf)
+        trace = get_interaction_trace()
+        tools = self._replay_tools(trace, conf) if trace is not None and trace.replaying else None
+
+        if tools is None:
+            manifest = get_tool_manifest()
+            tools = manifest.load(conf) if manifest is not None and use_cache else None
+
+            if tools is not None:
+                self._unverified[key] = conf
+            else:
+                session = await server.get_session()
+                tools = (await session.list_tools()).tools
+                self._unverified.pop(key, None)
+                self._ensure_health_task()
+                if manifest is not None:
+                    manifest.save(conf, tools)
+
+            if trace is not None and trace.recording:
+                trace.record({"type": "mcp_tools", "key": server_id(server.name), "server": server.name,
+                              "tools": ToolManifest._serialize(tools)})
+
+        adapter_cls = PooledStdioMcpToolAdapter if conf["type"] == "stdio" else PooledSseMcpToolAdapter
+        adapters = []
+        for tool in tools:
+            adapter = adapter_cls(server_params=server.params, tool=tool)
+            adapter._bind_pool(self, key)
+            adapters.append(adapter)
+        self._adapters.setdefault(key, weakref.WeakSet()).update(adapters)
+        return adapters
+
+    @staticmethod
+    def _replay_tools(trace: InteractionTrace, conf: Dict[str, Any]) -> Optional[List[Tool]]:
+        """재생 파일에 기록된 서버의 툴 목록 (없으면 None - 평소처럼 로드)"""
+        entry = trace.find("mcp_tools", server_id(server_name(conf)))
+        if entry is None:
+            print(f"재생 파일에 MCP 서버 '{server_name(conf)}' 툴 목록이 없음 - 평소처럼 로드")
+            return None
+        return [Tool.model_validate(tool) for tool in entry["tools"]]
+
+    async def _verify_manifest(self, key: str, session):
+        """지연 연결 후 서버가 알려준 스키마와 캐시를 비교하고, 다르면 캐시와 이미 내준 어댑터를 갱신"""
+        conf = self._unverified.pop(key, None)
+        manifest = get_tool_manifest()
+        if conf is None or manifest is None:
+            return
+
+        tools = (await session.list_tools()).tools
+        if not manifest.matches(conf, tools):
+            manifest.save(conf, tools)
+            self._refresh_adapters(key, tools)
+
+    def _refresh_adapters(self, key: str, tools: List[Tool]):
+        """이미 내준 어댑터의 스키마/설명을 서버의 최신 정의로 바꾸고 제거된 툴은 호출하지 못하게 표시
+
+        서버에 새로 생긴 툴은 갱신된 매니페스트에서 다음 load_tools 때 로드된다.
+        """
+        by_name = {tool.name: tool for tool in tools}
+        adapters = list(self._adapters.get(key, ()))
+        for adapter in adapters:
+            adapter._refresh(by_name.get(adapter.name))
+        known = {adapter.name for adapter in adapters}
+        removed = sorted(known - set(by_name))
+        added = sorted(set(by_name) - known)
+        print(f"MCP 서버 '{self._servers[key].name}' 툴 스키마 변경 감지 - 툴 {len(known) - len(removed)}개 갱신"
+              + (f", 제거됨: {removed}" if removed else "")
+              + (f", 새 툴(다음 로드부터): {added}" if added else ""))
+
+    async def call_tool(self, key: str, adapter, args: Dict[str, Any], cancellation_token: CancellationToken) -> Any:
+        """풀 세션으로 툴 호출 (기록/재생 모드면 호출 결과를 기록하거나 기록된 결과를 반환)"""
+        trace = get_interaction_trace()
+        if trace is None:
+            return await self._call_tool(key, adapter, args, cancellation_token)
+
+        sid = server_id(self._servers[key].name)
+        entry: Dict[str, Any] = {"type": "mcp_call", "key": tool_call_key(sid, adapter.name, args),
+                                 "group": f"{sid}/{adapter.name}", "tool": adapter.name}
+        started = time.monotonic()
+        if trace.replaying:
+            recorded = trace.take("mcp_call", entry["key"], entry["group"])
+            if recorded is None:
+                raise RuntimeError(f"재생 기록 없음: MCP 툴 '{adapter.name}' 호출 {args}")
+            await trace.sleep_until(started, recorded["duration_ms"])
+            if "error" in recorded:
+                raise Exception(recorded["error"])
+            return _CONTENT_LIST.validate_python(recorded["result"])
+
+        try:
+            result = await self._call_tool(key, adapter, args, cancellation_token)
+        except asyncio.CancelledError:
+            # 취소된 호출은 결과가 없으므로 기록하지 않음
+            raise
+        except Exception as e:
+            entry["error"] = str(e)
+            raise
+        else:
+            entry["result"] = [item.model_dump(mode="json", exclude_none=True) for item in result]
+            return result
+        finally:
+            if "error" in entry or "result" in entry:
+                entry["duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+                trace.record(entry)
+
+    async def _call_tool(self, key: str, adapter, args: Dict[str, Any], cancellation_token: CancellationToken) -> Any:
+        """풀 세션으로 툴 호출 - 세션 장애 시 재시작하고, 안전한 경우에만 한 번 재시도
+
+        요청을 보내기 전에 끊긴 경우는 항상 재시도하고, 요청을 보낸 뒤 끊긴 경우는
+        서버가 이미 실행했을 수 있으므로 retry_tools에 등록된(멱등) 툴만 재시도한다.
+        """
+        server = self._servers[key]
+        session = await server.get_session()
+        runner = server._runner
+        self._ensure_health_task()
+        if key in self._unverified:
+            try:
+                await self._verify_manifest(key, session)
+            except Exception as e:
+                print(f"MCP 서버 '{server.name}' 툴 목록 확인 실패: {e}")
+
+        try:
+            return await adapter._run(args=args, cancellation_token=cancellation_token, session=session)
+        except asyncio.CancelledError:
+            raise
+        except _UNSENT_ERRORS:
+            retry = True
+        except Exception:
+            # 툴 자체 오류는 그대로 전달
+            if await server.health_check():
+                raise
+            retry = adapter.name in self.config["retry_tools"]
+            if not retry:
+                # 세션만 살려 두고 오류는 그대로 전달 (툴이 두 번 실행되지 않도록 재시도하지 않음)
+                try:
+                    await server.restart(runner)
+                except Exception as e:
+                    print(f"MCP 서버 '{server.name}' 재시작 실패: {e}")
+                raise
+
+        session = await server.restart(runner)
+        return await adapter._run(args=args, cancellation_token=cancellation_token, session=session)
+
+    def _ensure_health_task(self):
+        interval = self.config["health_check_interval"]
+        if not interval:
+            return
+        if self._health_task is None or self._health_task.done() \
+                or self._health_task.get_loop() is not asyncio.get_running_loop():
+            self._health_task = asyncio.create_task(self._health_loop(interval), name="mcp-health-check")
+
+    async def _health_loop(self, interval: float):
+        """주기적으로 세션 상태를 확인하고 죽은 세션을 재시작"""
+        while True:
+            await asyncio.sleep(interval)
+            for server in list(self._servers.values()):
+                runner = server._runner
+                if runner is None or await server.health_check():
+                    continue
+                try:
+                    await server.restart(runner)
+                except Exception as e:
+                    print(f"MCP 서버 '{server.name}' 재시작 실패: {e}")
+
+    async def aclose(self):
+        """모든 세션 종료"""
+        if self._health_task is not None and not self._health_task.done():
+            self._health_task.cancel()
+        self._health_task = None
+        for server in list(self._servers.values()):
+            await server.aclose()
+        self._servers.clear()
+
+
+_shared_pool: Optional[McpSessionPool] = None
+
+
+def get_mcp_session_pool() -> McpSessionPool:
+    """프로세스 전역 공유 MCP 세션 풀 반환"""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = McpSessionPool()
+    return _shared_pool
+
+
+async def close_mcp_session_pool():
+    """공유 세션 풀 종료 (애플리케이션 종료 시 호출)"""
+    global _shared_pool
+    if _shared_pool is not None:
+        await _shared_pool.aclose()
+        _shared_pool = None
@@ -1,19 +1,58 @@
 import asyncio
-from autogen_ext.tools.mcp import StdioServerParams, SseServerParams, mcp_server_tools
-from orchestrator.config import MCP_SERVERS
+from typing import Any, Callable, List, Optional
+from orchestrator.config import MCP_SERVERS, MCP_POOL_CONFIG
+from orchestrator.mcp_session_pool import get_mcp_session_pool, server_name
 
-async def load_mcp_tools():
+# 백그라운드에서 연결 중인 서버 로드 태스크 (GC 방지용 참조)
+_background_loads = set()
+
+
+async def _load_server_tools(conf, on_late_tools: Optional[Callable[[List[Any]], None]],
+                             use_cache: bool) -> List[Any]:
+    """서버 하나의 툴 로드 - 제한 시간 초과/실패 시 건너뜀"""
+    name = server_name(conf)
+    timeout = conf.get("timeout", MCP_POOL_CONFIG["discovery_timeout"])
+    task = asyncio.ensure_future(get_mcp_session_pool().load_tools(conf, use_cache=use_cache))
+
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+
+    except asyncio.TimeoutError:
+        if on_late_tools is None or not MCP_POOL_CONFIG["background_attach"]:
+            task.cancel()
+            print(f"MCP 서버 '{name}' 응답 없음 ({timeout}초) - 건너뜀")
+            return []
+
+        print(f"MCP 서버 '{name}' 응답 지연 ({timeout}초) - 백그라운드에서 계속 연결")
+
+        def attach(done: asyncio.Future):
+            _background_loads.discard(done)
+            if done.cancelled():
+                return
+            if done.exception() is not None:
+                print(f"MCP 서버 '{name}' 로드 실패: {done.exception()}")
+                return
+            print(f"MCP 서버 '{name}' 연결 완료 - 툴 {len(done.result())}개 추가")
+            on_late_tools(done.result())
+
+        _background_loads.add(task)
+        task.add_done_callback(attach)
+        return []
+
+    except Exception as e:
+        print(f"MCP 서버 '{name}' 로드 실패: {e}")
+        return []
+
+
+async def load_mcp_tools(on_late_tools: Optional[Callable[[List[Any]], None]] = None, use_cache: bool = True):
+    """MCP_SERVERS의 툴을 병렬로 로드 (공유 세션 풀 사용)
+
+    Args:
+        on_late_tools: 제한 시간 이후에 연결된 서버의 툴을 받을 콜백 (없으면 지연 서버는 건너뜀)
+        use_cache: 툴 매니페스트 캐시 사용 여부 (False면 서버에 연결해 목록을 새로 받고 캐시 갱신)
+    """
+    results = await asyncio.gather(*[_load_server_tools(conf, on_late_tools, use_cache) for conf in MCP_SERVERS])
     tools = []
-    for conf in MCP_SERVERS:
-        if conf["type"] == "stdio":
-            params = StdioServerParams(
-                command=conf["command"], 
-                args=conf.get("args", []),
-                env=conf.get("env", {}),
-            )
-        elif conf["type"] == "sse":
-            params = SseServerParams(url=conf["url"], headers=conf.get("headers", {}))
-        else:
-            continue
-        tools += await mcp_server_tools(params)
+    for server_tools in results:
+        tools += server_tools
     return tools
@@ -0,0 +1,67 @@
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+
+def shared_prefix_length(previous: List[Dict[str, str]], current: List[Dict[str, str]]) -> int:
+    """두 메시지 목록을 이어 붙인 프롬프트의 공통 접두사 길이(문자 수)
+
+    같은 메시지는 문자열 비교 한 번으로 건너뛰고, 처음 달라지는 메시지만 문자 단위로 비교한다.
+    """
+    shared = 0
+    for prev_msg, cur_msg in zip(previous, current):
+        if prev_msg["role"] != cur_msg["role"]:
+            break
+        prev_content, cur_content = prev_msg["content"], cur_msg["content"]
+        if prev_content == cur_content:
+            shared += len(cur_content)
+            continue
+        limit = min(len(prev_content), len(cur_content))
+        index = 0
+        while index < limit and prev_content[index] == cur_content[index]:
+            index += 1
+        shared += index
+        break
+    return shared
+
+
+class PrefixTracker:
+    """엔드포인트별로 연속된 요청 간 공유 프롬프트 접두사 길이를 기록
+
+    로컬 서버(LM Studio, llama.cpp)는 이전 요청과 같은 앞부분의 KV 캐시를 재사용하므로
+    이 값이 클수록 prefill 시간이 줄어든다.
+    """
+
+    def __init__(self, history_size: int = 100):
+        self._last: Dict[str, List[Dict[str, str]]] = {}
+        self.recent = deque(maxlen=history_size)  # (공유 접두사, 전체 길이) 최근 기록
+        self.requests = 0
+        self.shared_chars = 0
+        self.total_chars = 0
+
+    def observe(self, endpoint: str, messages: List[Dict[str, Any]]) -> int:
+        """요청 메시지를 기록하고 직전 요청과의 공유 접두사 길이 반환"""
+        messages = [{"role": msg["role"], "content": str(msg["content"])} for msg in messages]
+        total = sum(len(msg["content"]) for msg in messages)
+        previous = self._last.get(endpoint)
+        shared = shared_prefix_length(previous, messages) if previous else 0
+        self._last[endpoint] = messages
+
+        self.requests += 1
+        self.shared_chars += shared
+        self.total_chars += total
+        self.recent.append((shared, total))
+        return shared
+
+    @property
+    def last_shared_prefix(self) -> Optional[int]:
+        return self.recent[-1][0] if self.recent else None
+
+    def stats(self) -> Dict[str, Any]:
+        """요청 수와 공유 접두사 비율"""
+        return {
+            "requests": self.requests,
+            "last_shared_prefix": self.last_shared_prefix,
+            "shared_chars": self.shared_chars,
+            "total_chars": self.total_chars,
+            "shared_ratio": self.shared_chars / self.total_chars if self.total_chars else 0.0,
+        }
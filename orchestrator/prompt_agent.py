@@ -1,19 +1,91 @@
 import asyncio
+import json
+import time
+from contextlib import aclosing
+from opentelemetry import trace
+from opentelemetry.trace import Status, StatusCode
 from typing import List, Any, AsyncGenerator, Dict, Optional
-from autogen_agentchat.messages import TextMessage, ChatMessage
-from autogen_core import CancellationToken
+from autogen_agentchat.messages import (
+    TextMessage, ChatMessage, ModelClientStreamingChunkEvent, ToolCallRequestEvent, ToolCallExecutionEvent
+)
+from autogen_core import CancellationToken, FunctionCall
+from autogen_core.models import FunctionExecutionResult
 from autogen_agentchat.base import Response
-from .tool_parser import ToolCallParser, ToolCall
+from .tool_parser import ToolCallParser, ToolCall, ToolPlan, IncrementalToolCallParser
+from .llm_transport import LLMTransport, get_llm_transport
+from .llm_cache import CompletionCache, get_completion_cache
+from .llm_scheduler import LLMScheduler, get_llm_scheduler
+from .llm_router import LLMRouter, EndpointUnavailable, FAILOVER_STATUS_CODES, get_llm_router, is_failover_error
+from .deadline import Deadline, DeadlineExceeded, TurnCancelled
+from .history import ConversationHistory
+from .tool_result_store import FETCH_TOOL_NAME, ToolResultCompactor
+from .tool_selector import ToolSelector
+from .token_counter import count_tokens
+from .telemetry import (
+    tracer, prompt_tokens_counter, completion_tokens_counter, llm_duration_histogram, llm_ttft_histogram,
+    llm_errors_counter, tool_duration_histogram, tool_errors_counter, turn_duration_histogram,
+)
+from orchestrator.config import LLM_CONFIG, PROMPT_AGENT_CONFIG
+
+
+# tool_timeout 인자를 생략했음을 나타내는 값 (None은 "제한 없음"으로 쓰이므로 구분)
+_USE_CONFIG: Any = object()
+
+
+class LLMResponseError(Exception):
+    """LLM 서버가 사용할 수 없는 응답을 돌려줌 (4xx 등 오류 상태, 빈 응답, 잘못된 형식)"""
+
+
+def error_message(error: BaseException) -> TextMessage:
+    """턴을 끝낸 오류를 알리는 메시지 (metadata["error"]에 예외 타입 표시)"""
+    return TextMessage(content=f"LLM 호출 오류: {error}", source="assistant",
+                       metadata={"error": type(error).__name__})
+
+
+def is_error_message(message: Any) -> bool:
+    """error_message()로 만든 오류 메시지인지 (배치 등에서 성공한 응답과 구분)"""
+    return isinstance(message, TextMessage) and "error" in message.metadata
+
 
 class PromptBasedAgent:
     """프롬프트 기반으로 툴 호출을 처리하는 커스텀 에이전트"""
 
-    def __init__(self, model_client, tools: List[Any], system_message: str, max_tool_iterations: int = 5):
+    def __init__(self, model_client, tools: List[Any], system_message: str, max_tool_iterations: int = 5,
+                 transport: Optional[LLMTransport] = None, stream: bool = False,
+                 max_concurrent_tools: Optional[int] = None, tool_timeout: Optional[float] = _USE_CONFIG,
+                 completion_cache: Optional[CompletionCache] = None, max_prompt_tokens: Optional[int] = None,
+                 tool_selection: bool = False, scheduler: Optional[LLMScheduler] = None,
+                 router: Optional[LLMRouter] = None, compactor: Optional[ToolResultCompactor] = None,
+                 turn_timeout: Optional[float] = None):
         self.model_client = model_client
+        self.transport = transport or get_llm_transport()
+        self.stream = stream
+        self.max_concurrent_tools = max_concurrent_tools or PROMPT_AGENT_CONFIG["max_concurrent_tools"]
+        # 생략하면 설정값, None이면 툴 실행 시간 제한 없음
+        self.tool_timeout = PROMPT_AGENT_CONFIG["tool_timeout"] if tool_timeout is _USE_CONFIG else tool_timeout
+        # 턴 마감 시간은 기본적으로 호출한 쪽(세션/배치)이 취소 토큰으로 관리, 지정하면 에이전트도 적용
+        self.turn_timeout = turn_timeout
+        self.completion_cache = completion_cache or get_completion_cache()
+        self.scheduler = scheduler or get_llm_scheduler()
+        self.router = router or get_llm_router()
+        # 원문 보관소는 에이전트(세션)마다 따로 둠 - 다른 세션의 결과를 핸들로 조회하지 못하게 함
+        self.compactor = compactor or ToolResultCompactor()
         self.tools = {tool.name: tool for tool in tools} if tools else {}
         self.system_message = system_message
         self.max_tool_iterations = max_tool_iterations
-        self.conversation_history = []
+        self.history = ConversationHistory(max_tokens=max_prompt_tokens)
+        # tool_selection: 질의마다 관련 툴만 담은 시스템 프롬프트 사용 (system_message 대신)
+        self.tool_selection = tool_selection
+        self.tool_selector = ToolSelector(list(self.tools.values())) if tool_selection and self.tools else None
+        self.last_finish_reason: Optional[str] = None
+        self._pending_stream_cache: Optional[tuple] = None  # 끝까지 받은 스트리밍 응답 (payload, 내용) - 조기 중단이 없으면 캐시
+        self.early_stops = 0      # 툴 호출 완료 후 스트림을 끊은 횟수
+        self.budget_retries = 0   # 툴 선택 예산에서 잘린 직접 답변을 최종 예산으로 다시 생성한 횟수
+
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        """저장된 대화 히스토리 (role/content 목록)"""
+        return self.history.messages()
 
     async def run(self, task: str) -> Response:
         """기본 실행 메서드 (AutoGen 호환성)"""
@@ -21,9 +93,11 @@ class PromptBasedAgent:
         async for message in self.run_stream(task=task):
             messages.append(message)
 
-        # 마지막 메시지를 chat_message로, 나머지를 inner_messages로 사용
-        if messages:
-            return Response(chat_message=messages[-1], inner_messages=messages[:-1] if len(messages) > 1 else None)
+        # 마지막 텍스트 메시지를 chat_message로, 나머지(툴 이벤트, 스트리밍 청크 포함)를 inner_messages로 사용
+        final_index = next((i for i in range(len(messages) - 1, -1, -1) if isinstance(messages[i], TextMessage)), None)
+        if final_index is not None:
+            inner_messages = messages[:final_index] + messages[final_index + 1:]
+            return Response(chat_message=messages[final_index], inner_messages=inner_messages or None)
         else:
             # 빈 응답의 경우
             empty_message = TextMessage(content="No response generated.", source="assistant")
@@ -36,122 +110,470 @@ class PromptBasedAgent:
             yield message
 
     async def on_messages_stream(self, messages: List[ChatMessage], cancellation_token: CancellationToken) -> AsyncGenerator[ChatMessage, None]:
-        """메시지 스트림 처리 (AutoGen 호환 인터페이스)"""
-        # 새로운 메시지를 대화 히스토리에 추가
+        """메시지 스트림 처리 (AutoGen 호환 인터페이스) - 턴 전체를 agent.turn span으로 기록
+
+        turn_timeout이 지나거나 cancellation_token이 취소되면 진행 중인 LLM 요청과 툴 호출을 취소한다.
+        답변 없이 끝난 턴(LLM 오류, 마감 시간 초과, 취소)은 히스토리에서 되돌려 다음 턴에
+        user 메시지가 연달아 전송되지 않게 한다.
+        """
+        # 제너레이터는 yield 사이에 호출한 쪽 컨텍스트에서 재개되므로 span을 current로 붙이지 않고 부모 컨텍스트로 전달
+        turn_span = tracer.start_span("agent.turn", attributes={"agent.stream": self.stream, "agent.tools": len(self.tools)})
+        start = time.perf_counter()
+        deadline = Deadline(self.turn_timeout, cancellation_token)
+        checkpoint = self.history.checkpoint()
+        answered = False
+        try:
+            async with aclosing(self._turn_stream(messages, deadline, trace.set_span_in_context(turn_span))) as events:
+                async for event in events:
+                    if isinstance(event, TextMessage) and not is_error_message(event):
+                        answered = True
+                    yield event
+        except Exception as e:
+            turn_span.record_exception(e)
+            turn_span.set_status(Status(StatusCode.ERROR, str(e)))
+            raise
+        finally:
+            if not answered:
+                self.history.rollback(checkpoint)
+            deadline.close()
+            turn_span.set_attribute("agent.deadline_exceeded", deadline.expired)
+            turn_span.set_attribute("agent.answered", answered)
+            turn_duration_histogram.record((time.perf_counter() - start) * 1000)
+            turn_span.end()
+
+    async def _turn_stream(self, messages: List[ChatMessage], deadline: Deadline,
+                           turn_context) -> AsyncGenerator[ChatMessage, None]:
+        """한 턴 처리 - 반복마다 agent.iteration span 아래에 히스토리 구성, LLM 요청, 파싱, 툴 실행 span 기록"""
+        # 새로운 메시지를 대화 히스토리에 추가 (이번 턴 메시지 수를 세어 예산 축약에서 보호)
+        turn_messages = 0
         for msg in messages:
             if hasattr(msg, 'content') and hasattr(msg, 'source'):
-                self.conversation_history.append({"role": msg.source, "content": msg.content})
+                self.history.append(msg.source, msg.content)
+                turn_messages += 1
 
-        # 시스템 프롬프트 포함한 전체 대화 구성
-        full_conversation = [{"role": "system", "content": self.system_message}]
-        full_conversation.extend(self.conversation_history)
+        # 이번 턴 질의와 관련된 툴만 시스템 프롬프트에 포함
+        system_message = self.system_message
+        if self.tool_selector is not None:
+            query = " ".join(str(msg.content) for msg in messages if hasattr(msg, 'content'))
+            system_message = self.tool_selector.system_prompt(query)
 
         # 툴 호출 반복 처리
         iteration = 0
         while iteration < self.max_tool_iterations:
-            if cancellation_token.is_cancelled():
+            if deadline.token.is_cancelled():
+                yield error_message(deadline.error())
                 break
 
+            iteration_span = tracer.start_span("agent.iteration", context=turn_context,
+                                               attributes={"agent.iteration": iteration})
+            iteration_context = trace.set_span_in_context(iteration_span)
+
+            # 시스템 프롬프트 포함한 전체 대화 구성 (토큰 예산 적용)
+            with tracer.start_span("history.build", context=iteration_context) as build_span:
+                full_conversation = self.history.build(
+                    system_message, protected_from=len(self.history) - turn_messages
+                )
+                build_span.set_attribute("history.prompt_tokens", self.history.last_prompt_tokens)
+                build_span.set_attribute("history.messages", len(full_conversation))
+            prompt_tokens_counter.add(self.history.last_prompt_tokens)
+
             # LLM 호출
+            tool_tasks = {}
+            plan = ToolPlan()  # 이번 응답의 툴 호출 의존성 (참조가 없으면 모두 바로 실행)
+            semaphore = asyncio.Semaphore(self.max_concurrent_tools)
             try:
-                response = await self._call_llm(full_conversation)
+                if self.stream:
+                    # 스트리밍: 텍스트 청크를 바로 전달하고, 완료된 툴 호출은 즉시 실행 시작
+                    chunks = []
+                    tool_calls = []
+                    parser = IncrementalToolCallParser()
+                    tail_chars = 0  # 마지막 툴 호출 이후 이어진 텍스트 길이
+                    stopped = False
+                    parse_seconds = 0.0
+                    stream = deadline.iterate(self._call_llm_stream(
+                        full_conversation, self._max_tokens_for(iteration), iteration_context, final_answer=iteration > 0))
+                    async with aclosing(stream):
+                        async for chunk in stream:
+                            chunks.append(chunk)
+                            parse_start = time.perf_counter()
+                            visible, completed = parser.feed(chunk)
+                            parse_seconds += time.perf_counter() - parse_start
+                            if completed:
+                                tail_chars = 0
+                            elif tool_calls:
+                                tail_chars += len(visible.strip())
+                            if visible:
+                                yield ModelClientStreamingChunkEvent(content=visible, source="assistant")
+                            for tool_call in completed:
+                                self._start_tool(plan, tool_call, tool_tasks, semaphore, deadline, iteration_context)
+                                tool_calls.append(tool_call)
+                            if completed:
+                                first = len(tool_calls) - len(completed)
+                                yield self._tool_call_event(iteration, completed, first)
+
+                            # 툴 호출이 끝난 뒤 결과를 지어내거나 긴 텍스트가 이어지면 생성 중단 (연결 종료)
+                            if tool_calls and (parser.in_tool_result
+                                               or tail_chars > PROMPT_AGENT_CONFIG["tool_call_tail_chars"]):
+                                stopped = True
+                                self.early_stops += 1
+                                break
+
+                    if not stopped:
+                        self._commit_stream_cache()
+                    self._pending_stream_cache = None
+                    tail, _ = parser.close()
+                    if tail and not stopped:
+                        yield ModelClientStreamingChunkEvent(content=tail, source="assistant")
+                    response = "".join(chunks).strip()
+                    iteration_span.set_attribute("agent.parse_ms", parse_seconds * 1000)
+                    iteration_span.set_attribute("agent.early_stop", stopped)
+                else:
+                    max_tokens = self._max_tokens_for(iteration)
+                    response = await deadline.run(self._call_llm(full_conversation, max_tokens, iteration_context,
+                                                                 final_answer=iteration > 0))
+                    tool_calls = self._parse_traced(response, iteration_context)
+                    if response and not tool_calls and self.last_finish_reason == "length" \
+                            and max_tokens < PROMPT_AGENT_CONFIG["final_max_tokens"]:
+                        # 툴 선택 예산에서 잘린 직접 답변 - 최종 응답 예산으로 다시 생성
+                        self.budget_retries += 1
+                        response = await deadline.run(self._call_llm(
+                            full_conversation, PROMPT_AGENT_CONFIG["final_max_tokens"], iteration_context, final_answer=True))
+                        tool_calls = self._parse_traced(response, iteration_context)
+
+                completion_tokens_counter.add(count_tokens(response))
+                iteration_span.set_attribute("agent.tool_calls", len(tool_calls))
+
                 if not response:
                     break
 
-                # 툴 호출 파싱
-                tool_calls = ToolCallParser.parse_tool_calls(response)
-
                 if not tool_calls:
                     # 툴 호출이 없으면 최종 응답으로 처리
                     clean_response = ToolCallParser.remove_tool_calls_from_response(response)
                     if clean_response.strip():
+                        self.history.append("assistant", clean_response)
                         yield TextMessage(content=clean_response, source="assistant")
                     break
 
-                # 툴 호출 실행
-                tool_results = []
-                for tool_call in tool_calls:
-                    try:
-                        result = await self._execute_tool(tool_call)
-                        tool_results.append(ToolCallParser.format_tool_result(tool_call.name, result))
+                # 툴 호출을 의존성 DAG로 동시 실행 (스트리밍 중 이미 시작된 호출은 결과만 대기)
+                if not self.stream:
+                    yield self._tool_call_event(iteration, tool_calls)
+                for tool_call in tool_calls[len(plan.calls):]:
+                    self._start_tool(plan, tool_call, tool_tasks, semaphore, deadline, iteration_context)
 
-                        # 툴 실행 상태를 스트리밍
-                        status_msg = f"🛠 도구 '{tool_call.name}' 실행 완료"
-                        yield TextMessage(content=status_msg, source="assistant")
+                # 완료되는 순서대로 상태를 스트리밍하고, 결과는 호출 순서대로 모음
+                results: Dict[int, str] = {}
+                task_index = {task: index for index, task in tool_tasks.items()}
+                pending = set(tool_tasks.values())
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in sorted(done, key=lambda t: task_index[t]):
+                        index = task_index[task]
+                        tool_call = tool_calls[index]
+                        try:
+                            result = str(task.result())
+                            is_error = False
+                        except Exception as e:
+                            result = f"오류: {str(e)}"
+                            is_error = True
+                        # 큰 결과는 한도 안으로 줄여 대화에 넣음 (선행 호출 참조에는 원문 사용)
+                        result = self.compactor.compact(tool_call.name, result)
+                        results[index] = ToolCallParser.format_tool_result(tool_call.name, result, tool_call.id)
 
-                    except Exception as e:
-                        error_result = f"오류: {str(e)}"
-                        tool_results.append(ToolCallParser.format_tool_result(tool_call.name, error_result))
+                        # 툴 실행 결과를 스트리밍 (AssistantAgent와 같은 이벤트 형식)
+                        yield ToolCallExecutionEvent(content=[FunctionExecutionResult(
+                            content=result, name=tool_call.name, call_id=self._call_id(iteration, index),
+                            is_error=is_error,
+                        )], source="assistant")
+
+                tool_results = [results[index] for index in range(len(tool_calls))]
 
                 # 툴 결과를 대화에 추가
                 if tool_results:
-                    tool_response = response + "\n" + "\n".join(tool_results)
-                    full_conversation.append({"role": "assistant", "content": tool_response})
+                    tool_response = ToolCallParser.truncate_after_tool_calls(response) + "\n" + "\n".join(tool_results)
+                    self.history.append("assistant", tool_response)
+                    turn_messages += 1
 
                 iteration += 1
 
             except Exception as e:
-                error_msg = f"LLM 호출 오류: {str(e)}"
-                yield TextMessage(content=error_msg, source="assistant")
+                iteration_span.record_exception(e)
+                iteration_span.set_status(Status(StatusCode.ERROR, str(e)))
+                yield error_message(e)
                 break
 
-        # 마지막 대화를 히스토리에 저장
-        if full_conversation and len(full_conversation) > len(self.conversation_history) + 1:
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": full_conversation[-1]["content"]
-            })
+            finally:
+                # 중단된 경우 남아 있는 툴 실행 취소
+                for task in tool_tasks.values():
+                    if not task.done():
+                        task.cancel()
+                iteration_span.end()
+
+    @staticmethod
+    def _call_id(iteration: int, index: int) -> str:
+        """턴 안에서 툴 호출을 식별하는 ID (요청/결과 이벤트 연결용)"""
+        return f"call_{iteration}_{index}"
+
+    def _tool_call_event(self, iteration: int, tool_calls: List[ToolCall], first: int = 0) -> ToolCallRequestEvent:
+        """파싱된 툴 호출을 AutoGen 툴 호출 요청 이벤트로 변환"""
+        return ToolCallRequestEvent(content=[
+            FunctionCall(
+                id=self._call_id(iteration, first + offset),
+                name=tool_call.name,
+                arguments=tool_call.raw_arguments or json.dumps(tool_call.arguments, ensure_ascii=False),
+            )
+            for offset, tool_call in enumerate(tool_calls)
+        ], source="assistant")
+
+    def _max_tokens_for(self, iteration: int) -> int:
+        """반복별 생성 토큰 상한 - 툴 결과를 받기 전(툴 선택)은 작게, 이후(최종 응답)는 크게
+
+        스트리밍은 툴 호출 완료 시 생성을 직접 끊고, 직접 답변은 이미 사용자에게 보이고 있어
+        다시 생성할 수 없으므로 항상 최종 응답 상한을 사용한다.
+        """
+        if self.tools and iteration == 0 and not self.stream:
+            return PROMPT_AGENT_CONFIG["tool_turn_max_tokens"]
+        return PROMPT_AGENT_CONFIG["final_max_tokens"]
 
-    async def _call_llm(self, conversation: List[Dict[str, str]]) -> str:
-        """LLM 호출 - 직접 HTTP API 사용"""
+    def _build_payload(self, conversation: List[Dict[str, str]], max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """/chat/completions 요청 본문 구성"""
+        payload = {
+            "model": LLM_CONFIG["model"],
+            "messages": [{"role": msg["role"], "content": msg["content"]} for msg in conversation],
+            "temperature": PROMPT_AGENT_CONFIG["temperature"],
+            "max_tokens": max_tokens or PROMPT_AGENT_CONFIG["final_max_tokens"],
+        }
+        if self.tools and PROMPT_AGENT_CONFIG["stop_sequences"]:
+            payload["stop"] = list(PROMPT_AGENT_CONFIG["stop_sequences"])
+        return payload
+
+    def _parse_traced(self, response: str, trace_context=None) -> List[ToolCall]:
+        """완성된 응답에서 툴 호출 파싱 (tool_call.parse span 기록)"""
+        if not response:
+            return []
+        with tracer.start_span("tool_call.parse", context=trace_context,
+                               attributes={"response.chars": len(response)}) as span:
+            tool_calls = ToolCallParser.parse_tool_calls(response)
+            span.set_attribute("agent.tool_calls", len(tool_calls))
+        return tool_calls
+
+    @staticmethod
+    def _record_llm_error(span, description: str):
+        llm_errors_counter.add(1)
+        span.set_status(Status(StatusCode.ERROR, description))
+
+    async def _call_llm(self, conversation: List[Dict[str, str]], max_tokens: Optional[int] = None,
+                        trace_context=None, final_answer: bool = False) -> str:
+        """LLM 호출 - 공유 HTTP 전송 계층으로 직접 API 사용 (llm.request span 기록)
+
+        라우터가 고른 엔드포인트의 스케줄러 슬롯을 받은 뒤 요청하며(final_answer면 툴 선택 요청보다 먼저),
+        연결 오류/5xx 응답이면 다음 엔드포인트로 장애 조치하고, 헤징이 켜져 있으면 늦은 요청을 다른
+        엔드포인트로 한 번 더 보낸다.
+        """
+        self.last_finish_reason = None
+        span = tracer.start_span("llm.request", context=trace_context,
+                                 attributes={"llm.stream": False, "llm.max_tokens": max_tokens or 0})
+        start = time.perf_counter()
         try:
-            import httpx
-            import json
-            from orchestrator.config import LLM_CONFIG
-
-            # 대화 형식 변환
-            api_messages = []
-            for msg in conversation:
-                api_messages.append({
-                    "role": msg["role"],
-                    "content": msg["content"]
-                })
-
-            # HTTP API 직접 호출
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{LLM_CONFIG['base_url']}/chat/completions",
-                    json={
-                        "model": LLM_CONFIG["model"],
-                        "messages": api_messages,
-                        "stream": False,
-                        "temperature": 0.7,
-                        "max_tokens": 2000
-                    },
-                    headers={"Authorization": f"Bearer {LLM_CONFIG['api_key']}"} if LLM_CONFIG['api_key'] else {},
-                    timeout=30.0
-                )
+            payload = self._build_payload(conversation, max_tokens)
+            cached = self.completion_cache.get(payload)
+            if cached is not None:
+                self.last_finish_reason = "stop"  # finish_reason이 stop인 응답만 캐시됨
+                span.set_attribute("llm.cache_hit", True)
+                return cached
 
-                if response.status_code == 200:
-                    result = response.json()
-                    if 'choices' in result and len(result['choices']) > 0:
-                        content = result['choices'][0]['message']['content']
-                        return content.strip() if content else "응답을 생성할 수 없습니다."
-                    else:
-                        return "LLM 응답 형식이 올바르지 않습니다."
-                else:
-                    print(f"LLM API 오류: {response.status_code} - {response.text}")
-                    return "안녕하세요! 무엇을 도와드릴까요?"
+            # 풀링된 커넥션으로 HTTP API 호출 (엔드포인트별 동시 요청 수 제한)
+            async def send(base_url: str):
+                request_info: Dict[str, Any] = {}
+                async with self.scheduler.slot(base_url, final_answer) as queue_wait:
+                    sent = time.perf_counter()
+                    response = await self.transport.post_chat_completion(
+                        {**payload, "stream": False}, base_url=base_url, request_info=request_info)
+                if response.status_code in FAILOVER_STATUS_CODES:
+                    raise EndpointUnavailable(f"HTTP {response.status_code}")
+                # 헤징 시 먼저 끝난 요청의 값만 기록
+                span.set_attribute("llm.endpoint", base_url)
+                span.set_attribute("llm.shared_prefix_chars", request_info.get("shared_prefix", 0))
+                span.set_attribute("llm.queue_ms", queue_wait * 1000)
+                span.set_attribute("llm.backend_ms", (time.perf_counter() - sent) * 1000)
+                return response
+
+            response = await self.router.execute(send, on_failover=lambda base_url, e: span.add_event(
+                "llm.failover", {"llm.endpoint": base_url, "error": str(e)}))
+            span.set_attribute("http.status_code", response.status_code)
+
+            # 오류 응답을 답변으로 바꾸지 않고 턴에 오류로 전달 (히스토리에 남지 않음)
+            if response.status_code != 200:
+                raise LLMResponseError(f"HTTP {response.status_code} - {response.text[:500]}")
+            result = response.json()
+            if not result.get('choices'):
+                raise LLMResponseError("LLM 응답 형식이 올바르지 않습니다 (choices 없음)")
+            self.last_finish_reason = result['choices'][0].get('finish_reason')
+            span.set_attribute("llm.finish_reason", self.last_finish_reason or "")
+            content = ((result['choices'][0].get('message') or {}).get('content') or "").strip()
+            if not content:
+                raise LLMResponseError(f"LLM 응답이 비어 있습니다 (finish_reason={self.last_finish_reason})")
+            # 끝까지 생성된 응답만 캐시 (max_tokens에서 잘린 응답이 캐시되면 히트 시 예산 재시도를 건너뜀)
+            if self.last_finish_reason == "stop":
+                self.completion_cache.put(payload, content)
+            return content
 
         except Exception as e:
-            print(f"LLM 호출 실패: {e}")
-            return "안녕하세요! 무엇을 도와드릴까요?"
+            span.record_exception(e)
+            self._record_llm_error(span, str(e))
+            raise
+
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            llm_duration_histogram.record(elapsed, {"llm.stream": False})
+            span.set_attribute("llm.total_ms", elapsed)
+            span.end()
+
+    async def _call_llm_stream(self, conversation: List[Dict[str, str]], max_tokens: Optional[int] = None,
+                               trace_context=None, final_answer: bool = False) -> AsyncGenerator[str, None]:
+        """LLM 스트리밍 호출 - SSE 텍스트 델타를 순서대로 반환 (중간에 닫으면 HTTP 스트림도 종료)
+
+        스트림이 끝날 때까지 스케줄러 슬롯을 점유하며, 첫 텍스트를 받기 전의 연결 오류/5xx는
+        다음 엔드포인트로 장애 조치한다. llm.request span에 대기 시간, 첫 토큰까지 시간(TTFT),
+        전체 시간을 기록한다.
+        """
+        span = tracer.start_span("llm.request", context=trace_context,
+                                 attributes={"llm.stream": True, "llm.max_tokens": max_tokens or 0})
+        start = time.perf_counter()
+        first_token = None
+        completed = False
+        self.last_finish_reason = None
+        self._pending_stream_cache = None
+        stream_info: Dict[str, Any] = {}
+        try:
+            payload = self._build_payload(conversation, max_tokens)
+            cached = self.completion_cache.get(payload)
+            if cached is not None:
+                self.last_finish_reason = "stop"  # finish_reason이 stop인 응답만 캐시됨
+                span.set_attribute("llm.cache_hit", True)
+                yield cached
+                return
+
+            chunks = []
+            try:
+                for base_url in self.router.route():
+                    span.set_attribute("llm.endpoint", base_url)
+                    try:
+                        with self.router.track(base_url):
+                            async with self.scheduler.slot(base_url, final_answer) as queue_wait:
+                                span.set_attribute("llm.queue_ms", queue_wait * 1000)
+                                async with aclosing(self.transport.stream_chat_completion(
+                                        payload, base_url=base_url, stream_info=stream_info)) as stream:
+                                    async for chunk in stream:
+                                        if first_token is None:
+                                            first_token = time.perf_counter()
+                                        chunks.append(chunk)
+                                        yield chunk
+                        break
+                    except Exception as e:
+                        # 이미 내보낸 텍스트가 있으면 다른 엔드포인트로 이어서 받을 수 없음
+                        if chunks or not is_failover_error(e):
+                            raise
+                        last_error = e
+                        span.add_event("llm.failover", {"llm.endpoint": base_url, "error": str(e)})
+                else:
+                    raise last_error
+
+            except Exception as e:
+                # 중간에 끊긴 스트림을 정상 응답으로 처리하지 않음 (턴에서 오류로 보고, 히스토리에 남지 않음)
+                span.record_exception(e)
+                self._record_llm_error(span, str(e))
+                raise
+
+            # 끝까지 받고 stop으로 끝난 응답만 캐시 후보 - 호출한 쪽이 미리 읽힌 청크를 조기 중단했을 수 있으므로
+            # 실제 저장은 commit_stream_cache()에서 함
+            completed = True
+            self.last_finish_reason = stream_info.get("finish_reason")
+            span.set_attribute("llm.finish_reason", self.last_finish_reason or "")
+            content = "".join(chunks).strip()
+            if content and self.last_finish_reason == "stop":
+                self._pending_stream_cache = (payload, content)
+
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            llm_duration_histogram.record(elapsed, {"llm.stream": True})
+            span.set_attribute("llm.total_ms", elapsed)
+            span.set_attribute("llm.completed", completed)
+            if "shared_prefix" in stream_info:
+                span.set_attribute("llm.shared_prefix_chars", stream_info["shared_prefix"])
+            if first_token is not None:
+                ttft = (first_token - start) * 1000
+                llm_ttft_histogram.record(ttft)
+                span.set_attribute("llm.ttft_ms", ttft)
+            span.end()
+
+    def _commit_stream_cache(self):
+        """조기 중단 없이 끝까지 소비한 스트리밍 응답을 캐시에 저장"""
+        if self._pending_stream_cache is not None:
+            self.completion_cache.put(*self._pending_stream_cache)
+            self._pending_stream_cache = None
+
+    def _start_tool(self, plan: ToolPlan, tool_call: ToolCall, tool_tasks: Dict[int, asyncio.Future],
+                    semaphore: asyncio.Semaphore, deadline: Deadline, trace_context=None):
+        """계획에 호출을 추가하고 실행 시작 - 참조하는 선행 호출이 있으면 그 결과를 기다린 뒤 실행"""
+        dependencies = {ref: tool_tasks[index] for ref, index in plan.add(tool_call).items()}
+        tool_tasks[len(plan.calls) - 1] = asyncio.ensure_future(
+            self._run_plan_step(tool_call, dependencies, semaphore, deadline, trace_context))
+
+    async def _run_plan_step(self, tool_call: ToolCall, dependencies: Dict[str, asyncio.Future],
+                             semaphore: asyncio.Semaphore, deadline: Deadline, trace_context=None) -> Any:
+        """다단계 계획의 호출 하나 - 선행 호출 결과로 인자의 참조를 치환한 뒤 실행"""
+        if dependencies:
+            if tool_call.error:
+                # 계획 오류(중복 id, 정의되지 않은 참조)는 선행 호출을 기다리지 않고 바로 실패
+                raise ValueError(f"도구 '{tool_call.name}' 호출 오류: {tool_call.error}")
+            results = {}
+            for ref, task in dependencies.items():
+                try:
+                    results[ref] = await task
+                except Exception as e:
+                    raise ValueError(f"선행 호출 '{ref}' 실패로 실행하지 않음: {e}")
+            tool_call = ToolPlan.resolve(tool_call, results)
+        return await self._run_tool(tool_call, semaphore, deadline, trace_context)
+
+    async def _run_tool(self, tool_call: ToolCall, semaphore: asyncio.Semaphore, deadline: Deadline,
+                        trace_context=None) -> Any:
+        """동시 실행 수 제한, 툴별 타임아웃, 턴 마감 시각을 적용한 툴 실행 (tool.execute span 기록)"""
+        queued = time.perf_counter()
+        async with semaphore:
+            attributes = {"tool.name": tool_call.name}
+            with tracer.start_span("tool.execute", context=trace_context, attributes=attributes) as span:
+                start = time.perf_counter()
+                span.set_attribute("tool.queue_ms", (start - queued) * 1000)
+                try:
+                    return await deadline.run(self._execute_tool(tool_call, deadline.token), timeout=self.tool_timeout)
+                except (DeadlineExceeded, TurnCancelled):
+                    tool_errors_counter.add(1, {**attributes, "error.type": "cancelled"})
+                    raise
+                except asyncio.TimeoutError:
+                    tool_errors_counter.add(1, {**attributes, "error.type": "timeout"})
+                    raise TimeoutError(f"도구 '{tool_call.name}' 실행 시간 초과 ({self.tool_timeout}초)")
+                except Exception:
+                    tool_errors_counter.add(1, {**attributes, "error.type": "error"})
+                    raise
+                finally:
+                    tool_duration_histogram.record((time.perf_counter() - start) * 1000, attributes)
+
+    async def _execute_tool(self, tool_call: ToolCall, cancellation_token: Optional[CancellationToken] = None) -> Any:
+        """툴 실행 (cancellation_token이 취소되면 MCP 호출도 취소)"""
+        if tool_call.name == FETCH_TOOL_NAME and tool_call.name not in self.tools:
+            # 압축된 툴 결과의 원문 조회 (내장 툴)
+            try:
+                return self.compactor.fetch(**tool_call.arguments)
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"도구 '{FETCH_TOOL_NAME}' 인자 오류: {e}")
 
-    async def _execute_tool(self, tool_call: ToolCall) -> Any:
-        """툴 실행"""
         if tool_call.name not in self.tools:
             raise ValueError(f"알 수 없는 도구: {tool_call.name}")
 
+        if tool_call.error:
+            # 잘못된 인자를 {}로 바꿔 실행하지 않고 모델에게 오류를 돌려줌
+            raise ValueError(f"도구 '{tool_call.name}' 인자 오류: {tool_call.error} (입력: {tool_call.raw_arguments})")
+
         tool = self.tools[tool_call.name]
 
         try:
@@ -162,6 +584,10 @@ class PromptBasedAgent:
                     result = await tool.call(tool_call.arguments)
                 else:
                     result = tool.call(tool_call.arguments)
+            elif hasattr(tool, 'run_json'):
+                # AutoGen BaseTool (MCP 툴 어댑터)
+                result = await tool.run_json(tool_call.arguments, cancellation_token or CancellationToken())
+                result = tool.return_value_as_string(result)
             else:
                 # 다른 형태의 툴 인터페이스 처리
                 result = await tool(tool_call.arguments)
@@ -171,6 +597,14 @@ class PromptBasedAgent:
         except Exception as e:
             raise Exception(f"도구 '{tool_call.name}' 실행 실패: {str(e)}")
 
+    def add_tools(self, tools: List[Any]):
+        """툴 추가 (백그라운드에서 늦게 연결된 MCP 서버) - 시스템 프롬프트도 갱신"""
+        for tool in tools:
+            self.tools[tool.name] = tool
+        self.system_message = ToolCallParser.create_system_prompt(list(self.tools.values()))
+        if self.tool_selection:
+            self.tool_selector = ToolSelector(list(self.tools.values()))
+
     def reset_conversation(self):
         """대화 히스토리 초기화"""
-        self.conversation_history = []
\ No newline at end of file
+        self.history.clear()
\ No newline at end of file
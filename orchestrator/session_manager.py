@@ -0,0 +1,212 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+from autogen_core import CancellationToken
+from orchestrator.config import SESSION_CONFIG
+from orchestrator.agent_builder import create_orchestrator_agent
+from orchestrator.llm_connector import get_llm_client
+from orchestrator.mcp_tool_loader import load_mcp_tools
+from orchestrator.prompt_agent import PromptBasedAgent
+from orchestrator.llm_transport import close_llm_transport
+from orchestrator.llm_router import close_llm_router
+from orchestrator.mcp_session_pool import close_mcp_session_pool
+from orchestrator.interaction_trace import close_interaction_trace
+from orchestrator.llm_scheduler import scheduling_context
+from orchestrator.deadline import Deadline
+
+
+class ChatSession:
+    """사용자 세션 하나의 에이전트 상태 (대화 히스토리는 에이전트가 보유)"""
+
+    def __init__(self, session_id: str, agent: Any):
+        self.session_id = session_id
+        self.agent = agent
+        self.lock = asyncio.Lock()  # 같은 세션의 턴은 순서대로 처리
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.turns = 0
+        self.in_use = 0  # 진행 중이거나 잠금을 기다리는 턴 수 (0보다 크면 정리하지 않음)
+        self.cancellation_token: Optional[CancellationToken] = None  # 진행 중인 턴의 취소 토큰
+
+    def cancel(self) -> bool:
+        """진행 중인 턴 취소 (LLM 요청/툴 호출 중단)"""
+        if self.cancellation_token is None:
+            return False
+        self.cancellation_token.cancel()
+        return True
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    @property
+    def busy(self) -> bool:
+        return self.in_use > 0 or self.lock.locked()
+
+    @property
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self.last_used
+
+
+class SessionManager:
+    """세션별 에이전트를 관리하는 멀티 세션 관리자
+
+    하나의 장수(long-lived) 이벤트 루프에서 동작하며, MCP 툴 목록/세션 풀과
+    LLM 커넥션 풀은 모든 세션이 공유하고 에이전트(대화 상태)만 세션별로 만든다.
+    유휴 시간이 지난 세션은 백그라운드에서 정리된다.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**SESSION_CONFIG, **(config or {})}
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._tools: Optional[List[Any]] = None
+        self._llm_client = None
+        self._init_lock: Optional[asyncio.Lock] = None
+        self._create_locks: Dict[str, asyncio.Lock] = {}
+        self._evict_task: Optional[asyncio.Task] = None
+        self.created = 0
+        self.evicted = 0
+
+    async def _ensure_shared(self):
+        """공유 툴 목록과 LLM 클라이언트를 한 번만 준비"""
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+        async with self._init_lock:
+            if self._tools is None:
+                self._llm_client = get_llm_client()
+                self._tools = await load_mcp_tools(on_late_tools=self._attach_late_tools)
+        self._ensure_evict_task()
+
+    def _attach_late_tools(self, new_tools: List[Any]):
+        """늦게 연결된 서버의 툴을 공유 목록과 기존 세션에 추가"""
+        if self._tools is None:
+            self._tools = []
+        self._tools.extend(new_tools)
+        for session in self._sessions.values():
+            if isinstance(session.agent, PromptBasedAgent):
+                session.agent.add_tools(new_tools)
+
+    async def get_session(self, session_id: str) -> ChatSession:
+        """세션 반환 (없으면 공유 자원으로 새 에이전트 생성)"""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+            return session
+
+        await self._ensure_shared()
+        lock = self._create_locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                agent = await create_orchestrator_agent(tools=list(self._tools), llm_client=self._llm_client)
+                session = ChatSession(session_id, agent)
+                self._sessions[session_id] = session
+                self.created += 1
+                self._evict_overflow(keep=session_id)
+        self._create_locks.pop(session_id, None)
+        return session
+
+    @asynccontextmanager
+    async def turn(self, session_id: str) -> AsyncIterator[ChatSession]:
+        """세션의 한 턴 - 같은 세션의 동시 요청은 직렬화하고 다른 세션은 병렬 처리
+
+        턴 동안의 LLM 요청은 이 세션 id와 설정된 우선순위 등급으로 스케줄링된다.
+        턴마다 session.cancellation_token을 새로 만들며 turn_timeout이 지나면 취소된다.
+        """
+        session = await self.get_session(session_id)
+        # 잠금을 기다리는 동안(다른 턴이 끝나고 잠금을 넘겨받기 전 포함) 정리되지 않도록 await 전에 사용 중으로 표시
+        session.in_use += 1
+        session.touch()
+        try:
+            async with session.lock:
+                deadline = Deadline(self.config["turn_timeout"])
+                session.cancellation_token = deadline.token
+                try:
+                    with scheduling_context(session_id, self.config["priority_class"]):
+                        yield session
+                finally:
+                    deadline.close()
+                    session.cancellation_token = None
+                    session.turns += 1
+        finally:
+            session.in_use -= 1
+            session.touch()
+
+    def close_session(self, session_id: str) -> bool:
+        """세션 삭제 (브라우저 종료 등)"""
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self.evicted += 1
+        return True
+
+    def _evict_overflow(self, keep: Optional[str] = None):
+        """최대 세션 수를 넘으면 가장 오래 사용하지 않은 유휴 세션부터 정리 (keep 세션은 제외)"""
+        for session_id in list(self._sessions):
+            if len(self._sessions) <= self.config["max_sessions"]:
+                break
+            if session_id != keep and not self._sessions[session_id].busy:
+                self.close_session(session_id)
+
+    def evict_idle(self) -> int:
+        """유휴 시간이 지난 세션 정리 (진행 중인 턴이 있는 세션은 제외)"""
+        idle_timeout = self.config["idle_timeout"]
+        expired = [
+            session_id for session_id, session in self._sessions.items()
+            if session.idle_seconds > idle_timeout and not session.busy
+        ]
+        for session_id in expired:
+            self.close_session(session_id)
+        return len(expired)
+
+    def _ensure_evict_task(self):
+        interval = self.config["eviction_interval"]
+        if not interval:
+            return
+        if self._evict_task is None or self._evict_task.done() \
+                or self._evict_task.get_loop() is not asyncio.get_running_loop():
+            self._evict_task = asyncio.create_task(self._evict_loop(interval), name="session-eviction")
+
+    async def _evict_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            count = self.evict_idle()
+            if count:
+                print(f"유휴 세션 {count}개 정리 (남은 세션 {len(self._sessions)}개)")
+
+    def stats(self) -> Dict[str, Any]:
+        """세션 통계"""
+        return {
+            "active": len(self._sessions),
+            "busy": sum(1 for session in self._sessions.values() if session.busy),
+            "created": self.created,
+            "evicted": self.evicted,
+            "tools": len(self._tools or []),
+        }
+
+    async def aclose(self):
+        """모든 세션과 공유 자원 정리 (애플리케이션 종료 시 호출)"""
+        if self._evict_task is not None and not self._evict_task.done():
+            self._evict_task.cancel()
+        self._evict_task = None
+        self._sessions.clear()
+        if self._llm_client is not None:
+            await self._llm_client.close()
+            self._llm_client = None
+        self._tools = None
+        await close_llm_router()
+        await close_llm_transport()
+        await close_mcp_session_pool()
+        await close_interaction_trace()
+
+
+_shared_manager: Optional[SessionManager] = None
+
+
+def get_session_manager() -> SessionManager:
+    """프로세스 전역 공유 세션 관리자 반환"""
+    global _shared_manager
+    if _shared_manager is None:
+        _shared_manager = SessionManager()
+    return _shared_manager
@@ -0,0 +1,137 @@
+import atexit
+from typing import Any, Dict, List, Optional
+from opentelemetry import metrics, trace
+from orchestrator.config import TELEMETRY_CONFIG
+
+INSTRUMENTATION_NAME = "autogen-agent3.orchestrator"
+
+# API의 프록시 tracer/meter를 사용하므로 configure_telemetry() 호출 전에 만든 계측도
+# SDK 프로바이더가 설정되면 그대로 기록되고, 설정하지 않으면 아무 비용 없이 무시된다.
+tracer = trace.get_tracer(INSTRUMENTATION_NAME)
+_meter = metrics.get_meter(INSTRUMENTATION_NAME)
+
+prompt_tokens_counter = _meter.create_counter(
+    "llm.tokens.prompt", unit="{token}", description="LLM 요청 프롬프트 토큰 수")
+completion_tokens_counter = _meter.create_counter(
+    "llm.tokens.completion", unit="{token}", description="LLM 응답 토큰 수")
+llm_duration_histogram = _meter.create_histogram(
+    "llm.request.duration", unit="ms", description="LLM 요청 전체 시간")
+llm_ttft_histogram = _meter.create_histogram(
+    "llm.request.ttft", unit="ms", description="LLM 첫 토큰까지 시간 (스트리밍)")
+llm_errors_counter = _meter.create_counter(
+    "llm.request.errors", unit="{error}", description="LLM 요청 오류 수")
+llm_queue_wait_histogram = _meter.create_histogram(
+    "llm.queue.wait", unit="ms", description="LLM 스케줄러 대기열에서 기다린 시간")
+llm_shared_prefix_histogram = _meter.create_histogram(
+    "llm.prompt.shared_prefix", unit="{char}", description="직전 요청과 공유하는 프롬프트 접두사 길이 (KV 캐시 재사용)")
+tool_duration_histogram = _meter.create_histogram(
+    "tool.duration", unit="ms", description="툴 실행 시간 (동시 실행 대기 제외)")
+tool_errors_counter = _meter.create_counter(
+    "tool.errors", unit="{error}", description="툴 실행 오류/시간 초과 수")
+tool_result_compactions_counter = _meter.create_counter(
+    "tool.result.compactions", unit="{result}", description="한도를 넘어 압축된 툴 결과 수")
+tool_result_bytes_saved_counter = _meter.create_counter(
+    "tool.result.bytes_saved", unit="By", description="압축으로 프롬프트에서 제외한 툴 결과 바이트 수")
+tool_cache_lookups_counter = _meter.create_counter(
+    "tool.cache.lookups", unit="{call}", description="툴 결과 캐시 조회 수 (tool.cache.result: hit/miss/coalesced)")
+tool_selection_turns_counter = _meter.create_counter(
+    "tool_selection.turns", unit="{turn}", description="툴 선택 턴 수 (tool_selection.result: selected/fallback)")
+tool_selection_tokens_saved_counter = _meter.create_counter(
+    "tool_selection.prompt_tokens_saved", unit="{token}", description="툴 선택으로 시스템 프롬프트에서 줄인 토큰 수")
+turn_duration_histogram = _meter.create_histogram(
+    "agent.turn.duration", unit="ms", description="에이전트 한 턴 전체 시간")
+
+_state: Dict[str, Any] = {"configured": False, "shut_down": False, "span_exporter": None, "metric_reader": None}
+
+
+def configure_telemetry(exporter: Optional[str] = None, service_name: Optional[str] = None) -> bool:
+    """OpenTelemetry SDK 프로바이더 설정 (opentelemetry-sdk가 없으면 계측은 no-op으로 유지)
+
+    Args:
+        exporter: "console"(표준 출력) 또는 "memory"(메모리, 테스트/벤치마크용), 생략 시 TELEMETRY_CONFIG
+        service_name: 리소스 service.name
+    Returns:
+        SDK 설정 여부
+    """
+    if _state["configured"]:
+        return True
+    exporter = exporter or TELEMETRY_CONFIG["exporter"]
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import (
+            SimpleSpanProcessor, BatchSpanProcessor, ConsoleSpanExporter,
+        )
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+        from opentelemetry.sdk.metrics import MeterProvider
+        from opentelemetry.sdk.metrics.export import (
+            ConsoleMetricExporter, InMemoryMetricReader, PeriodicExportingMetricReader,
+        )
+    except ImportError:
+        print("opentelemetry-sdk가 설치되지 않아 트레이싱/메트릭을 기록하지 않습니다 (pip install opentelemetry-sdk)")
+        return False
+
+    resource = Resource.create({"service.name": service_name or TELEMETRY_CONFIG["service_name"]})
+    tracer_provider = TracerProvider(resource=resource)
+    if exporter == "memory":
+        span_exporter = InMemorySpanExporter()
+        tracer_provider.add_span_processor(SimpleSpanProcessor(span_exporter))
+        metric_reader = InMemoryMetricReader()
+    elif exporter == "console":
+        span_exporter = ConsoleSpanExporter()
+        tracer_provider.add_span_processor(BatchSpanProcessor(span_exporter))
+        metric_reader = PeriodicExportingMetricReader(
+            ConsoleMetricExporter(), export_interval_millis=TELEMETRY_CONFIG["metric_export_interval_ms"])
+    else:
+        raise ValueError(f"지원하지 않는 exporter: {exporter}")
+
+    trace.set_tracer_provider(tracer_provider)
+    metrics.set_meter_provider(MeterProvider(resource=resource, metric_readers=[metric_reader]))
+    _state.update(configured=True, span_exporter=span_exporter, metric_reader=metric_reader)
+    return True
+
+
+def init_telemetry() -> bool:
+    """진입점(CLI, 배치, Gradio, Streamlit) 공통 시작 처리 - TELEMETRY_CONFIG["enabled"]면 SDK를 설정
+
+    여러 번 호출해도 한 번만 설정하며, 프로세스 종료 시 남은 span/메트릭을 내보낸다.
+    """
+    if not TELEMETRY_CONFIG["enabled"]:
+        return False
+    if _state["configured"]:
+        return True
+    if not configure_telemetry():
+        return False
+    atexit.register(shutdown_telemetry)
+    return True
+
+
+def get_finished_spans():
+    """메모리 exporter에 기록된 span 목록 (memory exporter가 아니면 빈 목록)"""
+    exporter = _state["span_exporter"]
+    return list(exporter.get_finished_spans()) if hasattr(exporter, "get_finished_spans") else []
+
+
+def get_metrics_data():
+    """메모리 reader의 현재 메트릭 (memory exporter가 아니면 None)"""
+    reader = _state["metric_reader"]
+    return reader.get_metrics_data() if hasattr(reader, "get_metrics_data") else None
+
+
+def shutdown_telemetry():
+    """남은 span/메트릭을 내보내고 프로바이더 종료"""
+    if not _state["configured"] or _state["shut_down"]:
+        return
+    _state["shut_down"] = True
+    for provider in (trace.get_tracer_provider(), metrics.get_meter_provider()):
+        if hasattr(provider, "shutdown"):
+            provider.shutdown()
+
+
+def percentile(values: List[float], p: float) -> float:
+    """선형 보간 백분위 (values는 비어 있지 않아야 함)"""
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
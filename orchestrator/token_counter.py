@@ -0,0 +1,25 @@
+from functools import lru_cache
+from typing import Optional
+from orchestrator.config import HISTORY_CONFIG
+
+
+@lru_cache(maxsize=1)
+def _get_encoding(name: str):
+    """tiktoken 인코딩 로드 (BPE 파일을 받을 수 없는 오프라인 환경이면 None)"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        print(f"tiktoken 인코딩 '{name}' 로드 실패, 근사 토큰 수 사용: {e}")
+        return None
+
+
+def count_tokens(text: str, encoding_name: Optional[str] = None) -> int:
+    """텍스트의 토큰 수 (tiktoken 미사용 시 문자 수 기반 근사치)"""
+    if not text:
+        return 0
+    encoding = _get_encoding(encoding_name or HISTORY_CONFIG["tokenizer"])
+    if encoding is None:
+        # 한국어/영어 혼합 텍스트에서 대략 3자당 1토큰
+        return len(text) // 3 + 1
+    return len(encoding.encode(text, disallowed_special=()))
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from orchestrator.config import TOOL_RESULT_CACHE_CONFIG
+from orchestrator.telemetry import tool_cache_lookups_counter
+
+
+class ToolResultCache:
+    """툴 실행 결과 캐시 (크기 제한 LRU + 툴별 TTL + 동일 호출 single-flight)
+
+    TTL이 설정되지 않은 툴(비멱등 툴 포함)은 캐시하지 않고 항상 실행한다.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**TOOL_RESULT_CACHE_CONFIG, **(config or {})}
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str, str], asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def ttl_for(self, tool_name: str) -> Optional[float]:
+        """툴별 TTL(초) - None 또는 0이면 캐시하지 않음"""
+        if not self.config["enabled"]:
+            return None
+        return self.config["tool_ttls"].get(tool_name, self.config["default_ttl"])
+
+    @staticmethod
+    def make_key(tool_name: str, arguments: Dict[str, Any], namespace: str = "") -> Tuple[str, str, str]:
+        """(서버, 툴, 정규화된 인자) 캐시 키"""
+        args_key = json.dumps(arguments, sort_keys=True, ensure_ascii=False, default=str)
+        return namespace, tool_name, args_key
+
+    def _get(self, key) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _put(self, key, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.config["max_entries"]:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_call(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        call: Callable[[], Awaitable[Any]],
+        namespace: str = "",
+    ) -> Any:
+        """캐시된 결과 반환, 없으면 실행 - 실행 중인 동일 호출이 있으면 그 결과를 함께 기다림"""
+        ttl = self.ttl_for(tool_name)
+        if not ttl:
+            return await call()
+
+        key = self.make_key(tool_name, arguments, namespace)
+        found, value = self._get(key)
+        if found:
+            self.hits += 1
+            self._record(tool_name, "hit")
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+            self._record(tool_name, "coalesced")
+            return await asyncio.shield(task)
+
+        self.misses += 1
+        self._record(tool_name, "miss")
+        task = asyncio.ensure_future(call())
+        self._inflight[key] = task
+
+        def store(done: asyncio.Task):
+            if self._inflight.get(key) is done:
+                del self._inflight[key]
+            # 오류/취소된 결과는 캐시하지 않음
+            if not done.cancelled() and done.exception() is None:
+                self._put(key, done.result(), ttl)
+
+        task.add_done_callback(store)
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _record(tool_name: str, result: str):
+        tool_cache_lookups_counter.add(1, {"tool.name": tool_name, "tool.cache.result": result})
+
+    def invalidate(self, tool_name: Optional[str] = None):
+        """특정 툴(또는 전체) 캐시 삭제"""
+        if tool_name is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[1] == tool_name]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """hit/miss 통계"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+_shared_cache: Optional[ToolResultCache] = None
+
+
+def get_tool_result_cache() -> ToolResultCache:
+    """프로세스 전역 공유 툴 결과 캐시 반환"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ToolResultCache()
+    return _shared_cache
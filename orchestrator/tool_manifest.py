@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict, List, Optional
+from mcp.types import Tool
+from orchestrator.config import TOOL_MANIFEST_CONFIG
+
+MANIFEST_VERSION = 1
+
+
+def _file_fingerprint(path: str) -> Optional[List[Any]]:
+    """파일 경로의 (경로, 크기, 수정 시각) - 없으면 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+def server_fingerprint(conf: Dict[str, Any]) -> str:
+    """서버 설정 + 실행 파일(및 스크립트 인자) 상태의 해시
+
+    stdio 서버는 실행 파일이나 스크립트가 바뀌면 키가 달라져 캐시가 무효화된다.
+    """
+    parts: Dict[str, Any] = {"config": conf}
+    if conf["type"] == "stdio":
+        executable = shutil.which(conf["command"]) or conf["command"]
+        parts["executable"] = _file_fingerprint(executable)
+        parts["files"] = [fp for fp in (_file_fingerprint(arg) for arg in conf.get("args", [])
+                                        if os.path.isfile(arg)) if fp]
+
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ToolManifest:
+    """MCP 서버별 툴 목록(이름, 설명, input_schema)의 디스크 캐시"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = os.path.expanduser(path or TOOL_MANIFEST_CONFIG["path"])
+        self._data: Optional[Dict[str, Any]] = None
+
+    def _read(self) -> Dict[str, Any]:
+        if self._data is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") != MANIFEST_VERSION:
+                    data = None
+            except (OSError, ValueError):
+                data = None
+            self._data = data or {"version": MANIFEST_VERSION, "servers": {}}
+        return self._data
+
+    def _write(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _serialize(tools: List[Tool]) -> List[Dict[str, Any]]:
+        return [tool.model_dump(mode="json", by_alias=True, exclude_none=True) for tool in tools]
+
+    def load(self, conf: Dict[str, Any]) -> Optional[List[Tool]]:
+        """캐시된 툴 목록 (없거나 서버가 바뀌었으면 None)"""
+        entry = self._read()["servers"].get(server_fingerprint(conf))
+        if entry is None:
+            return None
+        try:
+            return [Tool.model_validate(tool) for tool in entry["tools"]]
+        except Exception:
+            return None
+
+    def save(self, conf: Dict[str, Any], tools: List[Tool]):
+        """서버의 툴 목록 저장"""
+        data = self._read()
+        data["servers"][server_fingerprint(conf)] = {
+            "server": conf.get("name") or conf.get("url") or conf.get("command"),
+            "saved_at": time.time(),
+            "tools": self._serialize(tools),
+        }
+        try:
+            self._write()
+        except OSError as e:
+            print(f"툴 매니페스트 저장 실패: {e}")
+
+    def matches(self, conf: Dict[str, Any], tools: List[Tool]) -> bool:
+        """캐시된 목록이 서버가 실제로 알려준 목록과 같은지 확인"""
+        entry = self._read()["servers"].get(server_fingerprint(conf))
+        return entry is not None and entry["tools"] == self._serialize(tools)
+
+
+_shared_manifest: Optional[ToolManifest] = None
+
+
+def get_tool_manifest() -> Optional[ToolManifest]:
+    """공유 매니페스트 캐시 (비활성화되어 있으면 None)"""
+    global _shared_manifest
+    if not TOOL_MANIFEST_CONFIG["enabled"]:
+        return None
+    if _shared_manifest is None:
+        _shared_manifest = ToolManifest()
+    return _shared_manifest
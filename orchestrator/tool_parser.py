@@ -1,66 +1,350 @@
 import re
 import json
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass, field, replace
+
+# 다단계 계획에서 앞선 호출 결과 참조: {{id}} 또는 {{id.필드.0}}
+REFERENCE_PATTERN = re.compile(r"\{\{\s*([A-Za-z_][\w-]*)((?:\.[\w-]+)*)\s*\}\}")
+
+# create_system_prompt 메모이즈 (툴 구성 -> 프롬프트 문자열)
+_SYSTEM_PROMPT_CACHE: Dict[tuple, str] = {}
+_SYSTEM_PROMPT_CACHE_SIZE = 128
+
 
 @dataclass
 class ToolCall:
     """툴 호출 정보를 담는 데이터클래스"""
     name: str
     arguments: Dict[str, Any]
+    raw_arguments: str = ""
+    error: Optional[str] = None  # 인자 파싱 실패 시 오류 메시지
+    id: Optional[str] = None     # 다단계 계획에서 다른 호출이 결과를 참조할 때 쓰는 이름
+    references: List[str] = field(default_factory=list)  # 인자에서 참조하는 호출 id (등장 순서)
 
-class ToolCallParser:
-    """LLM 응답에서 툴 호출을 파싱하고 포맷팅하는 클래스"""
+
+class ToolPlan:
+    """한 응답에 담긴 툴 호출들의 의존성 DAG
+
+    호출은 <id>로 이름을 붙이고, 뒤의 호출은 인자에서 {{id}} / {{id.필드}}로 앞선 호출의
+    결과를 참조한다. 앞에 나온 호출만 참조할 수 있으므로 순환이 생기지 않으며, 스트리밍 중에도
+    호출이 완료되는 대로 add()하여 선행 호출이 없는 호출은 바로 실행할 수 있다.
+    """
+
+    def __init__(self):
+        self.calls: List[ToolCall] = []
+        self._index_by_id: Dict[str, int] = {}
+
+    def add(self, tool_call: ToolCall) -> Dict[str, int]:
+        """호출 추가 후 {참조 id: 선행 호출 인덱스} 반환 (잘못된 id/참조는 tool_call.error로 표시)"""
+        index = len(self.calls)
+        self.calls.append(tool_call)
+        if tool_call.id is not None:
+            if tool_call.id in self._index_by_id:
+                tool_call.error = tool_call.error or f"중복된 호출 id: {tool_call.id}"
+            else:
+                self._index_by_id[tool_call.id] = index
+
+        dependencies = {}
+        for ref in tool_call.references:
+            if ref in self._index_by_id and self._index_by_id[ref] != index:
+                dependencies[ref] = self._index_by_id[ref]
+            else:
+                tool_call.error = tool_call.error or f"앞에서 정의되지 않은 호출 참조: {{{{{ref}}}}}"
+        return dependencies
 
     @staticmethod
-    def parse_tool_calls(response: str) -> List[ToolCall]:
-        """응답에서 툴 호출을 추출"""
+    def result_value(result: Any) -> Any:
+        """참조에 쓸 결과 값 - JSON 문자열이면 파싱한 값
+
+        MCP 툴 결과의 텍스트 콘텐츠 하나짜리 목록([{"type": "text", "text": ...}])은
+        안의 텍스트(JSON이면 파싱한 값)를 사용한다.
+        """
+        if isinstance(result, str):
+            try:
+                result = json.loads(result)
+            except (json.JSONDecodeError, ValueError):
+                return result
+        if isinstance(result, list) and len(result) == 1 and isinstance(result[0], dict) \
+                and result[0].get("type") == "text" and isinstance(result[0].get("text"), str):
+            return ToolPlan.result_value(result[0]["text"])
+        return result
+
+    @staticmethod
+    def _lookup(value: Any, path: str, placeholder: str) -> Any:
+        for key in filter(None, path.split(".")):
+            if isinstance(value, dict) and key in value:
+                value = value[key]
+            elif isinstance(value, list) and key.lstrip("-").isdigit() and -len(value) <= int(key) < len(value):
+                value = value[int(key)]
+            else:
+                raise ValueError(f"참조 {placeholder}를 해석할 수 없습니다 ('{key}' 없음)")
+        return value
+
+    @staticmethod
+    def resolve(tool_call: ToolCall, results: Dict[str, Any]) -> ToolCall:
+        """인자의 참조를 선행 호출 결과로 치환한 호출 반환
+
+        문자열 값 전체가 참조 하나이면 결과 값(객체/숫자 포함)으로 바꾸고,
+        문자열 일부이면 텍스트로 끼워 넣는다.
+        """
+        if tool_call.error:
+            # 중복 id나 정의되지 않은 참조가 있는 호출은 실행하지 않음
+            raise ValueError(f"도구 '{tool_call.name}' 호출 오류: {tool_call.error}")
+        values = {ref: ToolPlan.result_value(result) for ref, result in results.items()}
+
+        def value_of(ref: str) -> Any:
+            if ref not in values:
+                raise ValueError(f"앞에서 정의되지 않은 호출 참조: {{{{{ref}}}}}")
+            return values[ref]
+
+        def substitute(value: Any) -> Any:
+            if isinstance(value, dict):
+                return {key: substitute(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [substitute(item) for item in value]
+            if not isinstance(value, str):
+                return value
+            whole = REFERENCE_PATTERN.fullmatch(value.strip())
+            if whole:
+                return ToolPlan._lookup(value_of(whole.group(1)), whole.group(2), whole.group(0))
+
+            def inline(match: "re.Match[str]") -> str:
+                found = ToolPlan._lookup(value_of(match.group(1)), match.group(2), match.group(0))
+                return found if isinstance(found, str) else json.dumps(found, ensure_ascii=False)
+            return REFERENCE_PATTERN.sub(inline, value)
+
+        arguments = substitute(tool_call.arguments)
+        return replace(tool_call, arguments=arguments, raw_arguments=json.dumps(arguments, ensure_ascii=False),
+                       references=list(tool_call.references))
+
+
+class IncrementalToolCallParser:
+    """청크 단위로 입력받는 한 번 순회(one-pass) 상태 기계 파서
+
+    스트리밍 응답을 feed()로 흘려보내면 완료된 ToolCall과 사용자에게 보일
+    텍스트(<tool_call>/<tool_result> 블록 제외)를 즉시 반환한다.
+    각 문자는 한 번만 검사되므로 전체 응답에 대해 O(n)이다.
+    """
+
+    CALL_OPEN = "<tool_call>"
+    CALL_CLOSE = "</tool_call>"
+    RESULT_OPEN = "<tool_result"
+    RESULT_CLOSE = "</tool_result>"
+    TAG_PREFIX = "<tool_"
+
+    _TEXT = 0
+    _CALL = 1
+    _RESULT_HEAD = 2
+    _RESULT = 3
+
+    def __init__(self):
+        self._state = self._TEXT
+        self._pending = ""   # 태그 경계에 걸쳐 아직 판정하지 못한 꼬리 (최대 태그 길이)
+        self._block = []     # 현재 블록의 원문 (닫히지 않으면 텍스트로 되돌림)
+
+    @property
+    def in_tool_result(self) -> bool:
+        """모델이 <tool_result> 블록을 직접 쓰기 시작했는지 (툴 결과를 지어내는 중)"""
+        return self._state in (self._RESULT_HEAD, self._RESULT)
+
+    def feed(self, chunk: str) -> Tuple[str, List[ToolCall]]:
+        """청크를 처리하고 (사용자에게 보일 텍스트, 완료된 툴 호출 목록) 반환"""
+        data = self._pending + chunk
+        visible = []
         tool_calls = []
+        pos = 0
 
-        # XML 스타일 툴 호출 패턴 매칭
-        pattern = r'<tool_call>\s*<name>(.*?)</name>\s*<arguments>(.*?)</arguments>\s*</tool_call>'
-        matches = re.findall(pattern, response, re.DOTALL)
+        while pos < len(data):
+            if self._state == self._TEXT:
+                idx = data.find(self.TAG_PREFIX, pos)
+                if idx == -1:
+                    # 다음 청크와 합쳐 여는 태그가 될 수 있는 꼬리는 보류
+                    hold = self._partial_tag_start(data, pos)
+                    visible.append(data[pos:hold])
+                    pos = hold
+                    break
+                visible.append(data[pos:idx])
+                pos = idx
 
-        for name, args_str in matches:
-            try:
-                name = name.strip()
-                args_str = args_str.strip()
+                if data.startswith(self.CALL_OPEN, pos):
+                    self._state = self._CALL
+                    self._block = [self.CALL_OPEN]
+                    pos += len(self.CALL_OPEN)
+                elif data.startswith(self.RESULT_OPEN, pos):
+                    self._state = self._RESULT_HEAD
+                    self._block = [self.RESULT_OPEN]
+                    pos += len(self.RESULT_OPEN)
+                elif self._partial_tag_start(data, pos) == pos:
+                    break
+                else:
+                    visible.append(self.TAG_PREFIX)
+                    pos += len(self.TAG_PREFIX)
 
-                # JSON 파싱 시도
-                try:
-                    arguments = json.loads(args_str)
-                except json.JSONDecodeError:
-                    # JSON이 아닌 경우 빈 딕셔너리로 처리
-                    arguments = {}
+            elif self._state == self._RESULT_HEAD:
+                gt = data.find(">", pos)
+                if gt == -1:
+                    self._block.append(data[pos:])
+                    pos = len(data)
+                    break
+                self._block.append(data[pos:gt + 1])
+                pos = gt + 1
+                self._state = self._RESULT
 
-                tool_calls.append(ToolCall(name=name, arguments=arguments))
-            except Exception as e:
-                print(f"툴 호출 파싱 오류: {e}")
-                continue
+            else:
+                close_tag = self.CALL_CLOSE if self._state == self._CALL else self.RESULT_CLOSE
+                idx = data.find(close_tag, pos)
+                if idx == -1:
+                    # 닫는 태그가 청크 경계에 걸칠 수 있으므로 꼬리는 남겨 둠
+                    keep = max(pos, len(data) - (len(close_tag) - 1))
+                    self._block.append(data[pos:keep])
+                    pos = keep
+                    break
+
+                self._block.append(data[pos:idx])
+                if self._state == self._CALL:
+                    tool_call = self._build_tool_call("".join(self._block)[len(self.CALL_OPEN):])
+                    if tool_call is not None:
+                        tool_calls.append(tool_call)
+                self._block = []
+                self._state = self._TEXT
+                pos = idx + len(close_tag)
+
+        self._pending = data[pos:]
+        return "".join(visible), tool_calls
+
+    def _partial_tag_start(self, data: str, pos: int) -> int:
+        """data 끝부분이 여는 태그의 앞부분이면 그 시작 위치, 아니면 len(data)"""
+        lt = data.rfind("<", max(pos, len(data) - len(self.RESULT_OPEN) + 1))
+        if lt != -1:
+            tail = data[lt:]
+            if self.CALL_OPEN.startswith(tail) or self.RESULT_OPEN.startswith(tail):
+                return lt
+        return len(data)
+
+    def close(self) -> Tuple[str, List[ToolCall]]:
+        """스트림 종료 - 닫히지 않은 블록은 일반 텍스트로 반환"""
+        remaining = "".join(self._block) + self._pending
+        self._state = self._TEXT
+        self._pending = ""
+        self._block = []
+        return remaining, []
+
+    @staticmethod
+    def _build_tool_call(body: str) -> Optional[ToolCall]:
+        """<tool_call> 블록 내부에서 ToolCall 생성 (형식이 맞지 않으면 None)"""
+        # 닫히지 않은 <tool_call> 뒤에 온 호출은 마지막 여는 태그부터 해석
+        last_open = body.rfind(IncrementalToolCallParser.CALL_OPEN)
+        if last_open != -1:
+            body = body[last_open + len(IncrementalToolCallParser.CALL_OPEN):]
+
+        # <id>는 <name> 앞이나 뒤에 올 수 있음 (다단계 계획용, 생략 가능)
+        call_id, body = IncrementalToolCallParser._take_tag(body.strip(), "id")
+        name, rest = IncrementalToolCallParser._take_tag(body, "name")
+        if name is None:
+            return None
+        if call_id is None:
+            call_id, rest = IncrementalToolCallParser._take_tag(rest, "id")
+        if not rest.startswith("<arguments>") or not rest.endswith("</arguments>"):
+            return None
+
+        args_str = rest[len("<arguments>"):-len("</arguments>")].strip()
+        if not args_str:
+            return ToolCall(name=name, arguments={}, raw_arguments=args_str, id=call_id)
+
+        try:
+            arguments = json.loads(args_str)
+        except json.JSONDecodeError as e:
+            return ToolCall(name=name, arguments={}, raw_arguments=args_str, error=f"JSON 파싱 실패: {e}", id=call_id)
+
+        if not isinstance(arguments, dict):
+            return ToolCall(name=name, arguments={}, raw_arguments=args_str,
+                            error="arguments는 JSON 객체여야 합니다", id=call_id)
+
+        references = list(dict.fromkeys(match.group(1) for match in REFERENCE_PATTERN.finditer(args_str)))
+        return ToolCall(name=name, arguments=arguments, raw_arguments=args_str, id=call_id, references=references)
+
+    @staticmethod
+    def _take_tag(text: str, tag: str) -> Tuple[Optional[str], str]:
+        """text가 <tag>값</tag>로 시작하면 (값, 나머지), 아니면 (None, text)"""
+        open_tag, close_tag = f"<{tag}>", f"</{tag}>"
+        if not text.startswith(open_tag):
+            return None, text
+        end = text.find(close_tag)
+        if end == -1:
+            return None, text
+        return text[len(open_tag):end].strip() or None, text[end + len(close_tag):].lstrip()
+
+class ToolCallParser:
+    """LLM 응답에서 툴 호출을 파싱하고 포맷팅하는 클래스"""
+
+    @staticmethod
+    def parse(response: str) -> Tuple[str, List[ToolCall]]:
+        """응답을 한 번 순회하여 (툴 호출을 제거한 텍스트, 툴 호출 목록) 반환"""
+        parser = IncrementalToolCallParser()
+        text, tool_calls = parser.feed(response)
+        tail, _ = parser.close()
+        return text + tail, tool_calls
 
+    @staticmethod
+    def parse_tool_calls(response: str) -> List[ToolCall]:
+        """응답에서 툴 호출을 추출"""
+        _, tool_calls = ToolCallParser.parse(response)
         return tool_calls
 
     @staticmethod
-    def format_tool_result(tool_name: str, result: Any) -> str:
-        """툴 실행 결과를 포맷팅"""
-        return f"\n<tool_result name='{tool_name}'>\n{str(result)}\n</tool_result>\n"
+    def format_tool_result(tool_name: str, result: Any, call_id: Optional[str] = None) -> str:
+        """툴 실행 결과를 포맷팅 (다단계 계획의 호출은 id 포함)"""
+        id_attr = f" id='{call_id}'" if call_id else ""
+        return f"\n<tool_result name='{tool_name}'{id_attr}>\n{str(result)}\n</tool_result>\n"
+
+    @staticmethod
+    def tool_input_schema(tool: Any) -> Optional[Dict[str, Any]]:
+        """툴 입력 스키마 (input_schema 속성 또는 AutoGen BaseTool.schema의 parameters)"""
+        schema = getattr(tool, 'input_schema', None)
+        if schema:
+            return schema
+        base_schema = getattr(tool, 'schema', None)
+        if isinstance(base_schema, dict):
+            return base_schema.get('parameters')
+        return None
 
     @staticmethod
     def create_system_prompt(tools: List[Any]) -> str:
-        """사용 가능한 툴들의 시스템 프롬프트 생성"""
+        """사용 가능한 툴들의 시스템 프롬프트 생성
+
+        백엔드 프롬프트 캐시(KV 캐시) 재사용을 위해 툴은 이름순으로 정렬하고,
+        같은 툴 구성에는 메모이즈된 동일한 문자열을 반환한다.
+        """
         if not tools:
             return (
                 "당신은 오케스트레이터 AI입니다. 사용자 질문을 분석하고 "
                 "직접 답변하세요. 답변은 항상 질문과 동일한 언어로 하십시오."
             )
 
+        specs = tuple(sorted(
+            (
+                tool.name,
+                tool.description if hasattr(tool, 'description') else '도구 설명 없음',
+                json.dumps(ToolCallParser.tool_input_schema(tool), sort_keys=True, ensure_ascii=False),
+            )
+            for tool in tools
+        ))
+        prompt = _SYSTEM_PROMPT_CACHE.get(specs)
+        if prompt is None:
+            if len(_SYSTEM_PROMPT_CACHE) >= _SYSTEM_PROMPT_CACHE_SIZE:
+                _SYSTEM_PROMPT_CACHE.clear()
+            prompt = _SYSTEM_PROMPT_CACHE[specs] = ToolCallParser._render_system_prompt(specs)
+        return prompt
+
+    @staticmethod
+    def _render_system_prompt(specs) -> str:
         tool_descriptions = []
-        for tool in tools:
-            desc = f"- {tool.name}: {tool.description if hasattr(tool, 'description') else '도구 설명 없음'}"
+        for name, description, schema_json in specs:
+            desc = f"- {name}: {description}"
 
             # 입력 스키마가 있으면 추가
-            if hasattr(tool, 'input_schema') and tool.input_schema:
-                schema = tool.input_schema
+            schema = json.loads(schema_json)
+            if schema:
                 if isinstance(schema, dict) and 'properties' in schema:
                     if schema['properties']:  # 매개변수가 있는 경우
                         params = []
@@ -80,11 +364,9 @@ class ToolCallParser:
 
         tools_text = "\n".join(tool_descriptions)
 
+        # 고정 안내문을 앞에, 툴 구성에 따라 달라지는 목록을 맨 뒤에 두어 공통 접두사를 최대화
         return f"""당신은 오케스트레이터 AI입니다. 사용자 질문을 분석하고 필요시 도구를 사용하거나 직접 답변하세요.
 
-사용 가능한 도구:
-{tools_text}
-
 도구 호출 형식:
 <tool_call>
 <name>도구명</name>
@@ -95,25 +377,37 @@ class ToolCallParser:
 - CPU 사용률 확인: <tool_call><name>cpu_usage</name><arguments>{{}}</arguments></tool_call>
 - 메모리 사용률 확인: <tool_call><name>memory_usage</name><arguments>{{}}</arguments></tool_call>
 
+여러 단계 계획 (한 번의 응답으로 결과가 서로 이어지는 도구들을 호출):
+<tool_call><id>disk</id><name>disk_usage</name><arguments>{{"path": "/"}}</arguments></tool_call>
+<tool_call><name>send_alert</name><arguments>{{"message": "디스크 사용률 {{{{disk.percent}}}}%"}}</arguments></tool_call>
+- <id>로 이름을 붙인 호출의 결과는 뒤 호출의 arguments에서 {{{{id}}}} 또는 {{{{id.필드}}}}로 참조합니다
+- 서로 의존하지 않는 호출은 동시에 실행되고, 모든 결과는 한 번에 전달됩니다
+
 규칙:
 1. 사용자가 시스템 정보를 요청하면 적절한 도구를 사용하세요
 2. 매개변수가 없는 도구는 arguments를 빈 객체 {{}}로 설정하세요
+   여러 도구가 필요하면 한 응답에 모두 호출하고, 앞선 결과가 필요한 호출은 참조로 연결하세요
 3. 도구 호출 후 결과를 바탕으로 사용자 친화적인 답변을 제공하세요
 4. 답변은 항상 질문과 동일한 언어로 하십시오
-5. 도구 호출이 불필요한 경우 직접 답변하세요"""
+5. 도구 호출이 불필요한 경우 직접 답변하세요
+
+사용 가능한 도구:
+{tools_text}"""
+
+    @staticmethod
+    def truncate_after_tool_calls(response: str) -> str:
+        """마지막으로 완료된 </tool_call> 뒤의 내용(지어낸 툴 결과, 이어지는 텍스트) 제거"""
+        end = response.rfind(IncrementalToolCallParser.CALL_CLOSE)
+        if end == -1:
+            return response
+        return response[:end + len(IncrementalToolCallParser.CALL_CLOSE)]
 
     @staticmethod
     def remove_tool_calls_from_response(response: str) -> str:
         """응답에서 툴 호출 부분을 제거하고 순수 텍스트만 반환"""
-        # 툴 호출 패턴 제거
-        pattern = r'<tool_call>.*?</tool_call>'
-        cleaned = re.sub(pattern, '', response, flags=re.DOTALL)
-
-        # 툴 결과 패턴 제거
-        pattern = r'<tool_result.*?>.*?</tool_result>'
-        cleaned = re.sub(pattern, '', cleaned, flags=re.DOTALL)
+        cleaned, _ = ToolCallParser.parse(response)
 
         # 여러 개의 연속된 공백/줄바꿈을 정리
         cleaned = re.sub(r'\n\s*\n', '\n\n', cleaned)
 
-        return cleaned.strip()
\ No newline at end of file
+        return cleaned.strip()
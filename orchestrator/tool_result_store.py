@@ -0,0 +1,186 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from orchestrator.config import TOOL_RESULT_COMPACTION_CONFIG
+from orchestrator.token_counter import count_tokens
+from orchestrator.telemetry import tool_result_compactions_counter, tool_result_bytes_saved_counter
+
+# 압축된 결과의 전체 내용을 조회하는 내장 툴 (PromptBasedAgent가 직접 처리)
+FETCH_TOOL_NAME = "fetch_tool_result"
+
+
+class ToolResultStore:
+    """프롬프트에서 잘린 툴 결과 원문 보관소 (항목 수/전체 크기 제한 LRU)
+
+    핸들은 툴 이름과 원문의 해시이므로 같은 결과는 같은 핸들이 되어 압축된 프롬프트가 실행마다 같다.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+
+    def put(self, tool_name: str, content: str) -> str:
+        """원문 저장 후 조회 핸들 반환 (이미 있는 원문이면 기존 핸들)"""
+        handle = "res_" + hashlib.sha256(f"{tool_name}\0{content}".encode("utf-8")).hexdigest()[:12]
+        if handle in self._entries:
+            self._entries.move_to_end(handle)
+            return handle
+        self._entries[handle] = (tool_name, content)
+        self._bytes += len(content.encode("utf-8"))
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.encode("utf-8"))
+            self.evictions += 1
+        return handle
+
+    def get(self, handle: str) -> Optional[str]:
+        entry = self._entries.get(handle)
+        if entry is None:
+            return None
+        self._entries.move_to_end(handle)
+        return entry[1]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "bytes": self._bytes, "evictions": self.evictions}
+
+
+def _utf8_len(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _shrink(value: Any, max_items: int, max_chars: int) -> Any:
+    """JSON 값의 구조(키, 중첩)는 유지하고 배열 항목 수와 문자열 길이만 줄임"""
+    if isinstance(value, dict):
+        return {key: _shrink(item, max_items, max_chars) for key, item in value.items()}
+    if isinstance(value, list):
+        shrunk = [_shrink(item, max_items, max_chars) for item in value[:max_items]]
+        if len(value) > max_items:
+            shrunk.append(f"…({len(value) - max_items}개 항목 생략)")
+        return shrunk
+    if isinstance(value, str) and len(value) > max_chars:
+        stripped = value.strip()
+        if stripped[:1] in ("{", "["):
+            # MCP 텍스트 콘텐츠 안에 든 JSON 문서도 구조를 유지해 줄임
+            try:
+                inner = json.loads(stripped)
+            except ValueError:
+                pass
+            else:
+                return json.dumps(_shrink(inner, max_items, max_chars), ensure_ascii=False)
+        return f"{value[:max_chars]}…(+{len(value) - max_chars}자)"
+    return value
+
+
+class ToolResultCompactor:
+    """큰 툴 결과를 툴별 바이트/토큰 한도 안으로 줄이고 원문은 보관소에 핸들로 저장
+
+    보관소는 압축기마다 따로 두며, PromptBasedAgent(세션)마다 하나씩 만들어 다른 세션의 결과를 조회할 수 없다.
+
+    JSON 결과는 키와 중첩 구조를 유지한 채 배열 앞부분과 문자열 앞부분만 남기며,
+    한도 안에 들어올 때까지 남기는 항목 수/문자 수를 절반씩 줄인다.
+    JSON이 아니거나 그래도 넘으면 줄 단위로 앞부분만 남긴다.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**TOOL_RESULT_COMPACTION_CONFIG, **(config or {})}
+        self.store = ToolResultStore(self.config["store_max_entries"], self.config["store_max_bytes"])
+        self.compactions = 0
+        self.bytes_in = 0
+        self.bytes_kept = 0
+
+    def limits_for(self, tool_name: str) -> Tuple[int, int]:
+        """툴별 (최대 바이트, 최대 토큰)"""
+        limits = {**self.config, **self.config["tool_limits"].get(tool_name, {})}
+        return limits["max_bytes"], limits["max_tokens"]
+
+    @staticmethod
+    def _fits(text: str, max_bytes: int, max_tokens: int) -> bool:
+        return _utf8_len(text) <= max_bytes and count_tokens(text) <= max_tokens
+
+    def _compact_json(self, value: Any, max_bytes: int, max_tokens: int) -> Optional[str]:
+        max_items = self.config["max_list_items"]
+        max_chars = self.config["max_string_chars"]
+        while True:
+            text = json.dumps(_shrink(value, max_items, max_chars), ensure_ascii=False, indent=1)
+            if self._fits(text, max_bytes, max_tokens):
+                return text
+            if max_items <= 1 and max_chars <= 16:
+                return None
+            max_items = max(max_items // 2, 1)
+            max_chars = max(max_chars // 2, 16)
+
+    def _compact_text(self, text: str, max_bytes: int, max_tokens: int) -> str:
+        # 바이트 한도로 자른 뒤 토큰 한도를 넘으면 더 줄임 (가능하면 줄 경계에서 자름)
+        budget = max_bytes
+        while True:
+            head = text.encode("utf-8")[:budget].decode("utf-8", errors="ignore")
+            newline = head.rfind("\n")
+            if newline > len(head) // 2:
+                head = head[:newline]
+            if budget <= 64 or self._fits(head, max_bytes, max_tokens):
+                return head
+            budget = budget * 3 // 4
+
+    def compact(self, tool_name: str, result: str) -> str:
+        """한도를 넘는 결과는 줄인 내용 + 원문 조회 안내로 바꿔 반환 (넘지 않으면 그대로)"""
+        if not self.config["enabled"] or tool_name == FETCH_TOOL_NAME:
+            return result
+        max_bytes, max_tokens = self.limits_for(tool_name)
+        if self._fits(result, max_bytes, max_tokens):
+            return result
+
+        # 안내 문구가 들어갈 자리를 남겨 둠
+        body_bytes = max(max_bytes - 200, max_bytes // 2)
+        body_tokens = max(max_tokens - 60, max_tokens // 2)
+        compacted = None
+        stripped = result.strip()
+        if stripped[:1] in ("{", "["):
+            try:
+                value = json.loads(stripped)
+            except ValueError:
+                value = None
+            if value is not None:
+                compacted = self._compact_json(value, body_bytes, body_tokens)
+        if compacted is None:
+            compacted = self._compact_text(result, body_bytes, body_tokens)
+
+        handle = self.store.put(tool_name, result)
+        total = _utf8_len(result)
+        kept = _utf8_len(compacted)
+        self.compactions += 1
+        self.bytes_in += total
+        self.bytes_kept += kept
+        tool_result_compactions_counter.add(1, {"tool.name": tool_name})
+        tool_result_bytes_saved_counter.add(total - kept, {"tool.name": tool_name})
+        notice = (f"[결과가 커서 {total}바이트 중 {kept}바이트만 표시함 - 생략된 내용이 필요하면 "
+                  f"{FETCH_TOOL_NAME} 도구를 {{\"handle\": \"{handle}\", \"offset\": 0}}로 호출]")
+        return f"{compacted}\n{notice}"
+
+    def fetch(self, handle: str, offset: int = 0, length: Optional[int] = None) -> str:
+        """보관된 원문의 일부 (offset부터 최대 length자, 기본은 fetch_chars)"""
+        content = self.store.get(handle)
+        if content is None:
+            raise ValueError(f"보관된 결과가 없습니다 (만료되었거나 잘못된 핸들): {handle}")
+        offset = max(int(offset), 0)
+        length = int(length) if length else self.config["fetch_chars"]
+        chunk = content[offset:offset + length]
+        end = offset + len(chunk)
+        if end < len(content):
+            chunk += f"\n[{len(content)}자 중 {offset}~{end}자 - 다음 부분은 offset {end}로 조회]"
+        return chunk
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "compactions": self.compactions,
+            "bytes_in": self.bytes_in,
+            "bytes_kept": self.bytes_kept,
+            "bytes_saved": self.bytes_in - self.bytes_kept,
+            "store": self.store.stats(),
+        }
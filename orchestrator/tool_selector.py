@@ -0,0 +1,148 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from orchestrator.config import TOOL_SELECTION_CONFIG
+from orchestrator.telemetry import tool_selection_tokens_saved_counter, tool_selection_turns_counter
+from orchestrator.token_counter import count_tokens
+from orchestrator.tool_parser import ToolCallParser
+
+_WORD_PATTERN = re.compile(r"[0-9a-zA-Z]+|[가-힣]+")
+_HANGUL_PATTERN = re.compile(r"[가-힣]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """BM25용 토큰화 - 영문/숫자는 단어 단위(snake_case 분리), 한글은 단어 + 2글자 n-gram
+
+    한국어는 조사가 붙어 단어가 달라지므로("사용률을", "사용률은") 2-gram으로 부분 일치를 잡는다.
+    """
+    tokens = []
+    for word in _WORD_PATTERN.findall(text.lower()):
+        if _HANGUL_PATTERN.fullmatch(word):
+            tokens.append(word)
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def tool_document(tool: Any) -> str:
+    """툴 이름, 설명, 매개변수 설명을 하나의 검색 문서로 결합"""
+    parts = [tool.name.replace("_", " "), getattr(tool, "description", "") or ""]
+    schema = ToolCallParser.tool_input_schema(tool)
+    if isinstance(schema, dict):
+        for param_name, param_info in (schema.get("properties") or {}).items():
+            parts.append(param_name.replace("_", " "))
+            if isinstance(param_info, dict):
+                parts.append(param_info.get("description", ""))
+    return " ".join(parts)
+
+
+class BM25Index:
+    """툴 문서에 대한 로컬 BM25 어휘 인덱스"""
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._docs = [Counter(tokenize(doc)) for doc in documents]
+        self._lengths = [sum(doc.values()) for doc in self._docs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+        doc_freq: Counter = Counter()
+        for doc in self._docs:
+            doc_freq.update(doc.keys())
+        total = len(self._docs)
+        self._idf = {
+            term: math.log(1 + (total - freq + 0.5) / (freq + 0.5))
+            for term, freq in doc_freq.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        """문서별 BM25 점수"""
+        terms = tokenize(query)
+        results = []
+        for doc, length in zip(self._docs, self._lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / self._avg_length) if self._avg_length else self.k1
+            for term in terms:
+                freq = doc.get(term)
+                if freq:
+                    score += self._idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            results.append(score)
+        return results
+
+
+class ToolSelector:
+    """질의와 관련된 top-k 툴만 담은 시스템 프롬프트 생성
+
+    관련 툴을 찾지 못하면 전체 툴 목록 프롬프트로 대체한다.
+    sticky가 켜져 있으면 세션(에이전트)에서 한 번 선택된 툴을 이후 턴에도 유지해
+    시스템 프롬프트가 매 턴 바뀌지 않게 한다 (로컬 서버의 KV 캐시 접두사 재사용).
+    """
+
+    def __init__(self, tools: List[Any], config: Optional[Dict[str, Any]] = None):
+        self.config = {**TOOL_SELECTION_CONFIG, **(config or {})}
+        self.tools = list(tools)
+        self.index = BM25Index([tool_document(tool) for tool in self.tools],
+                               k1=self.config["k1"], b=self.config["b"])
+        self.full_prompt = ToolCallParser.create_system_prompt(self.tools)
+        self._full_prompt_tokens = count_tokens(self.full_prompt)
+        self._sticky: List[int] = []   # 유지 중인 툴 인덱스 (등록 순서)
+        self._sticky_prompt = ("", 0)  # (프롬프트, 토큰 수)
+        self.turns = 0
+        self.selected_turns = 0
+        self.tokens_saved = 0
+
+    def _ranked(self, query: str) -> List[int]:
+        """질의 관련 툴 인덱스 (등록 순서, 관련 툴이 없으면 빈 목록)"""
+        scores = self.index.scores(query)
+        ranked = sorted(
+            (i for i, score in enumerate(scores) if score > 0),
+            key=lambda i: -scores[i],
+        )[:self.config["top_k"]]
+        return sorted(ranked)
+
+    def select(self, query: str) -> List[Any]:
+        """질의 관련 툴 목록 (원래 등록 순서 유지, 관련 툴이 없으면 빈 목록)"""
+        return [self.tools[i] for i in self._ranked(query)]
+
+    def _subset_prompt(self, selected: List[int]) -> tuple:
+        """선택된 툴의 (프롬프트, 토큰 수) - sticky면 지금까지 선택된 툴과 합쳐 유지"""
+        if self.config["sticky"]:
+            merged = sorted(set(self._sticky) | set(selected))
+            # 너무 많아지면 이번 선택으로 다시 시작
+            selected = merged if len(merged) <= self.config["max_sticky_tools"] else selected
+            if selected == self._sticky:
+                return self._sticky_prompt
+        prompt = ToolCallParser.create_system_prompt([self.tools[i] for i in selected])
+        result = (prompt, count_tokens(prompt))
+        if self.config["sticky"]:
+            self._sticky, self._sticky_prompt = selected, result
+        return result
+
+    def system_prompt(self, query: str) -> str:
+        """질의에 맞춘 시스템 프롬프트"""
+        self.turns += 1
+        selected = self._ranked(query) if len(self.tools) > self.config["min_tools"] else []
+        if not selected:
+            tool_selection_turns_counter.add(1, {"tool_selection.result": "fallback"})
+            return self.full_prompt
+
+        prompt, tokens = self._subset_prompt(selected)
+        saved = max(0, self._full_prompt_tokens - tokens)
+        self.selected_turns += 1
+        self.tokens_saved += saved
+        tool_selection_turns_counter.add(1, {"tool_selection.result": "selected"})
+        tool_selection_tokens_saved_counter.add(saved)
+        return prompt
+
+    def stats(self) -> Dict[str, Any]:
+        """선택 통계 (절약한 프롬프트 토큰 수 포함)"""
+        return {
+            "tools": len(self.tools),
+            "turns": self.turns,
+            "selected_turns": self.selected_turns,
+            "fallback_turns": self.turns - self.selected_turns,
+            "prompt_tokens_saved": self.tokens_saved,
+            "full_prompt_tokens": self._full_prompt_tokens,
+        }
@@ -0,0 +1,106 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+from autogen_agentchat.messages import TextMessage
+import orchestrator.session_manager as session_manager
+from orchestrator.batch_runner import BatchRunner, completed_ids
+from orchestrator.telemetry import percentile
+
+
+def write_lines(path, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+def test_completed_ids_missing_file(tmp_path):
+    assert completed_ids(str(tmp_path / "없음.jsonl")) == set()
+
+
+def test_completed_ids_skips_failed_and_truncated_rows(tmp_path):
+    """성공한 id만 완료로 보고, 나중에 실패한 id와 잘린 마지막 줄은 제외"""
+    path = tmp_path / "out.jsonl"
+    write_lines(path, [
+        json.dumps({"id": "a", "response": "ok", "error": None}),
+        json.dumps({"id": 2, "response": "ok"}),
+        json.dumps({"id": "b", "error": "시간 초과 (300.0초)"}),
+        json.dumps({"id": "c", "response": "ok", "error": None}),
+        json.dumps({"id": "c", "error": "LLM 호출 오류: HTTP 429 - slow down"}),
+        '{"id": "d", "respon',
+    ])
+    assert completed_ids(str(path)) == {"a", "2"}
+
+
+def test_completed_ids_retried_row_counts_as_done(tmp_path):
+    """실패 후 재실행에서 성공하면 완료로 봄"""
+    path = tmp_path / "out.jsonl"
+    write_lines(path, [
+        json.dumps({"id": "a", "error": "끊김"}),
+        json.dumps({"id": "a", "response": "ok", "error": None}),
+    ])
+    assert completed_ids(str(path)) == {"a"}
+
+
+def test_percentile_interpolates():
+    assert percentile([5.0], 99) == 5.0
+    assert percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.5
+    assert percentile([1.0, 2.0, 3.0, 4.0, 5.0], 90) == 4.6
+    assert percentile([1.0, 2.0], 100) == 2.0
+
+
+class SlowAgent:
+    """질의를 잠시 처리한 뒤 자신의 번호로 답하는 에이전트"""
+
+    count = 0
+
+    def __init__(self):
+        SlowAgent.count += 1
+        self.number = SlowAgent.count
+        self.busy = False
+
+    async def on_messages_stream(self, messages, cancellation_token):
+        assert not self.busy, "같은 에이전트(세션)에서 두 질의가 동시에 실행됨"
+        self.busy = True
+        await asyncio.sleep(0.02)
+        self.busy = False
+        yield TextMessage(content=f"agent {self.number}", source="assistant")
+
+
+def test_duplicate_ids_do_not_share_sessions(tmp_path, monkeypatch):
+    """id가 같거나 없는 입력도 각자 새 세션에서 실행 (id는 출력에만 사용)"""
+    async def fake_agent(**kwargs):
+        return SlowAgent()
+    monkeypatch.setattr(session_manager, "create_orchestrator_agent", fake_agent)
+    monkeypatch.setattr(SlowAgent, "count", 0)
+
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_lines(input_path, [json.dumps({"id": "a", "query": "q1"}), json.dumps({"id": "a", "query": "q2"}),
+                             json.dumps({"query": "q3"}), json.dumps({"id": 3, "query": "q4"})])
+
+    async def scenario():
+        runner = BatchRunner(str(input_path), str(output_path), concurrency=4, turn_timeout=5)
+        runner.sessions._tools = []
+        return await runner.run()
+
+    stats = asyncio.run(scenario())
+    assert stats["succeeded"] == 4 and stats["failed"] == 0
+    with open(output_path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert sorted(row["id"] for row in rows) == ["3", "3", "a", "a"]
+    assert len({row["response"] for row in rows}) == 4
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            if func.__code__.co_argcount > 1:
+                continue  # monkeypatch fixture가 필요한 테스트는 pytest로 실행
+            with tempfile.TemporaryDirectory() as tmp:
+                func(pathlib.Path(tmp)) if func.__code__.co_argcount else func()
+            print(f"{name}: ok")
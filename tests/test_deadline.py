@@ -0,0 +1,134 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import pytest
+from autogen_core import CancellationToken
+from orchestrator.deadline import Deadline, DeadlineExceeded, TurnCancelled
+
+
+def test_run_returns_result_within_deadline():
+    async def scenario():
+        deadline = Deadline(1.0)
+        try:
+            return await deadline.run(asyncio.sleep(0.01, result="ok"))
+        finally:
+            deadline.close()
+    assert asyncio.run(scenario()) == "ok"
+
+
+def test_run_cancels_work_when_deadline_expires():
+    """마감 시각이 지나면 작업을 취소하고 DeadlineExceeded"""
+    async def scenario():
+        cancelled = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        deadline = Deadline(0.05)
+        with pytest.raises(DeadlineExceeded):
+            await deadline.run(slow())
+        assert deadline.expired and deadline.token.is_cancelled()
+        await asyncio.wait_for(cancelled.wait(), 1)
+    asyncio.run(scenario())
+
+
+def test_run_individual_timeout_does_not_expire_turn():
+    """개별 timeout 초과는 asyncio.TimeoutError이며 턴은 계속 진행 가능"""
+    async def scenario():
+        deadline = Deadline(5.0)
+        with pytest.raises(asyncio.TimeoutError):
+            await deadline.run(asyncio.sleep(10), timeout=0.05)
+        assert not deadline.expired
+        assert await deadline.run(asyncio.sleep(0, result=1)) == 1
+        deadline.close()
+    asyncio.run(scenario())
+
+
+def test_run_raises_turn_cancelled_when_token_cancelled():
+    """호출한 쪽이 토큰을 취소하면 TurnCancelled (이미 취소된 토큰이면 시작하지 않음)"""
+    async def scenario():
+        token = CancellationToken()
+        deadline = Deadline(None, token)
+        asyncio.get_running_loop().call_later(0.05, token.cancel)
+        with pytest.raises(TurnCancelled):
+            await deadline.run(asyncio.sleep(10))
+        with pytest.raises(TurnCancelled):
+            await deadline.run(asyncio.sleep(0))
+    asyncio.run(scenario())
+
+
+async def numbers(count: int, delay: float, closed: list):
+    try:
+        for i in range(count):
+            await asyncio.sleep(delay)
+            yield i
+    finally:
+        closed.append(True)
+
+
+def test_iterate_passes_items_through():
+    async def scenario():
+        closed = []
+        deadline = Deadline(1.0)
+        items = [item async for item in deadline.iterate(numbers(5, 0, closed))]
+        deadline.close()
+        return items, closed
+    assert asyncio.run(scenario()) == ([0, 1, 2, 3, 4], [True])
+
+
+def test_iterate_stops_stream_on_deadline():
+    """스트림 중간에 마감되면 DeadlineExceeded를 내고 원래 스트림을 닫음"""
+    async def scenario():
+        closed, items = [], []
+        deadline = Deadline(0.1)
+        with pytest.raises(DeadlineExceeded):
+            async for item in deadline.iterate(numbers(100, 0.03, closed)):
+                items.append(item)
+        await asyncio.sleep(0)
+        assert 0 < len(items) < 100
+        assert closed == [True]
+    asyncio.run(scenario())
+
+
+def test_iterate_propagates_stream_errors():
+    async def scenario():
+        async def broken():
+            yield 1
+            raise RuntimeError("끊김")
+
+        deadline = Deadline()
+        items = []
+        with pytest.raises(RuntimeError, match="끊김"):
+            async for item in deadline.iterate(broken()):
+                items.append(item)
+        assert items == [1]
+    asyncio.run(scenario())
+
+
+def test_iterate_closing_early_closes_stream():
+    """반환된 제너레이터를 중간에 닫으면 원래 스트림도 닫힘"""
+    async def scenario():
+        closed = []
+        deadline = Deadline()
+        stream = deadline.iterate(numbers(100, 0.01, closed))
+        assert await stream.__anext__() == 0
+        await stream.aclose()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert closed == [True]
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,102 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator.history import ConversationHistory
+from orchestrator.tool_result_store import ToolResultCompactor
+
+
+def add_turns(history: ConversationHistory, start: int, count: int):
+    for i in range(start, start + count):
+        history.append("user", f"질문 {i} " + "가" * 100)
+        history.append("assistant", f"답변 {i} " + "나" * 100)
+
+
+def test_under_budget_history_is_unchanged():
+    history = ConversationHistory(max_tokens=10000)
+    add_turns(history, 0, 3)
+    messages = history.build("sys")
+    assert messages[0] == {"role": "system", "content": "sys"}
+    assert messages[1:] == history.messages() and len(history) == 6
+    assert history.last_prompt_tokens == history.total_tokens() + history._system_tokens("sys")
+    assert history.dropped_messages == 0 and history.compacted_messages == 0
+
+
+def test_old_tool_results_are_compacted_before_dropping():
+    """예산을 넘으면 턴을 제거하기 전에 오래된 <tool_result> 내용부터 축약"""
+    history = ConversationHistory(max_tokens=600)
+    history.append("user", "로그 보여줘")
+    history.append("assistant", "<tool_call>...</tool_call>\n<tool_result name='read_log'>\n"
+                   + "로그 " * 800 + "\n</tool_result>")
+    history.append("assistant", "로그 요약입니다")
+    history.append("user", "다음 질문")
+    messages = history.build("sys", protected_from=3)
+
+    assert history.compacted_messages == 1 and history.dropped_messages == 0
+    assert "자 생략" in messages[2]["content"]
+    assert messages[2]["content"].endswith("</tool_result>")
+    assert history.last_prompt_tokens <= 600
+
+
+def test_dropping_keeps_turn_boundaries():
+    """턴 단위로 제거해 남은 히스토리는 항상 user 메시지로 시작"""
+    history = ConversationHistory(max_tokens=400)
+    for i in range(6):
+        history.append("user", f"질문 {i} " + "가" * 80)
+        history.append("assistant", f"<tool_call>...</tool_call>\n<tool_result name='t'>{i}</tool_result>")
+        history.append("assistant", f"답변 {i} " + "다" * 80)
+    messages = history.build("sys")
+    assert messages[1]["content"].startswith("질문")
+    assert history.dropped_messages % 3 == 0
+
+
+def test_trim_drops_to_low_water_and_keeps_prefix():
+    """예산을 넘으면 낮은 목표치까지 한 번에 줄이고, 다음 턴들은 앞부분을 그대로 유지"""
+    history = ConversationHistory(max_tokens=1000)
+    add_turns(history, 0, 20)
+    first = history.build("sys")
+    assert history.last_prompt_tokens <= 1000
+    assert history.dropped_messages > 0 and first[1]["role"] == "user"
+    dropped = history.dropped_messages
+
+    # 예산을 다시 넘기 전까지는 아무것도 제거하지 않으므로 이전 프롬프트가 그대로 접두사가 됨
+    add_turns(history, 20, 1)
+    second = history.build("sys")
+    assert history.dropped_messages == dropped
+    assert second[:len(first)] == first
+
+
+def test_protected_turn_is_not_dropped():
+    history = ConversationHistory(max_tokens=200)
+    add_turns(history, 0, 5)
+    history.append("user", "지금 질문 " + "다" * 600)
+    messages = history.build("sys", protected_from=len(history) - 1)
+    assert messages[-1]["content"].startswith("지금 질문")
+    assert len(messages) == 2
+
+
+def test_compaction_keeps_fetch_handle_notice():
+    """이미 줄인 결과를 다시 축약해도 원문 조회 안내(핸들)는 남김"""
+    compactor = ToolResultCompactor({"enabled": True, "max_bytes": 4000, "max_tokens": 2000, "tool_limits": {}})
+    result = compactor.compact("read_log", "\n".join(f"로그 줄 {i}" for i in range(2000)))
+    notice = result.rsplit("\n", 1)[1]
+    assert "fetch_tool_result" in notice
+
+    history = ConversationHistory(max_tokens=600)
+    history.append("user", "로그 보여줘")
+    history.append("assistant", f"<tool_call>...</tool_call>\n<tool_result name='read_log'>\n{result}\n</tool_result>")
+    history.append("assistant", "로그 요약입니다")
+    history.append("user", "다음 질문")
+    messages = history.build("sys", protected_from=3)
+
+    assert history.compacted_messages == 1
+    assert messages[2]["content"].endswith(f"자 생략)\n{notice}\n</tool_result>")
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"{name}: ok")
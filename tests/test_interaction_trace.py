@@ -0,0 +1,174 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import time
+from typing import List
+import httpx
+import pytest
+from orchestrator.interaction_trace import InteractionTrace, TRACE_VERSION, tool_call_key
+
+URL = "http://llm/v1/chat/completions"
+
+
+class ChunkStream(httpx.AsyncByteStream):
+    """청크 사이에 delay초씩 쉬면서 chunks를 차례로 보내는 응답 본문"""
+
+    def __init__(self, chunks: List[bytes], delay: float = 0.0):
+        self.chunks = chunks
+        self.delay = delay
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield chunk
+
+
+def upstream(chunks: List[bytes], delay: float = 0.0, status: int = 200) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(status, headers={"content-type": "text/event-stream"},
+                              stream=ChunkStream(chunks, delay))
+
+    return httpx.MockTransport(handler)
+
+
+async def post(transport: httpx.AsyncBaseTransport, content: str = "CPU?") -> httpx.Response:
+    async with httpx.AsyncClient(transport=transport) as client:
+        response = await client.post(URL, json={"model": "gemma", "messages": [{"role": "user", "content": content}]})
+        await response.aread()
+        return response
+
+
+async def record(path: str, chunks: List[bytes], *contents: str) -> InteractionTrace:
+    trace = InteractionTrace("record", path)
+    inner = upstream(chunks)
+    for content in contents:
+        await post(trace.wrap_transport(inner), content)
+    await trace.aclose()
+    return trace
+
+
+def test_llm_response_round_trip(tmp_path):
+    """기록한 응답(상태/헤더/본문)을 재생 모드에서 LLM 서버 없이 그대로 돌려줌"""
+    async def scenario():
+        path = str(tmp_path / "trace.jsonl")
+        # 멀티바이트 문자가 청크 경계에서 잘려도 본문이 그대로 재생되어야 함
+        body = "data: 사용률 12%\n\n".encode("utf-8")
+        trace = await record(path, [body[:8], body[8:]], "CPU?")
+        assert trace.stats()["recorded"] == 1
+
+        replay = InteractionTrace("replay", path, time_scale=0.0)
+        response = await post(replay.wrap_transport())
+        assert response.status_code == 200
+        assert response.content == body
+        assert response.headers["content-type"] == "text/event-stream"
+        stats = replay.stats()
+        assert (stats["replayed"], stats["substituted"], stats["missing"], stats["unused"]) == (1, 0, 0, 0)
+    asyncio.run(scenario())
+
+
+def test_same_requests_replay_in_recorded_order(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "trace.jsonl")
+        trace = InteractionTrace("record", path)
+        for answer in (b"first", b"second"):
+            await post(trace.wrap_transport(upstream([answer])))
+        await trace.aclose()
+
+        replay = InteractionTrace("replay", path, time_scale=0.0)
+        assert [(await post(replay.wrap_transport())).content for _ in range(2)] == [b"first", b"second"]
+        with pytest.raises(httpx.ConnectError):
+            await post(replay.wrap_transport())
+        assert replay.stats()["missing"] == 1
+    asyncio.run(scenario())
+
+
+def test_changed_request_is_substituted_unless_strict(tmp_path):
+    """요청 내용이 달라지면 같은 경로의 다음 미사용 기록으로 대체, strict면 기록 없음 오류"""
+    async def scenario():
+        path = str(tmp_path / "trace.jsonl")
+        await record(path, [b"answer"], "CPU?")
+
+        relaxed = InteractionTrace("replay", path, time_scale=0.0)
+        assert (await post(relaxed.wrap_transport(), "메모리?")).content == b"answer"
+        assert relaxed.stats()["substituted"] == 1
+
+        strict = InteractionTrace("replay", path, time_scale=0.0, strict=True)
+        with pytest.raises(httpx.ConnectError):
+            await post(strict.wrap_transport(), "메모리?")
+    asyncio.run(scenario())
+
+
+def test_replay_keeps_recorded_timing(tmp_path):
+    """청크 도착 시각을 time_scale 배율로 재현"""
+    async def scenario():
+        path = str(tmp_path / "trace.jsonl")
+        trace = InteractionTrace("record", path)
+        await post(trace.wrap_transport(upstream([b"a", b"b", b"c"], delay=0.03)))
+        await trace.aclose()
+
+        started = time.monotonic()
+        await post(InteractionTrace("replay", path).wrap_transport())
+        assert time.monotonic() - started >= 0.08
+
+        started = time.monotonic()
+        await post(InteractionTrace("replay", path, time_scale=0.0).wrap_transport())
+        assert time.monotonic() - started < 0.05
+    asyncio.run(scenario())
+
+
+def test_stream_closed_early_is_recorded_as_incomplete(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "trace.jsonl")
+        trace = InteractionTrace("record", path, include_requests=True)
+        async with httpx.AsyncClient(transport=trace.wrap_transport(upstream([b"a", b"b", b"c"]))) as client:
+            async with client.stream("POST", URL, json={"model": "gemma"}) as response:
+                async for _ in response.aiter_raw():
+                    break
+        await trace.aclose()
+
+        with open(path, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+        assert entries[0]["type"] == "header"
+        assert entries[1]["complete"] is False and [text for _, text in entries[1]["chunks"]] == ["a"]
+        assert json.loads(entries[1]["request"]) == {"model": "gemma"}
+    asyncio.run(scenario())
+
+
+def test_tool_call_entries_and_truncated_file(tmp_path):
+    """MCP 툴 호출 기록을 키로 재생하고, 기록 중 잘린 마지막 줄은 건너뜀"""
+    path = str(tmp_path / "trace.jsonl")
+    trace = InteractionTrace("record", path)
+    key = tool_call_key("server", "cpu_usage", {"core": 0})
+    trace.record({"type": "mcp_call", "key": key, "group": "cpu_usage", "result": "12%"})
+    asyncio.run(trace.aclose())
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "mcp_call", "key"')
+
+    replay = InteractionTrace("replay", path)
+    assert replay.take("mcp_call", key, "cpu_usage")["result"] == "12%"
+    assert replay.take("mcp_call", key, "cpu_usage") is None
+    assert replay.stats()["entries"] == 1
+
+
+def test_unsupported_version_is_rejected(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    path.write_text(json.dumps({"type": "header", "version": TRACE_VERSION + 1}) + "\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        InteractionTrace("replay", str(path))
+    with pytest.raises(ValueError):
+        InteractionTrace("replay-all", str(path))
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            with tempfile.TemporaryDirectory() as tmp:
+                func(pathlib.Path(tmp))
+            print(f"{name}: ok")
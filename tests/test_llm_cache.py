@@ -0,0 +1,90 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator.llm_cache import CompletionCache
+
+
+def payload(content: str = "CPU?", **params):
+    return {"model": "gemma", "temperature": 0, "max_tokens": 512, "stream": False,
+            "messages": [{"role": "system", "content": "sys"}, {"role": "user", "content": content}], **params}
+
+
+def make_cache(**config) -> CompletionCache:
+    return CompletionCache({"enabled": True, "max_entries": 512, "persist_path": None,
+                            "allow_nondeterministic": False, **config})
+
+
+def test_memory_hit_ignores_transport_params_and_whitespace():
+    """stream 같은 전송 방식과 줄바꿈/앞뒤 공백 차이는 같은 요청으로 봄"""
+    cache = make_cache()
+    assert cache.get(payload()) is None
+    cache.put(payload(), "12%")
+    assert cache.get(payload(stream=True)) == "12%"
+    assert cache.get(payload("CPU?\r\n")) == "12%"
+    assert cache.get(payload(max_tokens=64)) is None
+    assert cache.get(payload("메모리?")) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 3)
+
+
+def test_nondeterministic_requests_are_bypassed():
+    """temperature > 0 요청은 seed가 없으면 캐시하지 않음 (allow_nondeterministic이면 캐시)"""
+    cache = make_cache()
+    cache.put(payload(temperature=0.7), "답변")
+    assert cache.get(payload(temperature=0.7)) is None
+    assert cache.stats()["bypassed"] == 1 and cache.stats()["size"] == 0
+
+    cache.put(payload(temperature=0.7, seed=1), "답변")
+    assert cache.get(payload(temperature=0.7, seed=1)) == "답변"
+
+    relaxed = make_cache(allow_nondeterministic=True)
+    relaxed.put(payload(temperature=0.7), "답변")
+    assert relaxed.get(payload(temperature=0.7)) == "답변"
+
+
+def test_disabled_cache_stores_nothing():
+    cache = make_cache(enabled=False)
+    cache.put(payload(), "12%")
+    assert cache.get(payload()) is None
+    assert cache.stats() == {"hits": 0, "misses": 0, "bypassed": 0, "size": 0, "hit_rate": 0.0}
+
+
+def test_memory_layer_is_lru():
+    cache = make_cache(max_entries=2)
+    cache.put(payload("a"), "A")
+    cache.put(payload("b"), "B")
+    assert cache.get(payload("a")) == "A"
+    cache.put(payload("c"), "C")
+    assert cache.get(payload("b")) is None
+    assert cache.get(payload("a")) == "A" and cache.get(payload("c")) == "C"
+
+
+def test_sqlite_layer_survives_restart(tmp_path):
+    """영구 계층에 저장한 응답은 새 캐시 인스턴스(재시작)에서도 조회되고 메모리 계층으로 올라옴"""
+    path = str(tmp_path / "cache" / "llm.sqlite3")
+    first = make_cache(persist_path=path)
+    first.put(payload(), "12%")
+    first.close()
+
+    second = make_cache(persist_path=path, max_entries=1)
+    assert second.stats()["size"] == 0
+    assert second.get(payload()) == "12%"
+    assert second.stats()["size"] == 1
+
+    # 메모리에서 밀려나도 영구 계층에서 다시 조회
+    second.put(payload("b"), "B")
+    assert second.get(payload()) == "12%"
+    second.close()
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            with tempfile.TemporaryDirectory() as tmp:
+                func(pathlib.Path(tmp)) if func.__code__.co_argcount else func()
+            print(f"{name}: ok")
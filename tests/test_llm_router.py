@@ -0,0 +1,179 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+import pytest
+from orchestrator.llm_router import EndpointUnavailable, LLMRouter
+
+
+def make_router() -> LLMRouter:
+    return LLMRouter({"endpoints": ["http://slow/v1", "http://fast/v1"], "health_check_interval": 0,
+                      "strategy": "least_outstanding", "session_affinity": False})
+
+
+def test_router_hedges_slow_request():
+    """hedge_delay 안에 응답이 없으면 다음 엔드포인트로 중복 요청하고 먼저 온 응답을 사용"""
+    async def scenario():
+        router = make_router()
+        delays = {"http://slow/v1": 1.0, "http://fast/v1": 0.01}
+        cancelled = []
+
+        async def send(base_url: str) -> str:
+            try:
+                await asyncio.sleep(delays[base_url])
+            except asyncio.CancelledError:
+                cancelled.append(base_url)
+                raise
+            return base_url
+
+        assert await router.execute(send, hedge_delay=0.05) == "http://fast/v1"
+        await asyncio.sleep(0)
+        assert cancelled == ["http://slow/v1"]
+        stats = router.stats()
+        assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+        # 진 요청도 지금까지 걸린 시간이 지연 시간에 반영됨
+        assert stats["endpoints"]["http://slow/v1"]["ewma_ms"] >= 50
+        assert stats["endpoints"]["http://slow/v1"]["outstanding"] == 0
+    asyncio.run(scenario())
+
+
+def test_router_does_not_hedge_fast_request():
+    async def scenario():
+        router = make_router()
+
+        async def send(base_url: str) -> str:
+            return base_url
+
+        assert await router.execute(send, hedge_delay=0.5) == "http://slow/v1"
+        assert router.stats()["hedges"] == 0
+    asyncio.run(scenario())
+
+
+def test_router_fails_over_and_keeps_non_failover_errors():
+    """장애 조치 대상 오류는 다음 엔드포인트로, 그 외 오류는 그대로 전달"""
+    async def scenario():
+        router = make_router()
+        failed = []
+
+        async def flaky(base_url: str) -> str:
+            if base_url == "http://slow/v1":
+                raise EndpointUnavailable("503")
+            return base_url
+
+        result = await router.execute(flaky, on_failover=lambda url, error: failed.append(url))
+        assert result == "http://fast/v1" and failed == ["http://slow/v1"]
+        assert not router.endpoints["http://slow/v1"].available
+
+        async def rejected(base_url: str) -> str:
+            raise ValueError("400")
+
+        with pytest.raises(ValueError):
+            await router.execute(rejected)
+    asyncio.run(scenario())
+
+
+def make_affinity_router(**config) -> LLMRouter:
+    return LLMRouter({"endpoints": ["http://a/v1", "http://b/v1"], "health_check_interval": 0,
+                      "strategy": "least_outstanding", "session_affinity": True, "affinity_max_skew": 2,
+                      **config})
+
+
+def test_session_sticks_to_bound_endpoint():
+    """성공한 요청의 엔드포인트에 세션을 고정해 다른 엔드포인트가 더 한가해도 계속 그쪽으로 보냄"""
+    async def scenario():
+        router = make_affinity_router()
+        with router.track("http://b/v1", "s1"):
+            pass
+        router.endpoints["http://b/v1"].outstanding = 1
+        assert router.route("s1")[0] == "http://b/v1"
+        assert router.route("s2")[0] == "http://a/v1"
+    asyncio.run(scenario())
+
+
+def test_affinity_rebalances_when_skewed():
+    """고정 엔드포인트의 처리 중 요청이 affinity_max_skew 이상 많으면 덜 바쁜 엔드포인트로 재배치"""
+    async def scenario():
+        router = make_affinity_router()
+        with router.track("http://b/v1", "s1"):
+            pass
+        router.endpoints["http://b/v1"].outstanding = 2
+        assert router.route("s1")[0] == "http://a/v1"
+    asyncio.run(scenario())
+
+
+def test_affinity_ignores_unavailable_endpoint_and_is_bounded():
+    async def scenario():
+        router = make_affinity_router(affinity_max_sessions=2)
+        for session_id in ("s1", "s2", "s3"):
+            with router.track("http://b/v1", session_id):
+                pass
+        # 가장 오래된 세션부터 고정 정보 제거
+        assert router.stats()["affinity_sessions"] == 2 and "s1" not in router._affinity
+
+        router.mark_down(router.endpoints["http://b/v1"])
+        assert router.route("s2") == ["http://a/v1", "http://b/v1"]
+    asyncio.run(scenario())
+
+
+def test_failed_request_does_not_bind_session():
+    async def scenario():
+        router = make_affinity_router()
+        with pytest.raises(EndpointUnavailable):
+            with router.track("http://a/v1", "s1"):
+                raise EndpointUnavailable("503")
+        assert "s1" not in router._affinity
+    asyncio.run(scenario())
+
+
+def test_cooldown_backoff_grows_and_all_down_tries_soonest_recovery():
+    """연속 실패마다 제외 시간이 두 배로 (최대 8배), 모두 장애면 복구가 가장 빠른 순서로 시도"""
+    async def scenario():
+        router = make_affinity_router(cooldown=10.0)
+        a, b = router.endpoints["http://a/v1"], router.endpoints["http://b/v1"]
+        for _ in range(5):
+            router.mark_down(a)
+        assert 79 < a.down_until - time.monotonic() <= 80
+        router.mark_down(b)
+        assert 9 < b.down_until - time.monotonic() <= 10
+        assert router.route("s1") == ["http://b/v1", "http://a/v1"]
+        assert router.stats()["failovers"] == 6
+    asyncio.run(scenario())
+
+
+def test_failover_exhausts_candidates_and_raises_last_error():
+    async def scenario():
+        router = make_affinity_router()
+        attempts = []
+
+        async def down(base_url: str) -> str:
+            attempts.append(base_url)
+            raise EndpointUnavailable(base_url)
+
+        with pytest.raises(EndpointUnavailable, match="http://b/v1"):
+            await router.execute(down)
+        assert attempts == ["http://a/v1", "http://b/v1"]
+        assert not any(e.available for e in router.endpoints.values())
+    asyncio.run(scenario())
+
+
+def test_ewma_strategy_prefers_faster_endpoint():
+    async def scenario():
+        router = make_affinity_router(strategy="ewma", session_affinity=False)
+        router.endpoints["http://a/v1"].ewma_ms = 500.0
+        router.endpoints["http://b/v1"].ewma_ms = 100.0
+        assert router.route()[0] == "http://b/v1"
+        # 처리 중 요청이 쌓이면 (100 x 6 > 500 x 1) 느린 엔드포인트가 선택됨
+        router.endpoints["http://b/v1"].outstanding = 5
+        assert router.route()[0] == "http://a/v1"
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"{name}: ok")
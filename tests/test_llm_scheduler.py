@@ -0,0 +1,143 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import pytest
+from orchestrator.llm_scheduler import LLMScheduler, current_session_id, scheduling_context
+
+BACKEND = "http://stub/v1"
+
+
+def make_scheduler(limit: int = 1) -> LLMScheduler:
+    return LLMScheduler({"enabled": True, "max_in_flight": limit, "endpoint_limits": {}})
+
+
+async def request(scheduler: LLMScheduler, order: list, name: str, session_id: str = "default",
+                  priority_class: str = "interactive", final_answer: bool = False, hold: float = 0.0):
+    with scheduling_context(session_id, priority_class):
+        async with scheduler.slot(BACKEND, final_answer):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+
+async def queue_behind_holder(scheduler: LLMScheduler, order: list, requests: list):
+    """슬롯을 잡은 요청 뒤에 requests를 차례로 대기시킨 뒤 모두 끝날 때까지 실행"""
+    release = asyncio.Event()
+
+    async def holder():
+        async with scheduler.slot(BACKEND):
+            await release.wait()
+
+    holding = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+    tasks = []
+    for kwargs in requests:
+        tasks.append(asyncio.create_task(request(scheduler, order, **kwargs)))
+        await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(holding, *tasks)
+
+
+def test_in_flight_limit():
+    async def scenario():
+        scheduler = make_scheduler(limit=2)
+        peak, active = [0], [0]
+
+        async def tracked():
+            async with scheduler.slot(BACKEND):
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+                await asyncio.sleep(0.01)
+                active[0] -= 1
+
+        await asyncio.gather(*(tracked() for _ in range(6)))
+        assert peak[0] == 2
+        stats = scheduler.stats()[BACKEND]
+        assert stats["granted"] == 6 and stats["queued_total"] == 4 and stats["in_flight"] == 0
+    asyncio.run(scenario())
+
+
+def test_priority_order():
+    """대화형 > 배치, 같은 등급에서는 최종 답변 > 툴 선택 요청 순으로 슬롯을 받음"""
+    async def scenario():
+        order = []
+        await queue_behind_holder(make_scheduler(), order, [
+            {"name": "batch-tool", "session_id": "b", "priority_class": "batch"},
+            {"name": "batch-final", "session_id": "b2", "priority_class": "batch", "final_answer": True},
+            {"name": "tool", "session_id": "i"},
+            {"name": "final", "session_id": "i2", "final_answer": True},
+        ])
+        assert order == ["final", "tool", "batch-final", "batch-tool"]
+    asyncio.run(scenario())
+
+
+def test_sessions_take_turns_within_priority():
+    """요청을 많이 쌓은 세션이 먼저 왔어도 다른 세션 요청이 사이사이 처리됨"""
+    async def scenario():
+        order = []
+        await queue_behind_holder(make_scheduler(), order, [
+            {"name": "a1", "session_id": "a"},
+            {"name": "a2", "session_id": "a"},
+            {"name": "a3", "session_id": "a"},
+            {"name": "b1", "session_id": "b"},
+            {"name": "c1", "session_id": "c"},
+        ])
+        assert order.index("b1") < order.index("a2")
+        assert order.index("c1") < order.index("a3")
+        assert [name for name in order if name.startswith("a")] == ["a1", "a2", "a3"]
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        scheduler = make_scheduler()
+        order = []
+        release = asyncio.Event()
+
+        async def holder():
+            async with scheduler.slot(BACKEND):
+                await release.wait()
+
+        holding = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(request(scheduler, order, "cancelled", session_id="x"))
+        waiting = asyncio.create_task(request(scheduler, order, "waiting", session_id="y"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        release.set()
+        await asyncio.gather(holding, waiting)
+        assert order == ["waiting"]
+        stats = scheduler.stats()[BACKEND]
+        assert stats["in_flight"] == 0 and stats["waiting"] == 0
+    asyncio.run(scenario())
+
+
+def test_disabled_scheduler_does_not_wait():
+    async def scenario():
+        scheduler = LLMScheduler({"enabled": False})
+        async with scheduler.slot(BACKEND) as first:
+            async with scheduler.slot(BACKEND) as second:
+                assert first == second == 0.0
+        assert scheduler.stats() == {}
+    asyncio.run(scenario())
+
+
+def test_scheduling_context_sets_session():
+    assert current_session_id() == "default"
+    with scheduling_context("s1", "batch"):
+        assert current_session_id() == "s1"
+    with pytest.raises(ValueError):
+        with scheduling_context("s1", "unknown"):
+            pass
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"{name}: ok")
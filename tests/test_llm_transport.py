@@ -0,0 +1,61 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from orchestrator.llm_transport import LLMTransport
+from orchestrator.loop_runner import BackgroundLoopRunner
+
+BASE_URL = "http://stub/v1"
+
+
+def test_clients_are_kept_per_loop():
+    """다른 루프가 같은 엔드포인트를 써도 서로의 클라이언트를 교체/종료하지 않음"""
+    transport = LLMTransport()
+    runner = BackgroundLoopRunner("test-loop")
+
+    async def get_client():
+        return transport.get_client(BASE_URL)
+
+    try:
+        background = runner.run(get_client())
+
+        async def scenario():
+            client = transport.get_client(BASE_URL)
+            assert client is transport.get_client(BASE_URL + "/")
+            assert client is not background
+            await transport.aclose()
+            return client
+
+        foreground = asyncio.run(scenario())
+        assert foreground.is_closed
+        assert not background.is_closed
+        assert runner.run(get_client()) is background
+        assert transport.has_clients
+    finally:
+        runner.run(transport.aclose())
+        runner.stop()
+    assert background.is_closed and not transport.has_clients
+
+
+def test_closed_loop_clients_are_released():
+    """asyncio.run이 끝나 루프가 닫히면 그 루프의 클라이언트 참조를 놓고 새 루프에서 새로 생성"""
+    transport = LLMTransport()
+
+    async def get_client():
+        return transport.get_client(BASE_URL)
+
+    first = asyncio.run(get_client())
+    assert not transport.has_clients
+    second = asyncio.run(get_client())
+    assert second is not first
+    assert len(transport._clients) == 1
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,132 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import contextlib
+import anyio
+import pytest
+from autogen_core import CancellationToken
+import orchestrator.mcp_session_pool as mcp_session_pool
+from orchestrator.mcp_session_pool import McpServerSession, McpSessionPool
+
+
+class FakeSession:
+    """프로세스 없이 동작하는 MCP 클라이언트 세션 (dead면 ping 실패)"""
+
+    def __init__(self):
+        self.dead = False
+
+    async def initialize(self):
+        await asyncio.sleep(0.01)
+
+    async def send_ping(self):
+        if self.dead:
+            raise anyio.ClosedResourceError()
+
+
+class FakeAdapter:
+    """호출마다 outcomes의 항목을 차례로 돌려주거나 (예외면) 발생시키는 툴 어댑터"""
+
+    def __init__(self, name: str, outcomes: list):
+        self.name = name
+        self.outcomes = list(outcomes)
+        self.sessions = []
+
+    async def _run(self, args, cancellation_token, session):
+        self.sessions.append(session)
+        outcome = self.outcomes.pop(0)
+        if callable(outcome):
+            outcome = outcome(session)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture(autouse=True)
+def fake_sessions(monkeypatch):
+    created = []
+
+    @contextlib.asynccontextmanager
+    async def fake_create(params):
+        session = FakeSession()
+        created.append(session)
+        yield session
+
+    monkeypatch.setattr(mcp_session_pool, "create_mcp_server_session", fake_create)
+    return created
+
+
+def make_pool(**config):
+    pool = McpSessionPool({"health_check_interval": 0, "startup_timeout": 1.0, "shutdown_timeout": 1.0,
+                           "ping_timeout": 1.0, **config})
+    pool._servers["fake"] = McpServerSession("fake", None, pool.config)
+    return pool, pool._servers["fake"]
+
+
+def kill(session):
+    """요청을 받은 뒤 서버 프로세스가 죽은 상황"""
+    session.dead = True
+    return RuntimeError("Connection closed")
+
+
+def test_concurrent_restarts_spawn_one_runner(fake_sessions):
+    """같은 러너에 대한 재시작이 동시에 와도 한 번만 재시작"""
+    async def scenario():
+        _, server = make_pool()
+        await server.get_session()
+        stale = server._runner
+        sessions = await asyncio.gather(*(server.restart(stale) for _ in range(3)))
+        assert server.restart_count == 1
+        assert len(fake_sessions) == 2
+        assert all(session is fake_sessions[-1] for session in sessions)
+        await server.aclose()
+    asyncio.run(scenario())
+
+
+def test_unsent_request_is_retried(fake_sessions):
+    """요청을 보내기 전에 끊긴 세션이면 재시작 후 재시도"""
+    async def scenario():
+        pool, server = make_pool()
+        adapter = FakeAdapter("create_ticket", [anyio.ClosedResourceError(), "ok"])
+        assert await pool._call_tool("fake", adapter, {}, CancellationToken()) == "ok"
+        assert adapter.sessions == fake_sessions and server.restart_count == 1
+        await pool.aclose()
+    asyncio.run(scenario())
+
+
+def test_sent_request_is_not_retried_by_default(fake_sessions):
+    """요청을 보낸 뒤 세션이 죽으면 툴을 다시 실행하지 않고 오류 전달 (세션은 재시작)"""
+    async def scenario():
+        pool, server = make_pool()
+        adapter = FakeAdapter("create_ticket", [kill, "중복 실행"])
+        with pytest.raises(RuntimeError, match="Connection closed"):
+            await pool._call_tool("fake", adapter, {}, CancellationToken())
+        assert len(adapter.sessions) == 1
+        assert server.restart_count == 1 and server.is_running
+        await pool.aclose()
+    asyncio.run(scenario())
+
+
+def test_retry_tools_opt_in(fake_sessions):
+    """retry_tools에 등록된 멱등 툴은 요청을 보낸 뒤 끊겨도 재시도"""
+    async def scenario():
+        pool, server = make_pool(retry_tools=["cpu_usage"])
+        adapter = FakeAdapter("cpu_usage", [kill, "12%"])
+        assert await pool._call_tool("fake", adapter, {}, CancellationToken()) == "12%"
+        assert adapter.sessions == fake_sessions and server.restart_count == 1
+        await pool.aclose()
+    asyncio.run(scenario())
+
+
+def test_tool_error_on_healthy_session_is_raised(fake_sessions):
+    async def scenario():
+        pool, server = make_pool(retry_tools=["cpu_usage"])
+        adapter = FakeAdapter("cpu_usage", [ValueError("잘못된 인자"), "12%"])
+        with pytest.raises(ValueError):
+            await pool._call_tool("fake", adapter, {}, CancellationToken())
+        assert len(adapter.sessions) == 1 and server.restart_count == 0
+        await pool.aclose()
+    asyncio.run(scenario())
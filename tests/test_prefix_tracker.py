@@ -0,0 +1,72 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import httpx
+from orchestrator.llm_cache import CompletionCache
+from orchestrator.llm_router import LLMRouter
+from orchestrator.llm_transport import LLMTransport
+from orchestrator.prefix_tracker import PrefixTracker, shared_prefix_length
+from orchestrator.prompt_agent import PromptBasedAgent
+from orchestrator.telemetry import configure_telemetry, get_finished_spans
+
+BASE_URL = "http://stub/v1"
+
+
+class StubTransport(LLMTransport):
+    """실제 전송 계층 + 고정 답변을 돌려주는 httpx MockTransport"""
+
+    def _create_client(self, base_url: str) -> httpx.AsyncClient:
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"choices": [
+                {"message": {"role": "assistant", "content": "답변입니다"}, "finish_reason": "stop"}]})
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_shared_prefix_length():
+    previous = [{"role": "system", "content": "sys"}, {"role": "user", "content": "안녕하세요"}]
+    assert shared_prefix_length(previous, previous + [{"role": "assistant", "content": "네"}]) == 8
+    assert shared_prefix_length(previous, [{"role": "system", "content": "sys"},
+                                           {"role": "user", "content": "안녕"}]) == 5
+    assert shared_prefix_length(previous, [{"role": "user", "content": "sys"}]) == 0
+
+
+def test_tracker_stats_per_endpoint():
+    tracker = PrefixTracker()
+    messages = [{"role": "system", "content": "abcd"}]
+    assert tracker.observe("a", messages) == 0
+    assert tracker.observe("b", messages) == 0
+    assert tracker.observe("a", messages) == 4
+    stats = tracker.stats()
+    assert stats["requests"] == 3 and stats["shared_chars"] == 4 and stats["total_chars"] == 12
+
+
+def test_shared_prefix_is_recorded_on_llm_span():
+    """두 번째 턴의 llm.request span에 직전 요청과 공유한 접두사 길이를 기록"""
+    configure_telemetry("memory")
+
+    async def scenario():
+        transport = StubTransport()
+        agent = PromptBasedAgent(None, [], "시스템 프롬프트", transport=transport,
+                                 router=LLMRouter({"endpoints": [BASE_URL], "health_check_interval": 0}),
+                                 completion_cache=CompletionCache({"enabled": False}))
+        await agent.run(task="첫 질문")
+        await agent.run(task="두 번째 질문")
+        await transport.aclose()
+        return transport
+
+    transport = asyncio.run(scenario())
+    shared = [span.attributes["llm.shared_prefix_chars"] for span in get_finished_spans()
+              if span.name == "llm.request"][-2:]
+    assert shared[0] == 0
+    assert shared[1] == transport.prefix_tracker.last_shared_prefix > len("시스템 프롬프트")
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"{name}: ok")
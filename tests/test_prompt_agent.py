@@ -0,0 +1,104 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from typing import Any, Dict, List, Optional
+import httpx
+import pytest
+from orchestrator.config import PROMPT_AGENT_CONFIG
+from orchestrator.llm_cache import CompletionCache
+from orchestrator.llm_router import LLMRouter
+from orchestrator.prompt_agent import PromptBasedAgent, is_error_message
+
+
+class FlakyStreamTransport:
+    """호출마다 outcomes 항목을 차례로 사용 - 문자열은 답변, 예외는 발생, 숫자는 그만큼 지연 후 답변"""
+
+    def __init__(self, outcomes: List[Any]):
+        self.outcomes = list(outcomes)
+        self.payloads: List[Dict[str, Any]] = []
+
+    async def stream_chat_completion(self, payload: Dict[str, Any], base_url: Optional[str] = None,
+                                     stream_info: Optional[Dict[str, Any]] = None):
+        self.payloads.append(payload)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if isinstance(outcome, (int, float)):
+            await asyncio.sleep(outcome)
+            outcome = "늦은 답변"
+        yield outcome
+        if stream_info is not None:
+            stream_info["finish_reason"] = "stop"
+
+
+def make_agent(transport, **kwargs) -> PromptBasedAgent:
+    return PromptBasedAgent(None, [], "sys", transport=transport, stream=True,
+                            router=LLMRouter({"endpoints": ["http://stub/v1"], "health_check_interval": 0}),
+                            completion_cache=CompletionCache({"enabled": False}), **kwargs)
+
+
+def roles(payload: Dict[str, Any]) -> List[str]:
+    return [msg["role"] for msg in payload["messages"]]
+
+
+def test_tool_timeout_none_disables_limit():
+    """tool_timeout을 생략하면 설정값, None을 넘기면 제한 없음"""
+    assert make_agent(None).tool_timeout == PROMPT_AGENT_CONFIG["tool_timeout"]
+    assert make_agent(None, tool_timeout=None).tool_timeout is None
+    assert make_agent(None, tool_timeout=5.0).tool_timeout == 5.0
+
+
+def test_failed_turn_is_rolled_back():
+    """LLM 오류로 답변 없이 끝난 턴의 user 메시지는 히스토리에 남지 않음"""
+    async def scenario():
+        error = httpx.HTTPStatusError("LLM API 오류: 400", request=httpx.Request("POST", "http://stub/v1"),
+                                      response=httpx.Response(400))
+        transport = FlakyStreamTransport(["첫 답변", error, "세 번째 답변"])
+        agent = make_agent(transport)
+        await agent.run("첫 질문")
+        failed = await agent.run("두 번째 질문")
+        assert is_error_message(failed.chat_message)
+        assert agent.conversation_history == [{"role": "user", "content": "첫 질문"},
+                                              {"role": "assistant", "content": "첫 답변"}]
+
+        await agent.run("세 번째 질문")
+        assert roles(transport.payloads[-1]) == ["system", "user", "assistant", "user"]
+        assert transport.payloads[-1]["messages"][-1]["content"] == "세 번째 질문"
+    asyncio.run(scenario())
+
+
+def test_deadline_expired_turn_is_rolled_back():
+    async def scenario():
+        transport = FlakyStreamTransport([1.0, "답변"])
+        agent = make_agent(transport, turn_timeout=0.05)
+        failed = await agent.run("느린 질문")
+        assert is_error_message(failed.chat_message)
+        assert agent.conversation_history == []
+
+        await agent.run("다음 질문")
+        assert roles(transport.payloads[-1]) == ["system", "user"]
+    asyncio.run(scenario())
+
+
+def test_cancelled_turn_is_rolled_back():
+    """호출한 쪽이 답변 전에 턴을 취소해도 user 메시지를 되돌림"""
+    async def scenario():
+        agent = make_agent(FlakyStreamTransport([1.0]))
+        task = asyncio.ensure_future(agent.run("질문"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert agent.conversation_history == []
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,112 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from typing import Any, Dict, List, Optional
+from autogen_agentchat.messages import TextMessage, ToolCallExecutionEvent
+from autogen_core import CancellationToken
+from orchestrator.llm_cache import CompletionCache
+from orchestrator.llm_router import LLMRouter
+from orchestrator.prompt_agent import PromptBasedAgent
+
+
+class ScriptedStreamTransport:
+    """호출마다 (청크 목록, finish_reason)을 차례로 돌려주는 스트리밍 전송 계층"""
+
+    def __init__(self, responses: List[tuple]):
+        self.responses = list(responses)
+        self.requests = 0
+
+    async def stream_chat_completion(self, payload: Dict[str, Any], base_url: Optional[str] = None,
+                                     stream_info: Optional[Dict[str, Any]] = None):
+        chunks, finish_reason = self.responses[min(self.requests, len(self.responses) - 1)]
+        self.requests += 1
+        for chunk in chunks:
+            yield chunk
+        if stream_info is not None and finish_reason:
+            stream_info["finish_reason"] = finish_reason
+
+
+class EchoTool:
+    name = "cpu_usage"
+    description = "CPU 사용률"
+
+    async def run_json(self, args, cancellation_token):
+        return "12%"
+
+    def return_value_as_string(self, value):
+        return str(value)
+
+
+def make_agent(transport, cache: CompletionCache, tools=None) -> PromptBasedAgent:
+    return PromptBasedAgent(None, tools or [], "sys", transport=transport, stream=True,
+                            router=LLMRouter({"endpoints": ["http://stub/v1"], "health_check_interval": 0}),
+                            completion_cache=cache)
+
+
+def make_cache() -> CompletionCache:
+    return CompletionCache({"enabled": True, "allow_nondeterministic": True, "persist_path": None})
+
+
+async def run_turn(agent: PromptBasedAgent, task: str = "CPU?") -> List[Any]:
+    return [event async for event in agent.on_messages_stream([TextMessage(content=task, source="user")],
+                                                               CancellationToken())]
+
+
+def test_stream_caches_only_stop_finish():
+    """finish_reason이 stop인 스트리밍 응답만 캐시하고, length로 잘린 응답은 캐시하지 않음"""
+    async def scenario():
+        cache = make_cache()
+        truncated = make_agent(ScriptedStreamTransport([(["잘린 ", "답변"], "length")]), cache)
+        await run_turn(truncated)
+        assert truncated.last_finish_reason == "length"
+        assert cache.stats()["size"] == 0
+
+        complete = make_agent(ScriptedStreamTransport([(["완전한 ", "답변"], "stop")]), cache)
+        await run_turn(complete)
+        assert complete.last_finish_reason == "stop"
+        assert cache.stats()["size"] == 1
+
+        # 같은 요청은 캐시에서 응답
+        replay_transport = ScriptedStreamTransport([(["다른 답변"], "stop")])
+        events = await run_turn(make_agent(replay_transport, cache))
+        assert replay_transport.requests == 0
+        assert [e.content for e in events if isinstance(e, TextMessage)] == ["완전한 답변"]
+    asyncio.run(scenario())
+
+
+def test_stream_without_finish_reason_is_not_cached():
+    async def scenario():
+        cache = make_cache()
+        await run_turn(make_agent(ScriptedStreamTransport([(["답변"], None)]), cache))
+        assert cache.stats()["size"] == 0
+    asyncio.run(scenario())
+
+
+def test_early_stopped_stream_is_not_cached():
+    """툴 호출 뒤 지어낸 결과로 조기 중단한 응답은 서버가 stop으로 끝냈어도 캐시하지 않음"""
+    async def scenario():
+        cache = make_cache()
+        fabricated = ["<tool_call><name>cpu_usage</name><arguments>{}</arguments></tool_call>",
+                      "<tool_result name='cpu_usage'>99", "%</tool_result>", "CPU는 99%입니다"]
+        transport = ScriptedStreamTransport([(fabricated, "stop"), (["CPU는 12%입니다"], "stop")])
+        agent = make_agent(transport, cache, tools=[EchoTool()])
+        events = await run_turn(agent)
+
+        assert agent.early_stops == 1
+        assert any(isinstance(e, ToolCallExecutionEvent) for e in events)
+        assert [e.content for e in events if isinstance(e, TextMessage)] == ["CPU는 12%입니다"]
+        # 최종 답변만 캐시됨 (지어낸 결과가 담긴 첫 응답은 제외)
+        assert cache.stats()["size"] == 1
+        assert "99%" not in "".join(cache._memory.values())
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"{name}: ok")
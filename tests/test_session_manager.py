@@ -0,0 +1,82 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import orchestrator.session_manager as session_manager
+from orchestrator.session_manager import ChatSession, SessionManager
+
+
+def make_manager(**config) -> SessionManager:
+    manager = SessionManager({"turn_timeout": None, "eviction_interval": 0, **config})
+    manager._tools = []
+    return manager
+
+
+def test_waiting_turn_keeps_session_from_eviction():
+    """잠금을 기다리는 턴이 있는 세션은 유휴 시간이 지나도 정리하지 않음"""
+    async def scenario():
+        manager = make_manager(idle_timeout=0)
+        session = manager._sessions["s"] = ChatSession("s", agent=None)
+        first_started, release_first = asyncio.Event(), asyncio.Event()
+        seen = []
+
+        async def first():
+            async with manager.turn("s") as current:
+                first_started.set()
+                await release_first.wait()
+                seen.append(current)
+
+        async def second():
+            async with manager.turn("s") as current:
+                # 앞 턴이 끝나고 잠금을 넘겨받기 전에 정리가 돌아도 같은 세션을 유지
+                assert manager.evict_idle() == 0
+                seen.append(current)
+
+        first_task = asyncio.create_task(first())
+        await first_started.wait()
+        second_task = asyncio.create_task(second())
+        await asyncio.sleep(0)
+        assert session.in_use == 2
+        assert manager.evict_idle() == 0
+
+        release_first.set()
+        await asyncio.sleep(0)
+        assert manager.evict_idle() == 0
+        await asyncio.gather(first_task, second_task)
+
+        assert seen == [session, session] and session.turns == 2
+        assert session.in_use == 0 and not session.busy
+        await asyncio.sleep(0.01)
+        assert manager.evict_idle() == 1
+    asyncio.run(scenario())
+
+
+def test_new_session_is_not_evicted_by_overflow(monkeypatch):
+    """최대 세션 수를 넘어도 방금 만든 세션은 정리하지 않고 유휴 세션을 정리"""
+    async def fake_agent(**kwargs):
+        return object()
+    monkeypatch.setattr(session_manager, "create_orchestrator_agent", fake_agent)
+
+    async def scenario():
+        manager = make_manager(max_sessions=1)
+        manager._sessions["old"] = ChatSession("old", agent=None)
+        async with manager.turn("new") as session:
+            assert list(manager._sessions) == ["new"]
+            assert manager._sessions["new"] is session
+    asyncio.run(scenario())
+
+
+def test_overflow_skips_busy_sessions(monkeypatch):
+    async def fake_agent(**kwargs):
+        return object()
+    monkeypatch.setattr(session_manager, "create_orchestrator_agent", fake_agent)
+
+    async def scenario():
+        manager = make_manager(max_sessions=1)
+        async with manager.turn("busy"):
+            async with manager.turn("new"):
+                assert set(manager._sessions) == {"busy", "new"}
+    asyncio.run(scenario())
@@ -0,0 +1,35 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator import telemetry
+from orchestrator.config import TELEMETRY_CONFIG
+
+
+def test_init_telemetry_respects_enabled(monkeypatch):
+    """모든 진입점이 호출하는 init_telemetry는 설정이 꺼져 있으면 SDK를 설정하지 않음"""
+    monkeypatch.setitem(TELEMETRY_CONFIG, "enabled", False)
+    called = []
+    monkeypatch.setattr(telemetry, "configure_telemetry", lambda: called.append(True))
+    assert telemetry.init_telemetry() is False
+    assert called == []
+
+
+def test_init_telemetry_configures_once(monkeypatch):
+    calls, registered = [], []
+    monkeypatch.setitem(TELEMETRY_CONFIG, "enabled", True)
+    monkeypatch.setattr(telemetry, "_state", {**telemetry._state, "configured": False})
+
+    def fake_configure():
+        calls.append(True)
+        telemetry._state["configured"] = True
+        return True
+
+    monkeypatch.setattr(telemetry, "configure_telemetry", fake_configure)
+    monkeypatch.setattr(telemetry.atexit, "register", registered.append)
+    assert telemetry.init_telemetry() is True
+    assert telemetry.init_telemetry() is True
+    assert calls == [True] and registered == [telemetry.shutdown_telemetry]
+
@@ -0,0 +1,124 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import pytest
+from orchestrator.tool_cache import ToolResultCache
+
+
+def make_cache(**config) -> ToolResultCache:
+    return ToolResultCache({"enabled": True, "default_ttl": None, "max_entries": 100,
+                            "tool_ttls": {"cpu_usage": 60.0}, **config})
+
+
+class CountingTool:
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.calls = 0
+        self.delay = delay
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return f"결과 {self.calls}"
+
+
+def test_ttl_hit_and_expiry():
+    """TTL 안에서는 같은 툴 + 인자 호출을 재사용하고, 만료되면 다시 실행"""
+    async def scenario():
+        cache = make_cache(tool_ttls={"cpu_usage": 0.05})
+        tool = CountingTool()
+        assert await cache.get_or_call("cpu_usage", {"a": 1, "b": 2}, tool) == "결과 1"
+        assert await cache.get_or_call("cpu_usage", {"b": 2, "a": 1}, tool) == "결과 1"
+        assert await cache.get_or_call("cpu_usage", {"a": 2}, tool) == "결과 2"
+        await asyncio.sleep(0.06)
+        assert await cache.get_or_call("cpu_usage", {"a": 1, "b": 2}, tool) == "결과 3"
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 3)
+    asyncio.run(scenario())
+
+
+def test_tools_without_ttl_always_run():
+    async def scenario():
+        cache = make_cache()
+        tool = CountingTool()
+        for _ in range(3):
+            await cache.get_or_call("restart_service", {}, tool)
+        assert tool.calls == 3 and cache.stats()["size"] == 0
+    asyncio.run(scenario())
+
+
+def test_concurrent_calls_are_coalesced():
+    """실행 중인 동일 호출이 있으면 새로 실행하지 않고 그 결과를 함께 기다림 (single-flight)"""
+    async def scenario():
+        cache = make_cache()
+        tool = CountingTool(delay=0.02)
+        results = await asyncio.gather(*(cache.get_or_call("cpu_usage", {}, tool) for _ in range(5)))
+        assert results == ["결과 1"] * 5 and tool.calls == 1
+        assert cache.stats()["coalesced"] == 4
+    asyncio.run(scenario())
+
+
+def test_errors_are_not_cached():
+    async def scenario():
+        cache = make_cache()
+        failing = CountingTool(delay=0.01, error=RuntimeError("실패"))
+        results = await asyncio.gather(*(cache.get_or_call("cpu_usage", {}, failing) for _ in range(2)),
+                                       return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results) and failing.calls == 1
+        assert await cache.get_or_call("cpu_usage", {}, CountingTool()) == "결과 1"
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    """기다리던 호출 하나가 취소되어도 공유 실행은 계속되어 다른 호출자가 결과를 받음"""
+    async def scenario():
+        cache = make_cache()
+        tool = CountingTool(delay=0.03)
+        first = asyncio.ensure_future(cache.get_or_call("cpu_usage", {}, tool))
+        second = asyncio.ensure_future(cache.get_or_call("cpu_usage", {}, tool))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "결과 1"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+    asyncio.run(scenario())
+
+
+def test_lru_eviction_and_namespaces():
+    async def scenario():
+        cache = make_cache(max_entries=2)
+        tool = CountingTool()
+        await cache.get_or_call("cpu_usage", {}, tool, namespace="server-a")
+        await cache.get_or_call("cpu_usage", {}, tool, namespace="server-b")
+        assert tool.calls == 2
+        await cache.get_or_call("cpu_usage", {}, tool, namespace="server-a")
+        await cache.get_or_call("cpu_usage", {"x": 1}, tool, namespace="server-a")
+        assert cache.stats()["evictions"] == 1
+        # 가장 오래 쓰지 않은 server-b 항목이 제거됨
+        await cache.get_or_call("cpu_usage", {}, tool, namespace="server-b")
+        assert tool.calls == 4
+    asyncio.run(scenario())
+
+
+def test_invalidate_tool():
+    async def scenario():
+        cache = make_cache(tool_ttls={"cpu_usage": 60.0, "memory_usage": 60.0})
+        tool = CountingTool()
+        await cache.get_or_call("cpu_usage", {}, tool)
+        await cache.get_or_call("memory_usage", {}, tool)
+        cache.invalidate("cpu_usage")
+        assert cache.stats()["size"] == 1
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"{name}: ok")
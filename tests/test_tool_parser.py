@@ -0,0 +1,172 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import pytest
+from orchestrator.tool_parser import IncrementalToolCallParser, ToolCall, ToolCallParser, ToolPlan
+
+RESPONSE = (
+    "확인해 보겠습니다.\n"
+    "<tool_call><name>cpu_usage</name><arguments>{}</arguments></tool_call>\n"
+    "<tool_call><id>disk</id><name>disk_usage</name><arguments>{\"path\": \"/\"}</arguments></tool_call>"
+    "<tool_result name='cpu_usage'>지어낸 결과</tool_result>"
+    "잠시만요 <tool_x> 태그는 그대로"
+)
+
+
+def feed_in_chunks(text: str, size: int):
+    """size 글자씩 나눠 흘려보낸 결과 (보이는 텍스트, 툴 호출 목록)"""
+    parser = IncrementalToolCallParser()
+    visible, tool_calls = [], []
+    for start in range(0, len(text), size):
+        chunk_text, chunk_calls = parser.feed(text[start:start + size])
+        visible.append(chunk_text)
+        tool_calls.extend(chunk_calls)
+    tail, _ = parser.close()
+    return "".join(visible) + tail, tool_calls
+
+
+def test_parse_extracts_calls_and_strips_blocks():
+    """툴 호출과 지어낸 툴 결과를 제거하고 호출 정보를 추출"""
+    text, tool_calls = ToolCallParser.parse(RESPONSE)
+    assert text == "확인해 보겠습니다.\n\n잠시만요 <tool_x> 태그는 그대로"
+    assert [(c.name, c.arguments, c.id) for c in tool_calls] == [
+        ("cpu_usage", {}, None),
+        ("disk_usage", {"path": "/"}, "disk"),
+    ]
+
+
+def test_chunk_boundaries_do_not_change_result():
+    """태그가 청크 경계에 걸쳐도 한 번에 파싱한 결과와 같음"""
+    expected_text, expected_calls = ToolCallParser.parse(RESPONSE)
+    for size in (1, 2, 3, 5, 7, 11, 64):
+        text, tool_calls = feed_in_chunks(RESPONSE, size)
+        assert text == expected_text, size
+        assert tool_calls == expected_calls, size
+
+
+def test_tool_call_is_emitted_as_soon_as_it_closes():
+    """닫는 태그가 도착한 청크에서 바로 호출을 반환"""
+    parser = IncrementalToolCallParser()
+    assert parser.feed("<tool_call><name>cpu_usage</name><arguments>{}</argu") == ("", [])
+    text, tool_calls = parser.feed("ments></tool_call>이어서")
+    assert text == "이어서"
+    assert [c.name for c in tool_calls] == ["cpu_usage"]
+
+
+def test_in_tool_result_flag():
+    """모델이 <tool_result>를 쓰기 시작하면 in_tool_result가 켜짐"""
+    parser = IncrementalToolCallParser()
+    parser.feed("답변 <tool_res")
+    assert not parser.in_tool_result
+    parser.feed("ult name='x'>")
+    assert parser.in_tool_result
+
+
+def test_invalid_arguments_are_reported():
+    """JSON이 아니거나 객체가 아닌 인자는 error가 설정된 호출로 반환"""
+    _, tool_calls = ToolCallParser.parse(
+        "<tool_call><name>a</name><arguments>{잘못됨}</arguments></tool_call>"
+        "<tool_call><name>b</name><arguments>[1, 2]</arguments></tool_call>"
+        "<tool_call><name>c</name><arguments></arguments></tool_call>"
+    )
+    assert [c.name for c in tool_calls] == ["a", "b", "c"]
+    assert tool_calls[0].error.startswith("JSON 파싱 실패")
+    assert tool_calls[1].error == "arguments는 JSON 객체여야 합니다"
+    assert tool_calls[2].error is None and tool_calls[2].arguments == {}
+
+
+def test_unclosed_block_is_returned_as_text():
+    """스트림이 끝날 때까지 닫히지 않은 블록은 일반 텍스트로 돌려줌"""
+    text, tool_calls = ToolCallParser.parse("앞 <tool_call><name>cpu_usage</name>")
+    assert text == "앞 <tool_call><name>cpu_usage</name>"
+    assert tool_calls == []
+
+
+def test_references_are_collected_in_order():
+    """인자 안의 {{id}} 참조를 등장 순서대로 중복 없이 기록"""
+    _, tool_calls = ToolCallParser.parse(
+        "<tool_call><name>send_alert</name>"
+        "<arguments>{\"message\": \"{{disk.percent}}% / {{cpu}} / {{disk.free}}\"}</arguments></tool_call>"
+    )
+    assert tool_calls[0].references == ["disk", "cpu"]
+
+
+def plan_call(name: str, arguments: dict, call_id: str = None) -> ToolCall:
+    """파서를 거친 것과 같은 ToolCall (참조 목록 포함)"""
+    _, tool_calls = ToolCallParser.parse(
+        f"<tool_call>{f'<id>{call_id}</id>' if call_id else ''}<name>{name}</name>"
+        f"<arguments>{json.dumps(arguments, ensure_ascii=False)}</arguments></tool_call>"
+    )
+    return tool_calls[0]
+
+
+def test_plan_add_returns_dependencies():
+    """앞서 정의된 id를 참조하면 선행 호출 인덱스를 반환"""
+    plan = ToolPlan()
+    assert plan.add(plan_call("disk_usage", {"path": "/"}, "disk")) == {}
+    assert plan.add(plan_call("cpu_usage", {}, "cpu")) == {}
+    alert = plan_call("send_alert", {"message": "{{disk.percent}}% {{cpu}}"})
+    assert plan.add(alert) == {"disk": 0, "cpu": 1}
+    assert alert.error is None
+
+
+def test_plan_rejects_cycles_and_unknown_references():
+    """자기 자신/뒤에 나오는 호출 참조(순환)와 중복 id는 error로 표시"""
+    plan = ToolPlan()
+    self_ref = plan_call("a", {"x": "{{a}}"}, "a")
+    assert plan.add(self_ref) == {}
+    assert "정의되지 않은 호출 참조" in self_ref.error
+
+    forward = plan_call("b", {"x": "{{c}}"}, "b")
+    plan.add(forward)
+    later = plan_call("c", {"x": "{{b}}"}, "c")
+    assert plan.add(later) == {"b": 1}
+    assert "{{c}}" in forward.error and later.error is None
+
+    duplicate = plan_call("d", {}, "b")
+    plan.add(duplicate)
+    assert duplicate.error == "중복된 호출 id: b"
+
+
+def test_plan_resolve_substitutes_results():
+    """값 전체가 참조이면 결과 값 그대로, 문자열 일부이면 텍스트로 치환"""
+    call = plan_call("send_alert", {"percent": "{{disk.percent}}", "message": "사용률 {{disk.percent}}%",
+                                    "mounts": ["{{disk.mounts.0}}"], "raw": "{{cpu}}"})
+    resolved = ToolPlan.resolve(call, {"disk": json.dumps({"percent": 91, "mounts": ["/", "/home"]}), "cpu": "12%"})
+    assert resolved.arguments == {"percent": 91, "message": "사용률 91%", "mounts": ["/"], "raw": "12%"}
+    assert json.loads(resolved.raw_arguments) == resolved.arguments
+    # 원래 호출은 바뀌지 않음
+    assert call.arguments["percent"] == "{{disk.percent}}"
+
+
+def test_plan_resolve_unwraps_mcp_text_content():
+    """MCP 텍스트 콘텐츠 목록으로 감싼 결과도 안의 JSON으로 참조"""
+    envelope = json.dumps([{"type": "text", "text": json.dumps({"percent": 73})}])
+    resolved = ToolPlan.resolve(plan_call("send_alert", {"message": "{{disk.percent}}%"}), {"disk": envelope})
+    assert resolved.arguments == {"message": "73%"}
+
+
+def test_plan_resolve_errors():
+    """해석할 수 없는 참조와 error가 있는 호출은 ValueError"""
+    call = plan_call("send_alert", {"message": "{{disk.missing}}"})
+    with pytest.raises(ValueError, match="disk.missing"):
+        ToolPlan.resolve(call, {"disk": json.dumps({"percent": 91})})
+    with pytest.raises(ValueError, match="정의되지 않은 호출 참조"):
+        ToolPlan.resolve(call, {})
+
+    plan = ToolPlan()
+    broken = plan_call("send_alert", {"message": "{{nope}}"})
+    plan.add(broken)
+    with pytest.raises(ValueError, match="send_alert"):
+        ToolPlan.resolve(broken, {"nope": "값"})
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"{name}: ok")
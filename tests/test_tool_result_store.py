@@ -0,0 +1,112 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import re
+import pytest
+from orchestrator.tool_result_store import FETCH_TOOL_NAME, ToolResultCompactor, ToolResultStore
+
+
+def make_compactor(**config) -> ToolResultCompactor:
+    return ToolResultCompactor({"enabled": True, "max_bytes": 1000, "max_tokens": 400, "tool_limits": {}, **config})
+
+
+def handle_of(compacted: str) -> str:
+    return re.search(r'"handle": "([^"]+)"', compacted).group(1)
+
+
+def test_small_results_are_unchanged():
+    """한도 안의 결과와 조회 툴 결과는 그대로 반환"""
+    compactor = make_compactor()
+    assert compactor.compact("cpu_usage", "12%") == "12%"
+    assert compactor.compact(FETCH_TOOL_NAME, "x" * 5000) == "x" * 5000
+    assert compactor.stats()["compactions"] == 0
+
+
+def test_json_results_keep_structure():
+    """JSON 결과는 키를 유지한 채 배열/문자열만 줄이고 원문은 핸들로 조회"""
+    compactor = make_compactor()
+    result = json.dumps({"total": 500, "processes": [{"pid": i, "cmd": "python " * 20} for i in range(500)]})
+    compacted = compactor.compact("process_list", result)
+
+    body, notice = compacted.rsplit("\n", 1)
+    assert len(body.encode("utf-8")) <= 1000
+    value = json.loads(body)
+    assert value["total"] == 500
+    assert set(value["processes"][0]) == {"pid", "cmd"}
+    assert value["processes"][-1].endswith("개 항목 생략)")
+    assert FETCH_TOOL_NAME in notice
+
+    assert compactor.fetch(handle_of(compacted), 0, len(result)) == result
+    stats = compactor.stats()
+    assert stats["compactions"] == 1 and stats["bytes_saved"] > 0
+
+
+def test_text_results_are_cut_and_fetchable_in_pages():
+    """텍스트 결과는 앞부분만 남기고 fetch는 offset부터 나눠 조회"""
+    compactor = make_compactor(fetch_chars=100)
+    result = "\n".join(f"로그 {i:04d} " + "가" * 30 for i in range(300))
+    compacted = compactor.compact("read_log", result)
+    assert result.startswith(compacted.rsplit("\n", 1)[0])
+
+    page = compactor.fetch(handle_of(compacted))
+    assert page.startswith(result[:100])
+    assert "다음 부분은 offset 100로 조회" in page
+    assert compactor.fetch(handle_of(compacted), len(result) - 10) == result[-10:]
+
+
+def test_tool_limits_override_defaults():
+    """툴별 한도가 기본 한도보다 우선"""
+    compactor = make_compactor(tool_limits={"read_log": {"max_bytes": 50000}})
+    assert compactor.limits_for("read_log") == (50000, 400)
+    assert compactor.limits_for("cpu_usage") == (1000, 400)
+
+
+def test_unknown_handle_raises():
+    compactor = make_compactor()
+    with pytest.raises(ValueError, match="res_missing"):
+        compactor.fetch("res_missing")
+
+
+def test_store_evicts_least_recently_used():
+    """항목 수/전체 바이트 한도를 넘으면 가장 오래 쓰지 않은 항목부터 제거"""
+    store = ToolResultStore(max_entries=2, max_bytes=100)
+    first = store.put("a", "1" * 10)
+    second = store.put("b", "2" * 10)
+    assert store.get(first) == "1" * 10
+    third = store.put("c", "3" * 10)
+    assert store.get(second) is None
+    assert store.get(first) is not None and store.get(third) is not None
+
+    store.put("d", "4" * 95)
+    assert len(store) == 1
+    assert store.stats()["evictions"] == 3
+
+
+def test_handles_are_content_hashes():
+    """같은 툴의 같은 원문은 같은 핸들/같은 압축 결과 - 다시 저장해도 중복 보관하지 않음"""
+    result = json.dumps({"items": list(range(2000))})
+    first, second = make_compactor(), make_compactor()
+    assert first.compact("list", result) == second.compact("list", result)
+    assert first.compact("list", result) == second.compact("list", result)
+    assert first.store.stats()["entries"] == 1
+    assert first.store.put("other", result) != first.store.put("list", result)
+
+
+def test_stores_are_not_shared_between_compactors():
+    """압축기(에이전트/세션)마다 보관소가 따로이므로 다른 세션의 핸들은 조회할 수 없음"""
+    owner, other = make_compactor(), make_compactor()
+    handle = handle_of(owner.compact("read_log", "가" * 5000))
+    assert owner.fetch(handle)
+    with pytest.raises(ValueError):
+        other.fetch(handle)
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,115 @@
+import sys
+import os
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator.tool_selector import BM25Index, ToolSelector, tokenize, tool_document
+
+
+class FakeTool:
+    def __init__(self, name: str, description: str, properties=None):
+        self.name = name
+        self.description = description
+        self.input_schema = {"type": "object", "properties": properties or {}}
+
+
+TOOLS = [
+    FakeTool("cpu_usage", "CPU 사용률 조회"),
+    FakeTool("memory_usage", "메모리 사용량 조회"),
+    FakeTool("disk_usage", "디스크 사용량 조회", {"path": {"type": "string", "description": "마운트 경로"}}),
+    FakeTool("process_list", "실행 중인 프로세스 목록"),
+    FakeTool("network_stats", "네트워크 트래픽 통계"),
+    FakeTool("read_log", "로그 파일 읽기", {"lines": {"type": "integer", "description": "읽을 줄 수"}}),
+    FakeTool("service_status", "systemd 서비스 상태"),
+    FakeTool("restart_service", "systemd 서비스 재시작"),
+    FakeTool("uptime", "시스템 가동 시간"),
+    FakeTool("list_users", "로그인한 사용자 목록"),
+]
+
+
+def make_selector(**config) -> ToolSelector:
+    return ToolSelector(TOOLS, {"top_k": 2, "min_tools": 3, **config})
+
+
+def names_in(prompt: str):
+    """시스템 프롬프트의 사용 가능한 도구 목록에 있는 툴 이름"""
+    listed = prompt.split("사용 가능한 도구:", 1)[1]
+    return {tool.name for tool in TOOLS if f"- {tool.name}:" in listed}
+
+
+def test_tokenize_splits_words_and_hangul_bigrams():
+    assert tokenize("disk_usage 확인") == ["disk", "usage", "확인", "확인"]
+    assert "사용" in tokenize("사용률을") and "용률" in tokenize("사용률은")
+
+
+def test_tool_document_includes_parameters():
+    document = tool_document(TOOLS[2])
+    assert "disk usage" in document and "마운트 경로" in document and "path" in document
+
+
+def test_bm25_ranks_matching_document_first():
+    index = BM25Index(["cpu 사용률 조회", "메모리 사용량 조회", "네트워크 트래픽"])
+    scores = index.scores("메모리 사용량")
+    assert scores.index(max(scores)) == 1
+    assert scores[2] == 0
+
+
+def test_select_returns_top_k_in_registration_order():
+    """점수 상위 top_k개를 고르되 원래 등록 순서로 반환 (조사가 붙어도 일치)"""
+    selector = make_selector()
+    selected = [tool.name for tool in selector.select("서비스 상태를 확인하고 재시작해줘")]
+    assert selected == ["service_status", "restart_service"]
+
+
+def test_fallback_to_full_prompt():
+    """관련 툴이 없거나 툴 수가 min_tools 이하이면 전체 툴 목록 프롬프트 사용"""
+    selector = make_selector()
+    assert selector.system_prompt("안녕하세요") == selector.full_prompt
+    small = ToolSelector(TOOLS[:3], {"min_tools": 3})
+    assert small.system_prompt("CPU 사용률") == small.full_prompt
+    assert small.stats()["fallback_turns"] == 1
+
+
+def test_stats_count_saved_tokens():
+    selector = make_selector()
+    selector.system_prompt("CPU 사용률")
+    selector.system_prompt("안녕하세요")
+    stats = selector.stats()
+    assert stats["turns"] == 2 and stats["selected_turns"] == 1 and stats["fallback_turns"] == 1
+    assert 0 < stats["prompt_tokens_saved"] < stats["full_prompt_tokens"]
+
+
+def test_sticky_selection_keeps_prompt_across_turns():
+    """sticky면 이미 선택된 툴로 답할 수 있는 턴은 같은 시스템 프롬프트를 그대로 사용"""
+    selector = make_selector()
+    first = selector.system_prompt("CPU 사용률 알려줘")
+    assert "cpu_usage" in names_in(first)
+    assert selector.system_prompt("CPU 사용률 다시") is first
+
+    # 새 툴이 필요하면 기존 툴에 더해 유지
+    second = selector.system_prompt("메모리 사용량은?")
+    assert names_in(first) <= names_in(second)
+    assert "memory_usage" in names_in(second)
+    assert selector.system_prompt("CPU 사용률") is second
+
+
+def test_sticky_selection_restarts_when_too_large():
+    selector = make_selector(max_sticky_tools=2, top_k=1)
+    selector.system_prompt("CPU 사용률")
+    selector.system_prompt("메모리 사용량")
+    prompt = selector.system_prompt("네트워크 트래픽")
+    assert names_in(prompt) == {"network_stats"}
+
+
+def test_non_sticky_selection_follows_each_query():
+    selector = make_selector(sticky=False, top_k=1)
+    assert names_in(selector.system_prompt("CPU 사용률")) == {"cpu_usage"}
+    assert names_in(selector.system_prompt("네트워크 트래픽")) == {"network_stats"}
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+            print(f"{name}: ok")
@@ -3,31 +3,22 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import streamlit as st
-import asyncio
 from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.messages import TextMessage
+from autogen_agentchat.messages import TextMessage, ModelClientStreamingChunkEvent
 from autogen_agentchat.base import Response
 from autogen_core import CancellationToken
 from orchestrator.llm_connector import get_llm_client
 from orchestrator.mcp_tool_loader import load_mcp_tools
+from orchestrator.loop_runner import get_loop_runner
+from orchestrator.telemetry import init_telemetry
 
-# TrackableAssistantAgent: 메시지를 Streamlit UI로 전달하도록 확장
-class TrackableAssistantAgent(AssistantAgent):
-    async def on_messages_stream(self, messages, cancellation_token):
-        async for evt in super().on_messages_stream(messages, cancellation_token):
-            # Assistant의 텍스트 응답만 추가
-            if isinstance(evt, TextMessage) and evt.source == "assistant":
-                st.session_state.history.append(("assistant", evt.content))
-            elif isinstance(evt, Response) and hasattr(evt, "chat_message"):
-                msg = evt.chat_message
-                if isinstance(msg, TextMessage) and msg.source == "assistant":
-                    st.session_state.history.append(("assistant", msg.content))
-            yield evt
+# Streamlit은 상호작용마다 스크립트를 다시 실행하지만 설정은 프로세스당 한 번만 이루어짐
+init_telemetry()
 
 async def init_agent():
     llm = get_llm_client()
     tools = await load_mcp_tools()
-    return TrackableAssistantAgent(
+    return AssistantAgent(
         name="orch",
         model_client=llm,
         tools=tools,
@@ -39,9 +30,12 @@ async def init_agent():
 def run():
     st.title("🔗 AutoGen MCP Orchestrator Chatbot")
 
+    # 모든 비동기 작업은 백그라운드 스레드의 단일 이벤트 루프에서 실행 (커넥션 풀 재사용)
+    runner = get_loop_runner()
+
     if "agent" not in st.session_state:
         st.session_state.history = []
-        st.session_state.agent = asyncio.new_event_loop().run_until_complete(init_agent())
+        st.session_state.agent = runner.run(init_agent())
 
     # 사용자 입력 UI
     st.text_input("질문을 입력하세요:", key="user_input")
@@ -50,14 +44,23 @@ def run():
         st.session_state.history.append(("user", user_input))
         st.session_state.user_input = ""
 
-        async def ask():
-            async for _ in st.session_state.agent.on_messages_stream(
-                [TextMessage(content=user_input, source="user")],
-                CancellationToken()
-            ):
-                pass
-
-        asyncio.new_event_loop().run_until_complete(ask())
+        # 이벤트는 루프 스레드에서 큐로 전달되고, UI 갱신은 스크립트 스레드에서만 수행
+        events = runner.stream(st.session_state.agent.on_messages_stream(
+            [TextMessage(content=user_input, source="user")],
+            CancellationToken()
+        ))
+        placeholder = st.empty()
+        partial = ""
+        for evt in events:
+            if isinstance(evt, ModelClientStreamingChunkEvent):
+                partial += evt.content
+                placeholder.markdown(f"**🤖  {partial}**")
+            elif isinstance(evt, Response):
+                if isinstance(evt.chat_message, TextMessage):
+                    st.session_state.history.append(("assistant", evt.chat_message.content))
+            elif isinstance(evt, TextMessage) and evt.source != "user":
+                st.session_state.history.append(("assistant", evt.content))
+        placeholder.empty()
 
     # 메시지 렌더링
     for role, msg in st.session_state.history:
@@ -1,57 +1,85 @@
+import time
 import gradio as gr
-import asyncio
-from orchestrator.agent_builder import create_orchestrator_agent
-from autogen_agentchat.messages import TextMessage
-from autogen_core import CancellationToken
-from autogen_agentchat.messages import ToolCallRequestEvent, ToolCallExecutionEvent
+from orchestrator.session_manager import get_session_manager
+from orchestrator.config import UI_STREAM_CONFIG
+from orchestrator.telemetry import init_telemetry
+from autogen_agentchat.base import Response
+from autogen_agentchat.messages import TextMessage, BaseChatMessage
+from autogen_agentchat.messages import ToolCallRequestEvent, ToolCallExecutionEvent, ModelClientStreamingChunkEvent
 
-async def init_agent():
-    return await create_orchestrator_agent()
+init_telemetry()
 
-def sync_init():
-    return asyncio.new_event_loop().run_until_complete(init_agent())
+def _session_id(request: gr.Request) -> str:
+    """Gradio 브라우저 세션 식별자"""
+    return getattr(request, "session_hash", None) or "default"
 
-def chat_fn(user_message, history):
-    if not hasattr(chat_fn, "agent"):
-        chat_fn.agent = sync_init()
-
-    history = history or []
-    history.append({"role": "user", "content": user_message})
-
-    # 단계별 메시지 기록
+async def chat_fn(user_message, history, request: gr.Request):
+    # Gradio의 이벤트 루프에서 실행 - 세션별 에이전트, LLM/MCP 풀은 전체 공유
+    # 이벤트가 올 때마다 이번 턴의 메시지 목록을 다시 내보냄 (AssistantAgent/PromptBasedAgent 공통)
     assistant_msgs = []
+    partial = None       # 스트리밍 중인 텍스트 메시지
+    last_render = 0.0
 
-    # 전체 실행 (툴 호출 / 추론)
-    loop = asyncio.new_event_loop()
-    async def run_full():
-        async for evt in chat_fn.agent.on_messages_stream(
+    async with get_session_manager().turn(_session_id(request)) as session:
+        async for evt in session.agent.on_messages_stream(
             [TextMessage(content=user_message, source="user")],
-            CancellationToken()
+            session.cancellation_token
         ):
+            # 부분 텍스트 청크 - 렌더링 간격을 제한해 프론트엔드 과부하 방지
+            if isinstance(evt, ModelClientStreamingChunkEvent):
+                if partial is None:
+                    partial = {"role": "assistant", "content": ""}
+                    assistant_msgs.append(partial)
+                partial["content"] += evt.content
+                now = time.monotonic()
+                if now - last_render >= UI_STREAM_CONFIG["min_render_interval"]:
+                    last_render = now
+                    yield assistant_msgs
+                continue
+
             # 툴 호출 요청 로그
             if isinstance(evt, ToolCallRequestEvent):
-                assistant_msgs.append({
-                    "role": "assistant",
-                    "content": f"🛠 calling tool: {evt.name}({evt.arguments})",
-                    "metadata": {"title": f"Tool 호출: {evt.name}"}
-                })
+                partial = None
+                for call in evt.content:
+                    assistant_msgs.append({
+                        "role": "assistant",
+                        "content": f"🛠 calling tool: {call.name}({call.arguments})",
+                        "metadata": {"title": f"Tool 호출: {call.name}", "id": call.id, "status": "pending"}
+                    })
             elif isinstance(evt, ToolCallExecutionEvent):
-                assistant_msgs.append({
-                    "role": "assistant",
-                    "content": f"✅ tool {evt.name} 실행 결과: {evt.result}",
-                    "metadata": {"title": f"Tool 결과: {evt.name}"}
-                })
-            # 최종 LLM 응답
-            elif hasattr(evt, "content"):
-                assistant_msgs.append({
-                    "role": "assistant",
-                    "content": evt.content,
-                    "metadata": {"title": "최종 요약"}
-                })
-    loop.run_until_complete(run_full())
+                partial = None
+                for result in evt.content:
+                    # 대응하는 호출 메시지를 완료 상태로 표시
+                    for msg in assistant_msgs:
+                        if msg.get("metadata", {}).get("id") == result.call_id:
+                            msg["metadata"]["status"] = "done"
+                    icon = "❌" if result.is_error else "✅"
+                    assistant_msgs.append({
+                        "role": "assistant",
+                        "content": f"{icon} tool {result.name} 실행 결과: {result.content}",
+                        "metadata": {"title": f"Tool 결과: {result.name}"}
+                    })
+            # 최종 LLM 응답 (AssistantAgent는 Response로 전달)
+            else:
+                final = evt.chat_message if isinstance(evt, Response) else evt
+                if not isinstance(final, BaseChatMessage) or not isinstance(final.content, str):
+                    continue
+                if partial is not None:
+                    # 스트리밍으로 보여 준 텍스트를 정리된 최종 응답으로 교체
+                    partial["content"] = final.content
+                    partial["metadata"] = {"title": "최종 요약"}
+                else:
+                    assistant_msgs.append({
+                        "role": "assistant",
+                        "content": final.content,
+                        "metadata": {"title": "최종 요약"}
+                    })
+                partial = None
 
-    # history 확장 후 반환
-    return history + assistant_msgs
+            last_render = time.monotonic()
+            yield assistant_msgs
+
+    yield assistant_msgs
 
 demo = gr.ChatInterface(
     fn=chat_fn,
@@ -60,5 +88,12 @@ demo = gr.ChatInterface(
     description="질문 입력 시 툴 호출 및 마지막 응답 과정을 단계별로 보여줍니다."
 )
 
+def close_session(request: gr.Request):
+    # 브라우저 탭이 닫히면 세션 정리 (닫히지 않은 세션은 유휴 시간 초과 시 정리)
+    get_session_manager().close_session(_session_id(request))
+
+with demo:
+    demo.unload(close_session)
+
 if __name__ == "__main__":
     demo.launch()